@@ -0,0 +1,480 @@
+"""
+Headless batch ad generation.
+
+Queues product URLs in a local SQLite file and runs each one through the same stages
+the wizard drives (analysis -> market -> script -> media -> processing) across a pool
+of workers. Each finished stage is checkpointed, so an interrupted run resumes at the
+first unfinished stage of every job.
+
+    python batch.py enqueue urls.txt
+    python batch.py run --workers 8
+    python batch.py status
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from manager.agent import root_agent
+from manager.tools.settings import get_settings
+from manager.tools.state_offload import hydrate_state
+
+settings = get_settings()
+BATCH_DB_PATH = settings.batch_db_path
+BATCH_WORKERS = settings.batch_workers
+BATCH_STAGE_ATTEMPTS = settings.batch_stage_attempts
+# Seconds between throughput reports while running
+REPORT_INTERVAL = 30
+RETRY_DELAY = 5
+
+APP_NAME = "manager"
+USER_ID = "batch"
+
+logger = logging.getLogger("batch")
+
+
+@dataclass
+class Stage:
+    """One wizard step: the prompt sent to the manager and how to tell it succeeded."""
+
+    name: str
+    prompt: Callable[[dict], str]
+    done: Callable[[dict, set[str], str], bool]
+
+
+def _final_url(text: str) -> str | None:
+    match = re.search(r"Final Video URL:\s*(\S+)", text)
+    return match.group(1) if match else None
+
+
+# Same prompts as frontend/components/video-generation-wizard.tsx
+STAGES = [
+    Stage(
+        name="analysis",
+        prompt=lambda state: "Run analysis agent to extract product metadata from "
+        f"this URL: {state['product_url']}",
+        done=lambda state, artifacts, text: bool(
+            state.get("metadata") and state.get("product_image")
+        ),
+    ),
+    Stage(
+        name="market",
+        prompt=lambda state: "Run market agent to analyze market for this product: "
+        f"{json.dumps(state['metadata'])}",
+        done=lambda state, artifacts, text: bool(state.get("market_analysis")),
+    ),
+    Stage(
+        name="script",
+        prompt=lambda state: "Run script agent to generate video ad script using "
+        f"this metadata: {json.dumps(state['metadata'])} and this market analysis: "
+        f"{json.dumps(state['market_analysis'])}",
+        done=lambda state, artifacts, text: bool(state.get("av_script")),
+    ),
+    Stage(
+        name="media",
+        prompt=lambda state: "Run media agent to generate the avatar video and "
+        "product video in parallel using this audio script: "
+        f"{state['av_script']['audio_script']} and this video script: "
+        f"{state['av_script']['video_script']}",
+        done=lambda state, artifacts, text: {"a_roll.mp4", "b_roll.mp4"} <= artifacts,
+    ),
+    Stage(
+        name="processing",
+        prompt=lambda state: "Run processing agent to combine A-roll and B-roll into "
+        "final video",
+        done=lambda state, artifacts, text: bool(_final_url(text)),
+    ),
+]
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with per-stage checkpoints.
+
+    Each job stores the index of its next stage and a snapshot of the session state
+    and artifacts taken after the last finished stage.
+    """
+
+    def __init__(self, path: str | Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                stage INTEGER NOT NULL DEFAULT 0,
+                snapshot TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+            CREATE TABLE IF NOT EXISTS stage_runs (
+                job_id INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                attempt INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                ok INTEGER NOT NULL,
+                finished_at REAL NOT NULL
+            );
+            """)
+        self._db.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self._db.commit()
+            return rows
+
+    def enqueue(self, urls: list[str]) -> int:
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO jobs (url, created_at) VALUES (?, ?)",
+                [(url, now) for url in urls],
+            )
+            self._db.commit()
+        return len(urls)
+
+    def requeue_interrupted(self) -> int:
+        """Returns jobs left running by a crashed or stopped run to the queue."""
+
+        rows = self._execute(
+            "UPDATE jobs SET status = 'pending' WHERE status = 'running' RETURNING id"
+        )
+        return len(rows)
+
+    def claim(self) -> sqlite3.Row | None:
+        rows = self._execute(
+            "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ("
+            "SELECT id FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ") RETURNING *",
+            (time.time(),),
+        )
+        return rows[0] if rows else None
+
+    def checkpoint(self, job_id: int, stage: int, snapshot: dict) -> None:
+        self._execute(
+            "UPDATE jobs SET stage = ?, snapshot = ? WHERE id = ?",
+            (stage, json.dumps(snapshot), job_id),
+        )
+
+    def finish(self, job_id: int, result: str | None) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+            "finished_at = ? WHERE id = ?",
+            (result, time.time(), job_id),
+        )
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+            "WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def retry_failed(self) -> int:
+        """Requeues failed jobs; they resume at the stage that failed."""
+
+        rows = self._execute(
+            "UPDATE jobs SET status = 'pending', error = NULL "
+            "WHERE status = 'failed' RETURNING id"
+        )
+        return len(rows)
+
+    def record_stage(
+        self, job_id: int, stage: str, attempt: int, seconds: float, ok: bool
+    ) -> None:
+        self._execute(
+            "INSERT INTO stage_runs VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, stage, attempt, seconds, int(ok), time.time()),
+        )
+
+    def report(self, since: float | None = None) -> dict:
+        """Job counts, completed jobs per hour and per-stage timings."""
+
+        counts = {
+            row["status"]: row["n"]
+            for row in self._execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            )
+        }
+        since = since or 0.0
+        finished = self._execute(
+            "SELECT COUNT(*) AS n, MIN(started_at) AS first, MAX(finished_at) AS last "
+            "FROM jobs WHERE status = 'done' AND finished_at >= ?",
+            (since,),
+        )[0]
+        elapsed = (finished["last"] or 0) - max(finished["first"] or 0, since)
+        stages = {
+            row["stage"]: {
+                "runs": row["runs"],
+                "failures": row["failures"],
+                "avg_seconds": round(row["avg_seconds"], 2),
+            }
+            for row in self._execute(
+                "SELECT stage, COUNT(*) AS runs, SUM(1 - ok) AS failures, "
+                "AVG(CASE WHEN ok THEN seconds END) AS avg_seconds "
+                "FROM stage_runs WHERE finished_at >= ? GROUP BY stage",
+                (since,),
+            )
+            if row["avg_seconds"] is not None
+        }
+        return {
+            "jobs": counts,
+            "completed": finished["n"],
+            "jobs_per_hour": (
+                round(finished["n"] * 3600 / elapsed, 2) if elapsed > 0 else 0.0
+            ),
+            "stages": stages,
+        }
+
+
+class BatchRunner:
+    """Runs queued jobs through root_agent with a fixed number of workers."""
+
+    def __init__(self, queue: JobQueue, workers: int = BATCH_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        self.runner = Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=InMemorySessionService(),
+            artifact_service=InMemoryArtifactService(),
+        )
+
+    async def run(self) -> dict:
+        requeued = await asyncio.to_thread(self.queue.requeue_interrupted)
+        if requeued:
+            logger.info("Resuming %d interrupted jobs", requeued)
+
+        started = time.time()
+        reporter = asyncio.create_task(self._report_loop(started))
+        try:
+            await asyncio.gather(*(self._worker(i) for i in range(self.workers)))
+        finally:
+            reporter.cancel()
+        report = await asyncio.to_thread(self.queue.report, started)
+        logger.info("Batch finished: %s", json.dumps(report))
+        return report
+
+    async def _report_loop(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            report = await asyncio.to_thread(self.queue.report, started)
+            logger.info("Throughput: %s", json.dumps(report))
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                return
+            logger.info("Worker %d: job %d (%s)", index, job["id"], job["url"])
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                logger.exception("Job %d failed", job["id"])
+                await asyncio.to_thread(self.queue.fail, job["id"], repr(e))
+
+    async def _run_job(self, job: sqlite3.Row) -> None:
+        snapshot = json.loads(job["snapshot"] or "{}")
+        session = await self._restore(job["url"], snapshot)
+        try:
+            text = ""
+            for index in range(job["stage"], len(STAGES)):
+                stage = STAGES[index]
+                text = await self._run_stage(job["id"], session.id, stage)
+                if text is None:
+                    await asyncio.to_thread(
+                        self.queue.fail,
+                        job["id"],
+                        f"Stage '{stage.name}' failed after "
+                        f"{BATCH_STAGE_ATTEMPTS} attempts",
+                    )
+                    return
+                snapshot = await self._snapshot(session.id)
+                await asyncio.to_thread(
+                    self.queue.checkpoint, job["id"], index + 1, snapshot
+                )
+
+            result = _final_url(text) or job["result"]
+            await asyncio.to_thread(self.queue.finish, job["id"], result)
+        finally:
+            await self._discard(session.id)
+
+    async def _run_stage(
+        self, job_id: int, session_id: str, stage: Stage
+    ) -> str | None:
+        """Runs a stage with retries; returns the final response text, or None."""
+
+        for attempt in range(1, BATCH_STAGE_ATTEMPTS + 1):
+            started = time.monotonic()
+            ok = False
+            text = ""
+            try:
+                state = await self._hydrated_state(session_id)
+                # Tool and model calls each pass their provider's limiter
+                text = await self._send(session_id, stage.prompt(state))
+                state = await self._state(session_id)
+                artifacts = set(
+                    await self.runner.artifact_service.list_artifact_keys(
+                        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+                    )
+                )
+                ok = stage.done(state, artifacts, text)
+            except Exception as e:
+                logger.warning("Job %d stage %s error: %r", job_id, stage.name, e)
+
+            seconds = time.monotonic() - started
+            await asyncio.to_thread(
+                self.queue.record_stage, job_id, stage.name, attempt, seconds, ok
+            )
+            if ok:
+                logger.info("Job %d: %s done in %.1fs", job_id, stage.name, seconds)
+                return text
+            logger.warning(
+                "Job %d: %s attempt %d failed: %s",
+                job_id,
+                stage.name,
+                attempt,
+                text[-300:],
+            )
+            await asyncio.sleep(RETRY_DELAY * attempt)
+        return None
+
+    async def _send(self, session_id: str, prompt: str) -> str:
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        texts = []
+        async for event in self.runner.run_async(
+            user_id=USER_ID, session_id=session_id, new_message=message
+        ):
+            if event.content and event.content.parts:
+                texts.extend(part.text for part in event.content.parts if part.text)
+        return "\n".join(texts)
+
+    async def _state(self, session_id: str) -> dict:
+        session = await self.runner.session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        return dict(session.state)
+
+    async def _hydrated_state(self, session_id: str) -> dict:
+        """Session state with offloaded values loaded back, for building prompts."""
+
+        async def load(filename: str) -> types.Part | None:
+            return await self.runner.artifact_service.load_artifact(
+                app_name=APP_NAME,
+                user_id=USER_ID,
+                session_id=session_id,
+                filename=filename,
+            )
+
+        return await hydrate_state(await self._state(session_id), load)
+
+    async def _restore(self, url: str, snapshot: dict):
+        """Creates a session holding a checkpoint's state and artifacts."""
+
+        state = snapshot.get("state") or {"product_url": url}
+        session = await self.runner.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, state=state
+        )
+        for name, part in snapshot.get("artifacts", {}).items():
+            await self.runner.artifact_service.save_artifact(
+                app_name=APP_NAME,
+                user_id=USER_ID,
+                session_id=session.id,
+                filename=name,
+                artifact=types.Part.model_validate(part),
+            )
+        return session
+
+    async def _snapshot(self, session_id: str) -> dict:
+        state = {}
+        for key, value in (await self._state(session_id)).items():
+            try:
+                json.dumps(value)
+            except TypeError:
+                continue
+            state[key] = value
+
+        artifacts = {}
+        service = self.runner.artifact_service
+        keys = await service.list_artifact_keys(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        for name in keys:
+            part = await service.load_artifact(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id, filename=name
+            )
+            if part:
+                artifacts[name] = part.model_dump(mode="json", exclude_none=True)
+        return {"state": state, "artifacts": artifacts}
+
+    async def _discard(self, session_id: str) -> None:
+        service = self.runner.artifact_service
+        for name in await service.list_artifact_keys(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        ):
+            await service.delete_artifact(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id, filename=name
+            )
+        await self.runner.session_service.delete_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch video ad generation")
+    parser.add_argument("--db", default=BATCH_DB_PATH, help="Queue database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Queue product URLs")
+    enqueue.add_argument("file", help="One product URL per line ('-' for stdin)")
+
+    run = commands.add_parser("run", help="Process queued jobs")
+    run.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    run.add_argument(
+        "--retry-failed", action="store_true", help="Requeue failed jobs first"
+    )
+
+    commands.add_parser("status", help="Show queue counts and throughput")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    queue = JobQueue(args.db)
+
+    if args.command == "enqueue":
+        source = nullcontext(sys.stdin) if args.file == "-" else open(args.file)
+        with source as lines:
+            urls = [line.strip() for line in lines if line.strip()]
+        print(f"Queued {queue.enqueue(urls)} jobs")
+    elif args.command == "run":
+        if args.retry_failed:
+            print(f"Requeued {queue.retry_failed()} failed jobs")
+        asyncio.run(BatchRunner(queue, workers=args.workers).run())
+    else:
+        print(json.dumps(queue.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Import-time budget for the manager package.
+
+Imports `manager` in fresh interpreters with `-X importtime`, reports where the time
+goes (self time grouped by package) and exits non-zero when the median import exceeds
+the budget or when a module that should load lazily was imported eagerly:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1500 --runs 9 --output imports.json
+
+The same check runs as part of the unit tests (tests/test_import_time.py).
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Median wall time of `import manager`, most of which is google.adk and google.genai
+BUDGET_MS = 2000
+RUNS = 5
+# Heavy SDKs the tools import on first call only (unless google.adk imports them)
+DEFERRED_MODULES = [
+    "google.cloud.storage",
+    "google.auth.transport.requests",
+    "requests",
+]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _group(module: str) -> str:
+    parts = module.split(".")
+    # google.* and manager.* are namespaces; split them one level further
+    depth = 2 if parts[0] in ("google", "manager") else 1
+    return ".".join(parts[:depth])
+
+
+def _loaded_after(imports: str) -> list[str]:
+    check = (
+        f"import json, sys, {imports}; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def adk_imports() -> list[str]:
+    """Deferred modules that the ADK modules manager needs already import eagerly."""
+
+    return _loaded_after("google.adk.agents, google.adk.tools")
+
+
+def check(total_ms: float, eager: list[str], budget_ms: float) -> list[str]:
+    """
+    Lists budget failures: an import over `budget_ms`, or deferred modules imported
+    eagerly by manager itself (ones google.adk already imports are not counted).
+    """
+
+    failures = []
+    if total_ms > budget_ms:
+        failures.append(
+            f"import took {total_ms:.0f} ms, over the {budget_ms:g} ms budget"
+        )
+    unavoidable = set(adk_imports()) if eager else set()
+    for module in eager:
+        if module not in unavoidable:
+            failures.append(
+                f"{module} is imported eagerly; it should load on first use"
+            )
+    return failures
+
+
+def profile() -> dict:
+    """Imports manager once in a fresh interpreter and parses the -X importtime log."""
+
+    check = (
+        "import json, sys, manager; "
+        f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    groups = Counter()
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        groups[_group(module)] += int(self_us)
+        if module == "manager":
+            total = int(cumulative_us)
+
+    return {
+        "total_ms": total / 1000,
+        "groups_ms": {name: us / 1000 for name, us in groups.items()},
+        "eager": json.loads(result.stdout.splitlines()[-1]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--top", type=int, default=15, help="Groups to print")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    runs = [profile() for _ in range(args.runs)]
+    total = statistics.median(run["total_ms"] for run in runs)
+    groups = {
+        name: round(
+            statistics.median(run["groups_ms"].get(name, 0.0) for run in runs), 1
+        )
+        for name in {name for run in runs for name in run["groups_ms"]}
+    }
+    eager = sorted({module for run in runs for module in run["eager"]})
+
+    print(
+        f"import manager: {total:.0f} ms median of {args.runs} runs "
+        f"(budget {args.budget_ms:g} ms)"
+    )
+    for name, ms in sorted(groups.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    if args.output:
+        report = {
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "total_ms": total,
+            "budget_ms": args.budget_ms,
+            "groups_ms": groups,
+            "eager": eager,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    failures = check(total, eager, args.budget_ms)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
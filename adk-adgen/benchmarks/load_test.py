@@ -0,0 +1,884 @@
+"""
+Concurrency load test for one API server instance, without live providers.
+
+Runs three pieces:
+
+- Local stand-ins for Tavily (/search, /extract), HeyGen (video/generate,
+  video_status.get), Veo (predictLongRunning, fetchPredictOperation) and GCS (JSON API
+  uploads, metadata and media), plus the media they hand back, in their own process
+  with configurable latency, render times and failure rates.
+- The app `python main.py` serves, in a second process, with every LLM replaced by a
+  scripted stub and the provider base URLs pointed at the stand-ins.
+- N concurrent sessions driven through every wizard stage over HTTP from this process.
+
+    python -m benchmarks.load_test --sessions 20
+    python -m benchmarks.load_test --sessions 50 --ramp 10 --failure-rate 0.05 \\
+        --output load.json
+
+The report has p50/p95/p99 latency and error rates per stage, event-loop lag inside
+the app, rate limiter waits and provider request counts. Lag that grows with the
+session count points at blocking calls on the loop; long limiter waits point at quotas.
+ffmpeg is required to synthesize the media.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, AsyncGenerator
+from urllib.parse import quote
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+APP_NAME = "manager"
+USER_ID = "load-test"
+# Providers that return injected 503s; GCS and media downloads always succeed
+FAILING_PROVIDERS = {"tavily", "heygen", "veo"}
+# How often the app's event loop is sampled for lag
+LAG_INTERVAL = 0.1
+STARTUP_TIMEOUT = 120
+
+STAGE_PROMPT = re.compile(r"^Run (\w+) agent")
+PRODUCT_URL = re.compile(r"https?://[^\s\"']+/pages/product-\d+")
+MEDIA_PROMPT = re.compile(r"audio script: (.*) and this video script: (.*)", re.DOTALL)
+PAGE_TEXT = "\n".join(
+    [
+        "# Synthetic Product",
+        "A lightweight, durable everyday product built for comfort and performance.",
+        "Price: $129.00",
+        "Key features: breathable materials, recycled fabrics, all-day comfort.",
+        "Designed for people who want one product for work, travel and weekends.",
+    ]
+    * 8
+)
+
+
+@dataclass
+class LoadConfig:
+    sessions: int
+    ramp: float
+    latency: float
+    failure_rate: float
+    heygen_render: float
+    veo_render: float
+    llm_latency: float
+    media_seconds: float
+    provider_port: int
+    app_port: int
+    work_dir: str
+
+    @property
+    def providers_url(self) -> str:
+        return f"http://127.0.0.1:{self.provider_port}"
+
+    @property
+    def app_url(self) -> str:
+        return f"http://127.0.0.1:{self.app_port}"
+
+
+def jitter(seconds: float) -> float:
+    return seconds * random.uniform(0.5, 1.5)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    # quantiles() needs two points; one sample is its own percentiles
+    cuts = statistics.quantiles(
+        values * (2 if len(values) == 1 else 1), n=100, method="inclusive"
+    )
+    return {
+        "count": len(values),
+        "p50": round(cuts[49], 3),
+        "p95": round(cuts[94], 3),
+        "p99": round(cuts[98], 3),
+        "max": round(max(values), 3),
+    }
+
+
+# Provider stand-ins
+
+
+def make_media(config: LoadConfig) -> dict[str, bytes]:
+    """Synthesizes the A-roll, B-roll, product image and captions with ffmpeg."""
+
+    directory = Path(config.work_dir)
+    sources = {
+        "a_roll.mp4": [
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc2=size=1280x720:rate=30",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:sample_rate=48000",
+            "-t",
+            str(config.media_seconds),
+            "-c:a",
+            "aac",
+        ],
+        "b_roll.mp4": [
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=size=1280x720:rate=24",
+            "-t",
+            "8",
+        ],
+    }
+    media = {}
+    for name, args in sources.items():
+        path = directory / name
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-v",
+                "error",
+                *args,
+                "-c:v",
+                "libx264",
+                "-preset",
+                "veryfast",
+                "-pix_fmt",
+                "yuv420p",
+                "-g",
+                "30",
+                str(path),
+            ],
+            check=True,
+        )
+        media[name] = path.read_bytes()
+
+    image_path = directory / "product.jpg"
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc2=size=1600x1600",
+            "-frames:v",
+            "1",
+            str(image_path),
+        ],
+        check=True,
+    )
+    media["product.jpg"] = image_path.read_bytes()
+    media["captions.ass"] = b"[Script Info]\nTitle: load test\n"
+    return media
+
+
+def build_provider_app(config: LoadConfig, media: dict[str, bytes]) -> FastAPI:
+    app = FastAPI()
+    base = config.providers_url
+    objects: dict[str, tuple[bytes, str]] = {}  # "bucket/name" -> (data, type)
+    uploads: dict[str, dict] = {}  # resumable upload ID -> pending object
+    jobs: dict[str, float] = {}  # HeyGen video / Veo operation ID -> ready time
+    veo_outputs: dict[str, str] = {}
+    counts = Counter()
+
+    def object_resource(bucket: str, name: str) -> dict:
+        data, content_type = objects[f"{bucket}/{name}"]
+        return {
+            "kind": "storage#object",
+            "bucket": bucket,
+            "name": name,
+            "size": str(len(data)),
+            "contentType": content_type,
+            "generation": "1",
+            "metageneration": "1",
+            "mediaLink": f"{base}/download/storage/v1/b/{bucket}/o/"
+            f"{quote(name, safe='')}?alt=media",
+        }
+
+    @app.middleware("http")
+    async def emulate(request: Request, call_next):
+        provider = request.url.path.split("/")[1]
+        if provider.startswith("_"):
+            return await call_next(request)
+        counts[provider] += 1
+        if provider != "media":
+            await asyncio.sleep(jitter(config.latency))
+        if provider in FAILING_PROVIDERS and random.random() < config.failure_rate:
+            counts[f"{provider}:injected_failures"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return await call_next(request)
+
+    @app.get("/_stats")
+    async def stats() -> dict:
+        return dict(counts)
+
+    @app.get("/media/{name}")
+    async def serve_media(name: str) -> Response:
+        if name not in media:
+            return Response(status_code=404)
+        return Response(media[name])
+
+    @app.post("/tavily/search")
+    async def tavily_search(request: Request) -> dict:
+        body = await request.json()
+        results = [
+            {
+                "url": f"{base}/pages/result-{i}",
+                "title": f"Result {i} for {body.get('query')}",
+                "content": PAGE_TEXT[:300],
+                "raw_content": PAGE_TEXT if body.get("include_raw_content") else None,
+                "score": 0.9,
+            }
+            for i in range(body.get("max_results", 5))
+        ]
+        return {
+            "query": body.get("query"),
+            "answer": f"Synthetic answer for {body.get('query')}",
+            "results": results,
+            "images": (
+                [f"{base}/media/product.jpg"] if body.get("include_images") else []
+            ),
+        }
+
+    @app.post("/tavily/extract")
+    async def tavily_extract(request: Request) -> dict:
+        urls = (await request.json()).get("urls", [])
+        urls = urls if isinstance(urls, list) else [urls]
+        return {
+            "results": [
+                {
+                    "url": url,
+                    "raw_content": PAGE_TEXT,
+                    "images": [f"{base}/media/product.jpg"],
+                }
+                for url in urls
+            ],
+            "failed_results": [],
+        }
+
+    @app.post("/heygen/v2/video/generate")
+    async def heygen_generate() -> dict:
+        video_id = uuid.uuid4().hex
+        jobs[video_id] = time.monotonic() + jitter(config.heygen_render)
+        return {"error": None, "data": {"video_id": video_id}}
+
+    @app.get("/heygen/v1/video_status.get")
+    async def heygen_status(video_id: str):
+        if video_id not in jobs:
+            return JSONResponse({"error": "unknown video"}, status_code=404)
+        if time.monotonic() < jobs[video_id]:
+            return {"data": {"id": video_id, "status": "processing"}}
+        return {
+            "data": {
+                "id": video_id,
+                "status": "completed",
+                "video_url": f"{base}/media/a_roll.mp4",
+                "caption_url": f"{base}/media/captions.ass",
+            }
+        }
+
+    @app.post("/veo/{path:path}")
+    async def veo(path: str, request: Request):
+        body = await request.json()
+        model_path = path.split(":")[0]
+        if path.endswith(":predictLongRunning"):
+            operation = uuid.uuid4().hex
+            storage_uri = body["parameters"].get("storageUri") or "gs://load-test"
+            jobs[operation] = time.monotonic() + jitter(config.veo_render)
+            veo_outputs[operation] = (
+                f"{storage_uri.rstrip('/')}/{operation}/sample_0.mp4"
+            )
+            return {"name": f"{model_path}/operations/{operation}"}
+
+        if path.endswith(":fetchPredictOperation"):
+            operation = body["operationName"].split("/")[-1]
+            if operation not in jobs:
+                return JSONResponse({"error": "unknown operation"}, status_code=404)
+            name = body["operationName"]
+            if time.monotonic() < jobs[operation]:
+                return {"name": name, "done": False}
+            uri = veo_outputs[operation]
+            objects[uri.removeprefix("gs://")] = (media["b_roll.mp4"], "video/mp4")
+            return {
+                "name": name,
+                "done": True,
+                "response": {"videos": [{"gcsUri": uri, "mimeType": "video/mp4"}]},
+            }
+        return JSONResponse({"error": "unknown method"}, status_code=404)
+
+    @app.post("/upload/storage/v1/b/{bucket}/o")
+    async def gcs_upload(bucket: str, request: Request):
+        upload_type = request.query_params.get("uploadType")
+        body = await request.body()
+
+        if upload_type == "multipart":
+            content_type = request.headers["content-type"]
+            boundary = re.search(r'boundary="?([^";]+)"?', content_type).group(1)
+            sections = body.split(b"--" + boundary.encode())
+            metadata = json.loads(sections[1].split(b"\r\n\r\n", 1)[1])
+            data = sections[2].split(b"\r\n\r\n", 1)[1][:-2]
+            name = metadata["name"]
+            objects[f"{bucket}/{name}"] = (data, metadata.get("contentType", ""))
+            return object_resource(bucket, name)
+
+        if upload_type == "resumable":
+            metadata = json.loads(body) if body else {}
+            upload_id = uuid.uuid4().hex
+            uploads[upload_id] = {
+                "name": metadata.get("name") or request.query_params.get("name"),
+                "content_type": metadata.get("contentType")
+                or request.headers.get("x-upload-content-type", ""),
+                "data": bytearray(),
+            }
+            location = (
+                f"{base}/upload/storage/v1/b/{bucket}/o"
+                f"?uploadType=resumable&upload_id={upload_id}"
+            )
+            return Response(headers={"Location": location})
+
+        name = request.query_params["name"]
+        objects[f"{bucket}/{name}"] = (body, request.headers.get("content-type", ""))
+        return object_resource(bucket, name)
+
+    @app.put("/upload/storage/v1/b/{bucket}/o")
+    async def gcs_upload_chunk(bucket: str, upload_id: str, request: Request):
+        upload = uploads.get(upload_id)
+        if upload is None:
+            return JSONResponse({"error": "unknown upload"}, status_code=404)
+        upload["data"].extend(await request.body())
+        total = request.headers.get("content-range", "").rpartition("/")[2]
+        if total.isdigit() and len(upload["data"]) >= int(total):
+            objects[f"{bucket}/{upload['name']}"] = (
+                bytes(upload["data"]),
+                upload["content_type"],
+            )
+            del uploads[upload_id]
+            return object_resource(bucket, upload["name"])
+        headers = (
+            {"Range": f"bytes=0-{len(upload['data']) - 1}"} if upload["data"] else {}
+        )
+        return Response(status_code=308, headers=headers)
+
+    @app.get("/storage/v1/b/{bucket}/o/{name:path}")
+    async def gcs_object(bucket: str, name: str, request: Request):
+        if f"{bucket}/{name}" not in objects:
+            return JSONResponse({"error": {"code": 404}}, status_code=404)
+        if request.query_params.get("alt") == "media":
+            return Response(objects[f"{bucket}/{name}"][0])
+        return object_resource(bucket, name)
+
+    @app.get("/download/storage/v1/b/{bucket}/o/{name:path}")
+    async def gcs_download(bucket: str, name: str):
+        if f"{bucket}/{name}" not in objects:
+            return JSONResponse({"error": {"code": 404}}, status_code=404)
+        return Response(objects[f"{bucket}/{name}"][0])
+
+    return app
+
+
+def serve_providers(config: LoadConfig) -> None:
+    import uvicorn
+
+    app = build_provider_app(config, make_media(config))
+    uvicorn.run(app, host="127.0.0.1", port=config.provider_port, log_level="warning")
+
+
+# Stubbed LLM
+
+
+def _sample(schema: Any) -> Any:
+    """A minimal valid instance of a pydantic output schema, as plain data."""
+
+    payload = {}
+    for name, field in schema.model_fields.items():
+        if not field.is_required():
+            continue
+        annotation = field.annotation
+        element = (getattr(annotation, "__args__", None) or [None])[0]
+        if hasattr(annotation, "model_fields"):
+            payload[name] = _sample(annotation)
+        elif hasattr(element, "model_fields"):
+            payload[name] = [_sample(element)]
+        elif getattr(annotation, "__origin__", None) is list:
+            payload[name] = [f"synthetic {name}"]
+        elif annotation in (int, float):
+            payload[name] = 1
+        elif annotation is bool:
+            payload[name] = True
+        else:
+            payload[name] = f"Synthetic {name.replace('_', ' ')}"
+    return payload
+
+
+def tool_calls(agent_name: str, prompt: str, providers: str) -> list[tuple[str, dict]]:
+    """The tool calls each agent makes for a wizard prompt, as the real model would."""
+
+    match = PRODUCT_URL.search(prompt)
+    product_url = match.group(0) if match else f"{providers}/pages/product-0"
+    topic = f"product {product_url.rsplit('-', 1)[-1]}"
+    media = MEDIA_PROMPT.search(prompt)
+
+    if agent_name == "extraction_agent":
+        return [("extract_metadata", {"url": product_url})]
+    if agent_name == "market_agent":
+        return [
+            ("search_market", {"queries": [f"{topic} market size", f"{topic} trends"]}),
+            ("search_audience", {"query": f"{topic} target audience"}),
+            ("search_competitors", {"query": f"{topic} competitors"}),
+            (
+                "extract_metadata_many",
+                {"urls": [f"{providers}/pages/competitor-{i}" for i in range(3)]},
+            ),
+        ]
+    if agent_name == "aroll" and media:
+        return [("generate_a_roll", {"prompt": media.group(1).strip()})]
+    if agent_name == "broll" and media:
+        return [("generate_b_roll", {"prompt": media.group(2).strip()})]
+    if agent_name == "processing":
+        return [("post_process", {})]
+    return []
+
+
+def structured_output(
+    agent_name: str, schema: Any, prompt: str, providers: str
+) -> dict:
+    payload = _sample(schema)
+    match = PRODUCT_URL.search(prompt)
+    product_url = match.group(0) if match else f"{providers}/pages/product-0"
+    # Scripts differ per session, so renders are not shared through the media store
+    if agent_name == "extraction_agent":
+        payload.update(
+            brand="Load Test",
+            product_name=f"Synthetic {product_url.rsplit('/', 1)[-1]}",
+            product_url=product_url,
+            image_url=f"{providers}/media/product.jpg",
+        )
+    elif agent_name == "script_agent":
+        payload.update(
+            audio_script=f"Meet the product at {product_url}. Built for every day.",
+            video_script=f"Scene 1: the product from {product_url} on a clean desk.",
+        )
+    return payload
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Stands in for Gemini: transfers to the agent a wizard prompt names, calls the
+    agent's tools with plausible arguments, then answers with the tool results or a
+    sample of the agent's output schema.
+    """
+
+    agent_name: str
+    scope: list[str]
+    known_agents: list[str]
+    output_schema: Any = None
+    latency: float = 1.0
+    providers: str = ""
+
+    def _target(self, prompt: str) -> str | None:
+        match = STAGE_PROMPT.search(prompt)
+        if not match:
+            return None
+        word = match.group(1)
+        return f"{word}_agent" if f"{word}_agent" in self.known_agents else word
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(jitter(self.latency))
+
+        prompt_index, prompt = 0, ""
+        for i, content in enumerate(llm_request.contents):
+            for part in content.parts or []:
+                if (
+                    content.role == "user"
+                    and part.text
+                    and STAGE_PROMPT.search(part.text)
+                ):
+                    prompt_index, prompt = i, part.text
+
+        tools = llm_request.tools_dict
+        target = self._target(prompt)
+        if target and target not in self.scope and "transfer_to_agent" in tools:
+            yield self._call([("transfer_to_agent", {"agent_name": target})])
+            return
+
+        responses = [
+            part.function_response
+            for content in llm_request.contents[prompt_index + 1 :]
+            for part in content.parts or []
+            if part.function_response
+            and part.function_response.name in tools
+            and part.function_response.name != "transfer_to_agent"
+        ]
+        if not responses:
+            calls = tool_calls(self.agent_name, prompt, self.providers)
+            if calls:
+                yield self._call(calls)
+                return
+
+        if self.output_schema is not None:
+            payload = structured_output(
+                self.agent_name, self.output_schema, prompt, self.providers
+            )
+            if "set_model_response" in tools and not any(
+                r.name == "set_model_response" for r in responses
+            ):
+                yield self._call([("set_model_response", payload)])
+                return
+            text = json.dumps(payload)
+        else:
+            text = "\n".join(
+                str((r.response or {}).get("result", r.response)) for r in responses
+            )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)])
+        )
+
+    @staticmethod
+    def _call(calls: list[tuple[str, dict]]) -> LlmResponse:
+        parts = [
+            types.Part(function_call=types.FunctionCall(name=name, args=args))
+            for name, args in calls
+        ]
+        return LlmResponse(content=types.Content(role="model", parts=parts))
+
+
+def install_stub_llm(agent, config: LoadConfig, known: list[str], scope=()) -> None:
+    from google.adk.agents import LlmAgent
+
+    scope = (*scope, agent.name)
+    if isinstance(agent, LlmAgent):
+        agent.model = ScriptedLlm(
+            model="scripted-stub",
+            agent_name=agent.name,
+            scope=list(scope),
+            known_agents=known,
+            output_schema=agent.output_schema,
+            latency=config.llm_latency,
+            providers=config.providers_url,
+        )
+    for sub_agent in agent.sub_agents:
+        install_stub_llm(sub_agent, config, known, scope)
+
+
+# App under test
+
+
+class LagMonitor:
+    """Samples how late a periodic sleep wakes up on the event loop."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - started - self.interval)
+
+    def report(self) -> dict:
+        return percentiles([sample * 1000 for sample in self.samples])
+
+
+def serve_app(config: LoadConfig) -> None:
+    import uvicorn
+    from google.oauth2.credentials import Credentials
+
+    from manager.tools import credentials
+
+    # Veo and GCS requests go to the stand-ins, which accept any bearer token
+    static = Credentials(
+        token="load-test", expiry=datetime.utcnow() + timedelta(days=1)
+    )
+    credentials.set_provider(
+        credentials.CredentialProvider(credentials=static, project="load-test")
+    )
+
+    import main
+    from manager.agent import root_agent
+
+    def names(agent) -> list[str]:
+        return [agent.name, *(n for sub in agent.sub_agents for n in names(sub))]
+
+    install_stub_llm(root_agent, config, names(root_agent))
+
+    monitor = LagMonitor()
+
+    @main.app.get("/_load_test/lag")
+    async def lag() -> dict:
+        return monitor.report()
+
+    async def serve() -> None:
+        task = asyncio.create_task(monitor.run())
+        server = uvicorn.Server(
+            uvicorn.Config(
+                main.app, host="127.0.0.1", port=config.app_port, log_level="warning"
+            )
+        )
+        try:
+            await server.serve()
+        finally:
+            task.cancel()
+
+    asyncio.run(serve())
+
+
+def app_environment(config: LoadConfig) -> dict[str, str]:
+    """Settings that point every provider at the stand-ins, inherited by the app."""
+
+    providers = config.providers_url
+    return {
+        "TAVILY_BASE_URL": f"{providers}/tavily",
+        "TAVILY_API_KEY": "load-test",
+        "HEYGEN_BASE_URL": f"{providers}/heygen",
+        "HEYGEN_API_KEY": "load-test",
+        "HEYGEN_WEBHOOK_ENABLED": "false",
+        "VEO_BASE_URL": f"{providers}/veo",
+        "STORAGE_EMULATOR_HOST": providers,
+        "GOOGLE_CLOUD_PROJECT": "load-test",
+        "GOOGLE_CLOUD_LOCATION": "us-central1",
+        "OUTPUT_STORAGE_URI": "gs://load-test",
+        # Fresh caches, so every session does the full amount of provider work
+        "TAVILY_CACHE_PATH": f"{config.work_dir}/tavily.sqlite3",
+        "MEDIA_CACHE_PATH": f"{config.work_dir}/media.sqlite3",
+    }
+
+
+# Load driver
+
+
+def _final_text(events: list[dict]) -> str:
+    texts = [
+        part["text"]
+        for event in events
+        for part in (event.get("content") or {}).get("parts", [])
+        if part.get("text")
+    ]
+    return texts[-1] if texts else ""
+
+
+async def drive_session(
+    client: httpx.AsyncClient,
+    index: int,
+    config: LoadConfig,
+    stages: list,
+    timings: dict[str, list],
+) -> bool:
+    """Runs one wizard session through every stage; returns whether all succeeded."""
+
+    from manager.tools.state_offload import hydrate_state
+
+    await asyncio.sleep(config.ramp * index / max(config.sessions, 1))
+    product_url = f"{config.providers_url}/pages/product-{index}"
+    session_url = f"/apps/{APP_NAME}/users/{USER_ID}/sessions"
+    session = (await client.post(session_url, json={})).json()
+    state = {"product_url": product_url}
+
+    async def load_artifact(filename: str) -> types.Part | None:
+        response = await client.get(
+            f"{session_url}/{session['id']}/artifacts/{quote(filename)}"
+        )
+        if response.status_code != 200:
+            return None
+        return types.Part.model_validate(response.json())
+
+    for stage in stages:
+        started = time.perf_counter()
+        error = None
+        try:
+            response = await client.post(
+                "/run",
+                json={
+                    "appName": APP_NAME,
+                    "userId": USER_ID,
+                    "sessionId": session["id"],
+                    "newMessage": {
+                        "role": "user",
+                        "parts": [{"text": stage.prompt(state)}],
+                    },
+                },
+            )
+            response.raise_for_status()
+            text = _final_text(response.json())
+
+            current = (await client.get(f"{session_url}/{session['id']}")).json()
+            artifacts = (
+                await client.get(f"{session_url}/{session['id']}/artifacts")
+            ).json()
+            # Offloaded values are loaded back, as the wizard has them from responses
+            state = await hydrate_state(
+                {**current.get("state", {}), "product_url": product_url},
+                load_artifact,
+            )
+            if not stage.done(state, set(artifacts), text):
+                error = f"incomplete: {text[:200]}"
+        except Exception as e:
+            error = repr(e)
+
+        timings[stage.name].append((time.perf_counter() - started, error))
+        if error:
+            return False
+    return True
+
+
+async def wait_until_ready(url: str, process) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if not process.is_alive():
+                raise RuntimeError(f"{url} exited during startup")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"{url} did not start within {STARTUP_TIMEOUT}s")
+
+
+async def run_load(config: LoadConfig, stages: list, processes: list) -> dict:
+    providers, app = processes
+    await wait_until_ready(f"{config.providers_url}/_stats", providers)
+    await wait_until_ready(f"{config.app_url}/_load_test/lag", app)
+
+    timings = {stage.name: [] for stage in stages}
+    limits = httpx.Limits(max_connections=config.sessions * 2 + 10)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(
+        base_url=config.app_url, timeout=None, limits=limits
+    ) as client:
+        outcomes = await asyncio.gather(
+            *(
+                drive_session(client, i, config, stages, timings)
+                for i in range(config.sessions)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        lag = (await client.get("/_load_test/lag")).json()
+        rate_limits = (await client.get("/metrics/rate-limits")).json()
+    async with httpx.AsyncClient() as client:
+        provider_requests = (await client.get(f"{config.providers_url}/_stats")).json()
+
+    stage_report = {}
+    for name, runs in timings.items():
+        errors = [error for _, error in runs if error]
+        stage_report[name] = {
+            **percentiles([seconds for seconds, _ in runs]),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(runs), 3) if runs else None,
+            "sample_errors": errors[:3],
+        }
+
+    completed = sum(outcomes)
+    return {
+        "config": asdict(config),
+        "sessions": {
+            "started": config.sessions,
+            "completed": completed,
+            "error_rate": round(1 - completed / config.sessions, 3),
+            "wall_seconds": round(elapsed, 1),
+            "sessions_per_hour": round(completed / elapsed * 3600, 1),
+        },
+        "stages": stage_report,
+        "event_loop_lag_ms": lag,
+        "rate_limits": rate_limits,
+        "provider_requests": provider_requests,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument(
+        "--ramp", type=float, default=0.0, help="Seconds to stagger starts"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="Per provider request"
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--heygen-render", type=float, default=20.0)
+    parser.add_argument("--veo-render", type=float, default=30.0)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--media-seconds", type=float, default=10.0)
+    parser.add_argument("--output", type=Path, help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        config = LoadConfig(
+            sessions=args.sessions,
+            ramp=args.ramp,
+            latency=args.latency,
+            failure_rate=args.failure_rate,
+            heygen_render=args.heygen_render,
+            veo_render=args.veo_render,
+            llm_latency=args.llm_latency,
+            media_seconds=args.media_seconds,
+            provider_port=free_port(),
+            app_port=free_port(),
+            work_dir=work_dir,
+        )
+        # Set before the first get_settings() call, which reads the environment once
+        # and caches it (.env does not override these); the spawned app inherits them
+        os.environ.update(app_environment(config))
+        from batch import STAGES
+
+        context = get_context("spawn")
+        processes = [
+            context.Process(target=serve_providers, args=(config,), daemon=True),
+            context.Process(target=serve_app, args=(config,), daemon=True),
+        ]
+        for process in processes:
+            process.start()
+        try:
+            report = asyncio.run(run_load(config, STAGES, processes))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join()
+
+    for name, stage in report["stages"].items():
+        print(
+            f"{name}: p50 {stage.get('p50')}s p95 {stage.get('p95')}s "
+            f"p99 {stage.get('p99')}s errors {stage['errors']}",
+            file=sys.stderr,
+        )
+    print(f"event loop lag (ms): {report['event_loop_lag_ms']}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Offline benchmark for the post-processing step.
+
+Generates synthetic A-roll (test pattern plus tone) and B-roll (silent, Veo-length)
+clips with ffmpeg's lavfi sources across a matrix of durations, resolutions and
+codecs, then runs each case through `post_process` and `get_video_duration` with an
+in-memory tool context. No HeyGen, Veo or GCS calls are made.
+
+Every case runs in a fresh process so CPU time and peak RSS (including ffmpeg child
+processes) belong to that case alone. Results are written as JSON:
+
+    python -m benchmarks.post_process --output results.json
+    python -m benchmarks.post_process --durations 30 --codecs h264 --repeat 3
+    python -m benchmarks.post_process --compare baseline.json --output current.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from google.genai import types
+
+DURATIONS = [15.0, 30.0, 60.0]
+RESOLUTIONS = ["1280x720", "1920x1080", "720x1280"]
+CODECS = ["h264", "hevc"]
+TEMPLATES = ["alternating_quarters"]
+# Veo clips are always 8 seconds
+B_ROLL_DURATION = 8.0
+FRAME_RATE = 30
+# A-roll keyframes every second, like HeyGen output, so stream copy is possible
+KEYFRAME_INTERVAL = FRAME_RATE
+
+ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9"}
+# A wall-time increase beyond this fraction of the baseline counts as a regression
+REGRESSION_THRESHOLD = 0.15
+
+
+@dataclass(frozen=True)
+class Case:
+    duration: float
+    resolution: str
+    codec: str
+    template: str
+    stream_copy: bool
+
+    @property
+    def name(self) -> str:
+        mode = "copy" if self.stream_copy else "reencode"
+        return (
+            f"{self.codec}-{self.resolution}-{self.duration:g}s-{self.template}-{mode}"
+        )
+
+
+class FakeToolContext:
+    """The parts of ToolContext that post_process uses: state and artifacts."""
+
+    def __init__(self, state: dict | None = None):
+        self.state = dict(state or {})
+        self.artifacts = {}
+
+    async def load_artifact(self, filename: str):
+        return self.artifacts.get(filename)
+
+    async def save_artifact(self, filename: str, artifact) -> int:
+        self.artifacts[filename] = artifact
+        return 0
+
+
+def available_encoders() -> set[str]:
+    output = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-encoders"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return {name for name in ENCODERS.values() if f" {name} " in output}
+
+
+def ffmpeg_version() -> str:
+    output = subprocess.run(
+        ["ffmpeg", "-version"], capture_output=True, text=True, check=True
+    ).stdout
+    return output.splitlines()[0]
+
+
+def generate_clip(
+    path: Path,
+    duration: float,
+    resolution: str,
+    codec: str,
+    audio: bool,
+) -> None:
+    """Renders a synthetic clip from lavfi sources."""
+
+    video_source = "testsrc2" if audio else "testsrc"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"{video_source}=size={resolution}:rate={FRAME_RATE}",
+    ]
+    if audio:
+        cmd += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000"]
+    cmd += [
+        "-t",
+        str(duration),
+        "-c:v",
+        ENCODERS[codec],
+        "-preset",
+        "veryfast",
+        "-pix_fmt",
+        "yuv420p",
+        "-g",
+        str(KEYFRAME_INTERVAL),
+    ]
+    if audio:
+        cmd += ["-c:a", "aac", "-b:a", "128k"]
+    cmd.append(str(path))
+    subprocess.run(cmd, check=True)
+
+
+def _usage() -> dict:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "cpu": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        "peak_rss": max(own.ru_maxrss, children.ru_maxrss) * scale,
+    }
+
+
+async def _run_case(case: Case, a_path: Path, b_path: Path, work_dir: Path) -> dict:
+    # Imported in the worker so each case starts with fresh ffmpeg semaphores
+    from manager.tools import ffmpeg
+    from manager.tools.post_process import get_video_duration, post_process
+
+    tool_context = FakeToolContext(
+        {"edl_template": case.template, "stream_copy": case.stream_copy}
+    )
+    for name, path in (("a_roll.mp4", a_path), ("b_roll.mp4", b_path)):
+        tool_context.artifacts[name] = types.Part.from_bytes(
+            data=path.read_bytes(), mime_type="video/mp4"
+        )
+
+    started = time.perf_counter()
+    duration = await get_video_duration(a_path)
+    probe_seconds = time.perf_counter() - started
+
+    before = _usage()
+    started = time.perf_counter()
+    message = await post_process(tool_context)
+    wall_seconds = time.perf_counter() - started
+    after = _usage()
+
+    output = tool_context.artifacts.get("processed_video.mp4")
+    if not output or not output.inline_data:
+        raise RuntimeError(f"post_process produced no output: {message}")
+
+    out_path = work_dir / "output.mp4"
+    out_path.write_bytes(output.inline_data.data)
+    info = await ffmpeg.probe(out_path)
+    output_duration = ffmpeg.duration(info)
+
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "cpu_seconds": round(after["cpu"] - before["cpu"], 3),
+        "peak_rss_mb": round(after["peak_rss"] / 2**20, 1),
+        "probe_seconds": round(probe_seconds, 4),
+        "input_duration": round(duration, 3),
+        "output_duration": round(output_duration, 3),
+        "output_bytes": len(output.inline_data.data),
+        "output_bitrate_kbps": round(int(info["format"].get("bit_rate", 0)) / 1000, 1),
+        "speed": round(output_duration / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+def run_case(case: Case, a_path: Path, b_path: Path) -> dict:
+    """Benchmarks one case on pre-generated inputs (runs in a child process)."""
+
+    # Keep outputs local even when .env sets a bucket; settings never override it
+    os.environ["OUTPUT_STORAGE_URI"] = ""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        return asyncio.run(_run_case(case, a_path, b_path, Path(temp_dir)))
+
+
+def generate_inputs(case: Case, directory: Path) -> tuple[Path, Path]:
+    """Renders (or reuses) the synthetic A-roll and B-roll for a case."""
+
+    stem = f"{case.codec}-{case.resolution}"
+    a_path = directory / f"a_roll-{stem}-{case.duration:g}s.mp4"
+    b_path = directory / f"b_roll-{case.resolution}.mp4"
+    if not a_path.exists():
+        generate_clip(a_path, case.duration, case.resolution, case.codec, audio=True)
+    if not b_path.exists():
+        # Veo output is always H.264, whatever codec the A-roll uses
+        generate_clip(b_path, B_ROLL_DURATION, case.resolution, "h264", audio=False)
+    return a_path, b_path
+
+
+def build_matrix(args: argparse.Namespace, encoders: set[str]) -> list[Case]:
+    codecs = []
+    for codec in args.codecs:
+        if ENCODERS[codec] in encoders:
+            codecs.append(codec)
+        else:
+            print(f"Skipping {codec}: {ENCODERS[codec]} unavailable", file=sys.stderr)
+
+    return [
+        Case(*values)
+        for values in itertools.product(
+            args.durations, args.resolutions, codecs, args.templates, args.modes
+        )
+    ]
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> list[str]:
+    """Lists cases whose wall time grew more than `threshold` over the baseline."""
+
+    baseline = {
+        result["case"]["name"]: result
+        for result in json.loads(baseline_path.read_text())["results"]
+    }
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["case"]["name"])
+        if not previous or "error" in result or "error" in previous:
+            continue
+        change = result["wall_seconds"] / previous["wall_seconds"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{result['case']['name']}: {previous['wall_seconds']}s -> "
+                f"{result['wall_seconds']}s (+{change:.0%})"
+            )
+    return regressions
+
+
+def _median_run(runs: list[dict]) -> dict:
+    ordered = sorted(runs, key=lambda run: run["wall_seconds"])
+    return ordered[len(ordered) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=DURATIONS)
+    parser.add_argument("--resolutions", nargs="+", default=RESOLUTIONS)
+    parser.add_argument("--codecs", nargs="+", default=CODECS, choices=ENCODERS)
+    parser.add_argument("--templates", nargs="+", default=TEMPLATES)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["copy", "reencode"],
+        choices=["copy", "reencode"],
+        help="Benchmark the stream-copy path, the full re-encode, or both",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="JSON file (default: stdout)")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    args.modes = [mode == "copy" for mode in args.modes]
+
+    cases = build_matrix(args, available_encoders())
+    # A fresh spawned worker per run keeps rusage (and module caches) per case;
+    # inputs are generated here so their encodes are not counted
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    with tempfile.TemporaryDirectory() as input_dir:
+        for case in cases:
+            description = {**asdict(case), "name": case.name}
+            runs = []
+            try:
+                inputs = generate_inputs(case, Path(input_dir))
+                for _ in range(args.repeat):
+                    with context.Pool(1) as pool:
+                        runs.append(pool.apply(run_case, (case, *inputs)))
+            except Exception as e:
+                results.append({"case": description, "error": str(e)})
+                print(f"{case.name}: failed: {e}", file=sys.stderr)
+                continue
+
+            result = {"case": description, **_median_run(runs), "runs": len(runs)}
+            results.append(result)
+            print(
+                f"{case.name}: {result['wall_seconds']}s wall, "
+                f"{result['cpu_seconds']}s cpu, {result['peak_rss_mb']} MB, "
+                f"{result['output_bitrate_kbps']} kbps",
+                file=sys.stderr,
+            )
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ffmpeg": ffmpeg_version(),
+            "ffmpeg_max_concurrency": os.getenv("FFMPEG_MAX_CONCURRENCY"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
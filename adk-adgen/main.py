@@ -0,0 +1,81 @@
+import json
+import os
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from google.adk.cli.fast_api import get_fast_api_app
+
+from manager.tools import http_client, progress, rate_limiter
+from manager.tools.generate_a_roll import (
+    handle_heygen_webhook,
+    verify_heygen_signature,
+)
+
+AGENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Seconds between SSE comments on an idle progress stream, so proxies keep it open
+PROGRESS_KEEPALIVE = 15
+
+
+# Same app as `adk api_server`, plus provider webhook and progress stream routes
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled provider connections
+    await http_client.close_clients()
+
+
+app = get_fast_api_app(
+    agents_dir=AGENTS_DIR, allow_origins=["*"], web=False, lifespan=lifespan
+)
+
+
+@app.post("/webhooks/heygen")
+async def heygen_webhook(request: Request) -> dict:
+    # A forged "success" event would publish an arbitrary video URL
+    body = await request.body()
+    if not verify_heygen_signature(body, request.headers.get("signature")):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        matched = handle_heygen_webhook(json.loads(body))
+    except ValueError:
+        # Covers bodies that are not JSON as well as the wrong shape
+        raise HTTPException(status_code=400, detail="Malformed webhook body")
+    return {"matched": matched}
+
+
+@app.get("/apps/{app_name}/users/{user_id}/sessions/{session_id}/progress")
+async def session_progress(
+    app_name: str, user_id: str, session_id: str
+) -> StreamingResponse:
+    """
+    Streams the session's tool progress events as server-sent events.
+
+    Events are keyed by app, user and session together, so a session id alone does
+    not expose another user's progress.
+    """
+
+    session = (app_name, user_id, session_id)
+
+    async def stream():
+        async for event in progress.subscribe(session, PROGRESS_KEEPALIVE):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics/rate-limits")
+async def rate_limit_metrics() -> dict:
+    return rate_limiter.stats()
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
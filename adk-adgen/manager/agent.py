@@ -2,9 +2,11 @@ from google.adk.agents import Agent
 from .sub_agents.analysis.agent import analysis_agent
 from .sub_agents.market.agent import market_agent
 from .sub_agents.script.agent import script_agent
-from .sub_agents.aroll.agent import a_roll_agent
-from .sub_agents.broll.agent import b_roll_agent
+from .sub_agents.media.agent import media_agent
 from .sub_agents.processing.agent import processing_agent
+from .tools.rate_limiter import limit_model_calls
+from .tools.state_offload import hydrate_views
+from .tools.tracing import instrument
 
 root_agent = Agent(
     name="manager",
@@ -21,11 +23,12 @@ root_agent = Agent(
     1. Receive the product URL from the user.
     2. Analysis agent sequentially runs two agents:
         - Extraction agent extracts and analyzes metadata from the URL.
-        - Save agent saves the product image from the URL.
+        - Save agent saves the product image from the URL (deterministic, no model call).
     3. Market agent searches for market trends, audience demographics, and competitor information.
     4. Script agent generates an ad script. If user feedback is provided, script agent iterates until the script is approved.
-    5. A-roll agent generates an avatar video and audio using HeyGen.
-    6. B-roll agent generates a product video using Veo 2.
+    5. Media agent runs two agents in parallel:
+        - A-roll agent generates an avatar video and audio using HeyGen.
+        - B-roll agent generates a product video using Veo 2.
     6. Processing agent finalizes the video.
 
     NOTE: You MUST respond with the exact output of the subagent you are calling. Do NOT interact additionally with the user, as your responses will be
@@ -35,8 +38,14 @@ root_agent = Agent(
         analysis_agent,
         market_agent,
         script_agent,
-        a_roll_agent,
-        b_roll_agent,
+        media_agent,
         processing_agent,
     ],
 )
+
+# Agent, model and tool spans for the whole tree, plus state["timing_summary"] per turn
+instrument(root_agent)
+# Every LLM request, from the wizard or the batch runner, passes the "gemini" limiter
+limit_model_calls(root_agent)
+# Offloaded state that instruction providers read is loaded before their agents run
+hydrate_views(root_agent)
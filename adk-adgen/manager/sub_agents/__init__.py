@@ -4,5 +4,6 @@ from . import analysis
 from . import script
 from . import aroll
 from . import broll
+from . import media
 from . import processing
 from . import save
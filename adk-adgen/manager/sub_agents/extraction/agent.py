@@ -1,5 +1,62 @@
+import re
+from typing import Any, Callable, List
+
 from google.adk.agents import Agent
+from pydantic import BaseModel, Field
 from ...tools.extract_metadata import extract_metadata
+from ...tools.state_offload import offload_state
+
+
+class ProductMetadata(BaseModel):
+    brand: str = Field(default="", description="The company or brand name.")
+    product_name: str = Field(default="", description="The full name of the product.")
+    product_category: str = Field(
+        default="", description="A general category for the product."
+    )
+    description: str = Field(
+        default="", description="A concise 1-2 sentence summary of the product."
+    )
+    key_features: List[str] = Field(
+        default_factory=list, description="Up to 5 features or differentiators."
+    )
+    price: str = Field(default="", description="The listed price, if available.")
+    image_url: str = Field(default="", description="URL of the main product image.")
+    product_url: str = Field(default="", description="The original product URL.")
+    error: str = Field(default="", description="Set only when extraction fails.")
+
+
+def parse_metadata(value) -> ProductMetadata:
+    """
+    Parses `extraction_agent` output from state, whether it is already structured or
+    JSON text (optionally inside a ```json fence).
+
+    Raises:
+        pydantic.ValidationError: If the output does not match ProductMetadata.
+    """
+
+    if isinstance(value, ProductMetadata):
+        return value
+    if isinstance(value, dict):
+        return ProductMetadata.model_validate(value)
+
+    text = str(value or "")
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    return ProductMetadata.model_validate_json(match.group(0) if match else text)
+
+
+def metadata_view(*fields: str) -> Callable[[Any], Any]:
+    """
+    Builds a view of `extraction_agent` output limited to `fields`, for instruction
+    providers (see state_offload.view_instruction).
+    """
+
+    def view(value):
+        if not isinstance(value, dict):
+            return value
+        return {field: value.get(field, "") for field in fields}
+
+    return view
+
 
 extraction_agent = Agent(
     name="extraction_agent",
@@ -47,5 +104,8 @@ extraction_agent = Agent(
     </EXAMPLE>
     """,
     tools=[extract_metadata],
+    output_schema=ProductMetadata,
     output_key="metadata",
+    # Downstream agents read it through instruction views, not the session state
+    after_agent_callback=offload_state("metadata"),
 )
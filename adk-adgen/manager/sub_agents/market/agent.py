@@ -1,15 +1,91 @@
+from typing import Any, List
+
 from google.adk.agents import Agent
+from pydantic import BaseModel, Field
 from ...tools.search_market import search_market
 from ...tools.search_audience import search_audience
 from ...tools.search_competitors import search_competitors
-from ...tools.extract_metadata import extract_metadata
+from ...tools.extract_metadata import extract_metadata, extract_metadata_many
+from ...tools.state_offload import offload_state, view_instruction
+from ..extraction.agent import metadata_view
+
+# Competitors kept in the summary handed to the script agent
+SUMMARY_COMPETITORS = 3
+
+
+class Demographics(BaseModel):
+    age: str = Field(default="", description="Age range (e.g., '18-45 years').")
+    income: str = Field(
+        default="", description="Income range (e.g., '$40,000-$120,000')."
+    )
+    gender: str = Field(
+        default="", description="Gender breakdown (e.g., '55% male, 45% female')."
+    )
+
+
+class AudienceInsights(BaseModel):
+    demographics: Demographics = Field(default_factory=Demographics)
+    psychographics: str = Field(
+        default="",
+        description="Target audience personality, values, and lifestyle.",
+    )
+
+
+class Competitor(BaseModel):
+    name: str = Field(description="Competitor product name.")
+    brand: str = Field(default="", description="Brand name.")
+    price: str = Field(default="", description="Listed price (e.g., '$199').")
+    features: str = Field(
+        default="", description="Key features that differentiate this competitor."
+    )
+    description: str = Field(
+        default="", description="Brief description of the competitor product."
+    )
+    image_url: str = Field(default="", description="URL of the product image.")
+    product_url: str = Field(default="", description="URL of the product page.")
+
+
+class MarketAnalysis(BaseModel):
+    market_size: str = Field(
+        description="Brief description of the market size with specific numbers/revenue if available."
+    )
+    market_trends: List[str] = Field(
+        description="Up to 3 key trends affecting this product category."
+    )
+    audience_insights: AudienceInsights = Field(default_factory=AudienceInsights)
+    competitors: List[Competitor] = Field(default_factory=list)
+
+
+def summarize_market(value: Any) -> Any:
+    """
+    Compact view of `market_agent` output for writing the script: sizing, trends and
+    audience as they are, the top competitors reduced to name, brand, price and
+    features (no descriptions or URLs).
+    """
+
+    if not isinstance(value, dict):
+        return value
+    return {
+        "market_size": value.get("market_size", ""),
+        "market_trends": value.get("market_trends", []),
+        "audience_insights": value.get("audience_insights", {}),
+        "competitors": [
+            {
+                field: competitor.get(field, "")
+                for field in ("name", "brand", "price", "features")
+            }
+            for competitor in value.get("competitors", [])[:SUMMARY_COMPETITORS]
+            if isinstance(competitor, dict)
+        ],
+    }
 
 
 market_agent = Agent(
     name="market_agent",
     model="gemini-2.0-flash",
     description="Market agent",
-    instruction="""
+    instruction=view_instruction(
+        """
     <SYSTEM>
     You are a market research agent.
 
@@ -18,6 +94,7 @@ market_agent = Agent(
     - 'search_audience': Returns brand demographics using Tavily search
     - 'search_competitors': Returns a list of aggregator sites with lists of competing products using Tavily search
     - 'extract_metadata': Extracts metadata from a given URL
+    - 'extract_metadata_many': Extracts metadata from a list of URLs in a single call
 
     Use the previous output {metadata} from 'extraction_agent' to inform your searches and analyses. Specifically, {metadata}
     provides you with the following information:
@@ -41,7 +118,8 @@ market_agent = Agent(
     with lists of competing products.
     4. Call 'extract_metadata' on the top URL from the previous step to extract metadata about the aggregator page, then find the top 5 competing 
     products' URLs from the list.
-    5. Call 'extract_metadata' again on each of these URLs to extract detailed metadata about each competitor, including:
+    5. Call 'extract_metadata_many' ONCE with the list of these URLs to extract detailed metadata about every competitor
+    in a single call. Do NOT call 'extract_metadata' separately for each competitor. Use the results to describe each competitor, including:
         - name
         - brand
         - features
@@ -49,6 +127,7 @@ market_agent = Agent(
         - image_url
         - product_url
 
+    NOTE: Steps 1, 2 and 3 do not depend on each other. Issue all three tool calls together in the same turn.
     NOTE: ONLY output the final results at the end of the workflow. Do NOT output intermediate results or tool calls.
     </WORKFLOW>
 
@@ -83,11 +162,25 @@ market_agent = Agent(
     }
     </OUTPUT_FORMAT>
     """,
+        metadata=metadata_view(
+            "brand",
+            "product_name",
+            "product_category",
+            "description",
+            "key_features",
+            "price",
+            "image_url",
+            "product_url",
+        ),
+    ),
     tools=[
         search_market,
         search_audience,
         search_competitors,
         extract_metadata,
+        extract_metadata_many,
     ],
+    output_schema=MarketAnalysis,
     output_key="market_analysis",
+    after_agent_callback=offload_state("market_analysis"),
 )
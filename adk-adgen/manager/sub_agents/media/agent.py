@@ -0,0 +1,9 @@
+from google.adk.agents import ParallelAgent
+from ..aroll.agent import a_roll_agent
+from ..broll.agent import b_roll_agent
+
+media_agent = ParallelAgent(
+    name="media_agent",
+    description="Media agent",
+    sub_agents=[a_roll_agent, b_roll_agent],
+)
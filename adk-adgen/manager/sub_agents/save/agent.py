@@ -1,24 +1,52 @@
-from google.adk.agents import Agent
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+from pydantic import ValidationError
+from ..extraction.agent import parse_metadata
 from ...tools.save_image import save_image
+from ...tools.state_offload import hydrate
 
-save_agent = Agent(
-    name="save_agent",
-    model="gemini-2.0-flash",
-    description="Save agent",
-    instruction="""
-    <SYSTEM>
-    You are an image saver agent.
 
-    Your task is to take the `image_url` field from {metadata} provided by `extraction_agent` and use it to call the `save_image` tool.
+class SaveImageAgent(BaseAgent):
+    """
+    Saves the product image chosen by `extraction_agent` without a model call.
+
+    Reading `image_url` from {metadata} and calling `save_image` is deterministic, so
+    this agent does it directly instead of spending a Gemini round trip on it.
+    """
 
-    Steps:
-    1. Read the `image_url` value from {metadata}.
-    2. Immediately call the `save_image` tool with that URL as input.
-    3. The `save_image` tool will download the image, encode it as base64, and store it in `tool_context.state["base64_image"]`.
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        # Collects the state and artifact changes made by save_image
+        callback_context = CallbackContext(ctx)
 
-    You must complete this task automatically and silently. Do not return anything to the user unless there is an error.
-    </SYSTEM>
+        try:
+            metadata = parse_metadata(await hydrate(callback_context, "metadata"))
+        except ValidationError as e:
+            message = f"Could not parse product metadata: {e.error_count()} errors"
+        else:
+            if metadata.error:
+                message = f"Skipped image save: {metadata.error}"
+            elif not metadata.image_url:
+                message = "Skipped image save: no image_url in metadata."
+            else:
+                message = await save_image(metadata.image_url, callback_context)
 
-    """,
-    tools=[save_image],
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=message)]),
+            actions=callback_context.actions,
+        )
+
+
+save_agent = SaveImageAgent(
+    name="save_agent",
+    description="Saves the product image from the extracted metadata",
 )
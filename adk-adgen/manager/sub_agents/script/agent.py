@@ -1,5 +1,9 @@
 from google.adk.agents import Agent
 from pydantic import BaseModel, Field
+from ...tools.speculation import start_speculative_b_roll
+from ...tools.state_offload import offload_state, view_instruction
+from ..extraction.agent import metadata_view
+from ..market.agent import summarize_market
 
 
 class AVScript(BaseModel):
@@ -15,7 +19,9 @@ script_agent = Agent(
     name="script_agent",
     model="gemini-2.0-flash",
     description="Script agent",
-    instruction="""
+    # Only the product fields and market summary the script is written from
+    instruction=view_instruction(
+        """
     <SYSTEM>
     You are a script agent.
 
@@ -59,6 +65,21 @@ script_agent = Agent(
     - ONLY show the product itself (no text overlays, no animation).
     </WARNINGS>
     """,
+        metadata=metadata_view(
+            "brand",
+            "product_name",
+            "product_category",
+            "description",
+            "key_features",
+            "price",
+        ),
+        market_analysis=summarize_market,
+    ),
     output_schema=AVScript,
     output_key="av_script",
+    after_agent_callback=[
+        # Optionally starts B-roll generation while the script is still under review
+        start_speculative_b_roll,
+        offload_state("av_script"),
+    ],
 )
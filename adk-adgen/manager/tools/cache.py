@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str:
+    """Lowercases scheme and host, drops fragments and trailing slashes."""
+
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, parts.query, "")
+    )
+
+
+def normalize_payload(payload: Any) -> Any:
+    """
+    Normalizes a request payload so equivalent requests produce the same cache key.
+
+    URLs are canonicalized, queries are case- and whitespace-folded, and keys with
+    empty values are dropped.
+    """
+
+    if isinstance(payload, dict):
+        normalized = {}
+        for key, value in payload.items():
+            if value is None or value == [] or value == "":
+                continue
+            if key in ("url", "urls"):
+                value = (
+                    [normalize_url(u) for u in value]
+                    if isinstance(value, list)
+                    else normalize_url(value)
+                )
+            elif key == "query" and isinstance(value, str):
+                value = " ".join(value.lower().split())
+            normalized[key] = normalize_payload(value)
+        return normalized
+    if isinstance(payload, list):
+        return [normalize_payload(item) for item in payload]
+    return payload
+
+
+def make_key(namespace: str, payload: Any) -> str:
+    """Returns a content address (sha256) for a normalized payload."""
+
+    canonical = json.dumps(
+        normalize_payload(payload), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(f"{namespace}:{canonical}".encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Two-tier TTL cache: an in-memory LRU front tier backed by a local SQLite file.
+
+    Both tiers expire entries after `ttl` seconds and evict least recently used
+    entries once they exceed their size caps. Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        ttl: float,
+        max_entries: int,
+        memory_entries: int = 256,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            # Step 1: Memory tier
+            entry = self._memory.get(key)
+            if entry:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            # Step 2: Disk tier (promote hits to memory)
+            if self._db:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._db.execute(
+                        "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+                if row:
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now),
+                )
+                self._evict(now)
+                self._db.commit()
+
+    async def aget(self, key: str) -> Any | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
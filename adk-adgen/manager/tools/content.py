@@ -0,0 +1,149 @@
+import re
+from urllib.parse import urlsplit
+
+# Raw page content handed to the model is capped to the most relevant chunks
+MAX_CHUNKS = 4
+CHUNK_CHARS = 600
+MAX_IMAGES = 5
+
+MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+BARE_URL = re.compile(r"https?://\S+")
+WORD = re.compile(r"[a-z0-9$]+")
+# Lines that are navigation, legal or account chrome rather than page content
+BOILERPLATE = re.compile(
+    r"cookie|privacy|terms (of|&) |sign in|log in|sign up|subscribe|newsletter|"
+    r"skip to|all rights reserved|©|copyright|add to (cart|bag|wishlist)|"
+    r"shopping (cart|bag)|my account|follow us",
+    re.IGNORECASE,
+)
+# Images that are never product shots
+NON_PRODUCT_IMAGE = re.compile(
+    r"\.(svg|gif|ico)(\?|$)|logo|icon|sprite|favicon|pixel|badge|avatar|placeholder",
+    re.IGNORECASE,
+)
+# Tavily fields the agents never read
+UNUSED_FIELDS = ("favicon", "score", "response_time", "request_id", "usage")
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drops images, link targets, URLs, chrome lines and repeated lines."""
+
+    text = MARKDOWN_IMAGE.sub("", text)
+    text = MARKDOWN_LINK.sub(r"\1", text)
+    text = BARE_URL.sub("", text)
+
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = " ".join(line.strip(" \t#*>|-").split())
+        key = line.lower()
+        if len(line) < 3 or key in seen:
+            continue
+        if BOILERPLATE.search(line) and len(line) < 120:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    chunks = []
+    current = ""
+    for line in text.splitlines():
+        if current and len(current) + len(line) + 1 > size:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line[: size * 2]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def top_chunks(
+    text: str,
+    query: str,
+    max_chunks: int = MAX_CHUNKS,
+    chunk_chars: int = CHUNK_CHARS,
+) -> str:
+    """
+    Keeps the `max_chunks` chunks of `text` sharing the most words with `query`.
+
+    Chunks are returned in page order; ties favor earlier chunks.
+    """
+
+    chunks = _chunks(strip_boilerplate(text), chunk_chars)
+    if len(chunks) <= max_chunks:
+        return "\n".join(chunks)
+
+    terms = set(WORD.findall(query.lower()))
+    scored = sorted(
+        range(len(chunks)),
+        key=lambda i: (-len(terms & set(WORD.findall(chunks[i].lower()))), i),
+    )
+    keep = sorted(scored[:max_chunks])
+    return "\n...\n".join(chunks[i] for i in keep)
+
+
+def dedupe_images(images: list, limit: int = MAX_IMAGES) -> list[str]:
+    """
+    Drops icons, logos and size/format variants of the same image, keeping order.
+    """
+
+    kept = []
+    seen = set()
+    for image in images or []:
+        url = image.get("url") if isinstance(image, dict) else image
+        if not url or NON_PRODUCT_IMAGE.search(url):
+            continue
+        # Variants of one image usually differ only in their query string
+        parts = urlsplit(url)
+        key = (parts.netloc.lower(), parts.path)
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(url)
+        if len(kept) == limit:
+            break
+    return kept
+
+
+def _drop_unused(item: dict) -> dict:
+    return {k: v for k, v in item.items() if k not in UNUSED_FIELDS}
+
+
+def trim_search(response: dict, query: str) -> dict:
+    """Reduces a Tavily search response to the answer and trimmed results."""
+
+    results = []
+    for result in response.get("results", []):
+        result = _drop_unused(result)
+        if result.get("raw_content"):
+            result["raw_content"] = top_chunks(result["raw_content"], query)
+        results.append(result)
+
+    trimmed = {"answer": response.get("answer"), "results": results}
+    if response.get("images"):
+        trimmed["images"] = dedupe_images(response["images"])
+    if response.get("error") or response.get("detail"):
+        trimmed["error"] = response.get("error") or response.get("detail")
+    return trimmed
+
+
+def trim_extract(result: dict) -> dict:
+    """
+    Reduces one Tavily extract result to its most product-relevant content and images.
+
+    Relevance is judged against the URL's own path (usually the product slug) plus
+    words that mark product details.
+    """
+
+    url = result.get("url", "")
+    query = " ".join(
+        [urlsplit(url).path.replace("-", " ").replace("/", " "), "price features $"]
+    )
+    return {
+        **_drop_unused(result),
+        "raw_content": top_chunks(result.get("raw_content") or "", query),
+        "images": dedupe_images(result.get("images", [])),
+    }
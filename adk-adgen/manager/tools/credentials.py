@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+# google.auth (and its transport, which pulls in requests) is imported on first use
+if TYPE_CHECKING:
+    from google.auth.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+# Refresh tokens this long before they expire
+REFRESH_MARGIN = timedelta(minutes=5)
+# Retry delay for a failed background refresh
+RETRY_DELAY = 30
+
+
+class CredentialProvider:
+    """
+    Process-wide Google credentials with cached, proactively refreshed access tokens.
+
+    Credentials are loaded once. Tokens are refreshed in a worker thread when they are
+    within REFRESH_MARGIN of expiry, and a background task refreshes them ahead of
+    time so callers on the hot path (Veo submit/poll, GCS) never wait on the
+    metadata server or OAuth endpoint.
+    """
+
+    def __init__(
+        self,
+        scopes: list[str] = SCOPES,
+        credentials: "Credentials | None" = None,
+        project: str | None = None,
+    ):
+        self.scopes = scopes
+        # Explicit credentials skip google.auth.default (e.g. for local stand-ins)
+        self._credentials = credentials
+        self.project = project
+        self._lock = threading.Lock()
+        self._refresher: asyncio.Task | None = None
+
+    @property
+    def credentials(self) -> "Credentials":
+        with self._lock:
+            if self._credentials is None:
+                import google.auth
+
+                self._credentials, self.project = google.auth.default(
+                    scopes=self.scopes
+                )
+            return self._credentials
+
+    @staticmethod
+    def _expiring(credentials: "Credentials") -> bool:
+        if not credentials.token or not credentials.expiry:
+            return True
+        # google-auth stores expiry as a naive UTC datetime
+        expiry = credentials.expiry.replace(tzinfo=timezone.utc)
+        return expiry - datetime.now(timezone.utc) <= REFRESH_MARGIN
+
+    def refresh_if_needed(self) -> str:
+        """Blocking: returns a token valid for at least REFRESH_MARGIN."""
+
+        credentials = self.credentials
+        with self._lock:
+            if self._expiring(credentials):
+                from google.auth.transport.requests import Request
+
+                credentials.refresh(Request())
+            return credentials.token
+
+    async def token(self) -> str:
+        """
+        Returns a cached access token, refreshing it off the event loop only when
+        needed.
+
+        Also makes sure a background refresher is running for the current event loop.
+        """
+
+        if self._credentials is None:
+            # Loading default credentials may hit the metadata server
+            await asyncio.to_thread(lambda: self.credentials)
+
+        if not self._refresher or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+        credentials = self.credentials
+        if self._expiring(credentials):
+            return await asyncio.to_thread(self.refresh_if_needed)
+        return credentials.token
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_if_needed)
+                expiry = self.credentials.expiry.replace(tzinfo=timezone.utc)
+                delay = (
+                    expiry - REFRESH_MARGIN - datetime.now(timezone.utc)
+                ).total_seconds()
+            except Exception as e:
+                logger.warning("Background credential refresh failed: %s", e)
+                delay = RETRY_DELAY
+            await asyncio.sleep(max(delay, 1))
+
+
+_provider = CredentialProvider()
+
+
+def get_provider() -> CredentialProvider:
+    """Returns the shared provider used by Veo calls and GCS clients."""
+
+    return _provider
+
+
+def set_provider(provider: CredentialProvider) -> None:
+    """Replaces the shared provider; call before the first Veo or GCS request."""
+
+    global _provider
+    _provider = provider
@@ -0,0 +1,274 @@
+from dataclasses import dataclass, field
+
+# Transitions supported between segments
+TRANSITIONS = ("cut", "fade")
+# Longest freeze on the last B-roll frame; longer shots loop the B-roll instead
+MAX_HOLD = 0.5
+
+
+@dataclass
+class Segment:
+    """
+    One shot on the output timeline.
+
+    `ratio` is the shot's share of the A-roll duration (ratios are normalized).
+    A-roll shots always play the A-roll at the matching timeline position so the
+    avatar stays in sync with the continuous A-roll audio. B-roll shots continue from
+    where the previous B-roll shot ended (looping), unless `start` pins a source offset
+    in seconds. Shots that would run past the end of the B-roll are moved back so
+    they end on its last frame; shots longer than the whole B-roll loop it.
+    """
+
+    source: str
+    ratio: float
+    start: float | None = None
+    transition: str = "cut"
+    transition_duration: float = 0.3
+
+
+@dataclass
+class Layout:
+    """An output frame size; "crop" fills the frame, "pad" letterboxes."""
+
+    name: str
+    width: int
+    height: int
+    fit: str = "crop"
+
+
+@dataclass
+class EditDecisionList:
+    segments: list[Segment]
+    layouts: list[Layout] = field(default_factory=list)
+
+
+@dataclass
+class Cut:
+    """A segment resolved against real input durations (seconds)."""
+
+    source: str
+    start: float
+    end: float
+    hold: float = 0.0
+    transition: str = "cut"
+    transition_duration: float = 0.3
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start + self.hold
+
+
+# Built-in templates selectable through state["edl_template"]
+TEMPLATES = {
+    "alternating_quarters": [
+        Segment("a", 0.25),
+        Segment("b", 0.25),
+        Segment("a", 0.25),
+        Segment("b", 0.25),
+    ],
+    "bookends": [Segment("a", 0.3), Segment("b", 0.4), Segment("a", 0.3)],
+    "broll_intro": [
+        Segment("b", 0.2, transition="fade"),
+        Segment("a", 0.4, transition="fade"),
+        Segment("b", 0.2, transition="fade"),
+        Segment("a", 0.2, transition="fade"),
+    ],
+}
+DEFAULT_TEMPLATE = "alternating_quarters"
+
+# Output profiles selectable by name through state["output_profiles"]
+LAYOUT_PRESETS = {
+    "16:9": Layout("16x9", 1280, 720),
+    "9:16": Layout("9x16", 720, 1280),
+    "1:1": Layout("1x1", 1080, 1080),
+}
+
+
+def from_state(state) -> EditDecisionList:
+    """
+    Loads the EDL for a session.
+
+    Uses state["edl"] ({"segments": [...], "layouts": [...]}, fields as in Segment and
+    Layout) when present, otherwise the template named by state["edl_template"].
+    state["output_profiles"] (preset names like "9:16" or Layout dicts) overrides the
+    layouts.
+
+    Raises:
+        ValueError: If the EDL is malformed.
+    """
+
+    spec = state.get("edl")
+    if spec:
+        segments = [Segment(**segment) for segment in spec.get("segments", [])]
+        layouts = [Layout(**layout) for layout in spec.get("layouts", [])]
+    else:
+        template = state.get("edl_template", DEFAULT_TEMPLATE)
+        if template not in TEMPLATES:
+            raise ValueError(f"Unknown EDL template: {template}")
+        segments = list(TEMPLATES[template])
+        layouts = []
+
+    profiles = state.get("output_profiles")
+    if profiles:
+        layouts = [layout_from_profile(profile) for profile in profiles]
+
+    edl = EditDecisionList(segments=segments, layouts=layouts)
+    validate(edl)
+    return edl
+
+
+def layout_from_profile(profile: str | dict) -> Layout:
+    if isinstance(profile, dict):
+        return Layout(**profile)
+    if profile not in LAYOUT_PRESETS:
+        raise ValueError(f"Unknown output profile: {profile}")
+    return LAYOUT_PRESETS[profile]
+
+
+def validate(edl: EditDecisionList) -> None:
+    if not edl.segments:
+        raise ValueError("EDL has no segments")
+    for segment in edl.segments:
+        if segment.source not in ("a", "b"):
+            raise ValueError(f"Invalid segment source: {segment.source}")
+        if segment.ratio <= 0:
+            raise ValueError(f"Invalid segment ratio: {segment.ratio}")
+        if segment.transition not in TRANSITIONS:
+            raise ValueError(f"Invalid transition: {segment.transition}")
+    for layout in edl.layouts:
+        if layout.fit not in ("crop", "pad"):
+            raise ValueError(f"Invalid layout fit: {layout.fit}")
+    names = [layout.name for layout in edl.layouts]
+    if len(names) != len(set(names)):
+        raise ValueError("Layout names must be unique")
+
+
+def resolve(edl: EditDecisionList, a_duration: float, b_duration: float) -> list[Cut]:
+    """Turns segment ratios into concrete source cuts on an A-roll-length timeline."""
+
+    # A zero-length B-roll would loop forever below
+    if a_duration <= 0 or b_duration <= 0:
+        raise ValueError(
+            f"Invalid durations: A-roll {a_duration}s, B-roll {b_duration}s"
+        )
+
+    total_ratio = sum(segment.ratio for segment in edl.segments)
+    cuts = []
+    position = 0.0
+    b_position = 0.0
+
+    def add(segment: Segment, start: float, length: float, hold: float = 0.0):
+        nonlocal position
+        # Only the first cut of a looped shot carries the segment's transition
+        transition = segment.transition if position == shot_start else "cut"
+        cuts.append(
+            Cut(
+                source=segment.source,
+                start=round(start, 3),
+                end=round(start + length, 3),
+                hold=round(hold, 3),
+                transition=transition,
+                transition_duration=min(segment.transition_duration, length / 2),
+            )
+        )
+        position += length + hold
+
+    for segment in edl.segments:
+        length = a_duration * segment.ratio / total_ratio
+        shot_start = position
+        if segment.source == "a":
+            add(segment, position, length)
+            continue
+
+        while length > b_duration + MAX_HOLD:
+            # Play the whole B-roll and loop for the rest of the shot
+            add(segment, 0.0, b_duration)
+            length -= b_duration
+        if length > b_duration:
+            # A short remainder freezes the last frame
+            add(segment, 0.0, b_duration, hold=length - b_duration)
+            b_position = b_duration
+            continue
+
+        if position > shot_start:
+            start = 0.0
+        else:
+            start = segment.start if segment.start is not None else b_position
+        if start + length > b_duration:
+            # End on the B-roll's last frame instead of replaying its opening
+            start = max(0.0, b_duration - length)
+        add(segment, start, length)
+        b_position = start + length
+
+    return cuts
+
+
+def cover_filter(width: int, height: int) -> str:
+    """Scales to fill a width x height frame and crops the overflow, keeping aspect."""
+
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+        f"crop={width}:{height},setsar=1"
+    )
+
+
+def _fit(layout: Layout) -> str:
+    w, h = layout.width, layout.height
+    if layout.fit == "pad":
+        return (
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+        )
+    return cover_filter(w, h)
+
+
+def compile_filter(
+    cuts: list[Cut], size: tuple[int, int], layouts: list[Layout]
+) -> tuple[str, list[str]]:
+    """
+    Compiles resolved cuts into one filter_complex graph.
+
+    Each input is decoded once and split per cut, the cuts are concatenated at the
+    A-roll `size`, and the result is split again into one scaled/cropped branch per
+    layout, so several layouts render from a single decode pass.
+
+    Returns:
+        tuple[str, list[str]]: The filter graph and one output label per layout
+            (a single "[outv]" when no layouts are given).
+    """
+
+    width, height = size
+    inputs = {"a": "0:v", "b": "1:v"}
+    labels = {"a": [], "b": []}
+    chains = []
+
+    for i, cut in enumerate(cuts):
+        labels[cut.source].append(f"{cut.source}{i}")
+        chain = f"[{cut.source}{i}]trim={cut.start}:{cut.end},setpts=PTS-STARTPTS"
+        if cut.source == "b":
+            # Veo renders 16:9; crop rather than stretch it into the A-roll frame
+            chain += "," + cover_filter(width, height)
+        if cut.hold:
+            chain += f",tpad=stop_mode=clone:stop_duration={cut.hold}"
+        if cut.transition == "fade":
+            chain += f",fade=t=in:st=0:d={cut.transition_duration:.3f}"
+        chains.append(f"{chain}[s{i}]")
+
+    splits = [
+        f"[{inputs[source]}]split={len(names)}" + "".join(f"[{n}]" for n in names)
+        for source, names in labels.items()
+        if names
+    ]
+    concat = "".join(f"[s{i}]" for i in range(len(cuts)))
+
+    if not layouts:
+        concat += f"concat=n={len(cuts)}:v=1:a=0[outv]"
+        return ";".join(splits + chains + [concat]), ["[outv]"]
+
+    concat += f"concat=n={len(cuts)}:v=1:a=0[timeline]"
+    outputs = [f"[out{i}]" for i in range(len(layouts))]
+    branches = "".join(f"[l{i}]" for i in range(len(layouts)))
+    fan_out = [f"[timeline]split={len(layouts)}{branches}"]
+    fan_out += [f"[l{i}]{_fit(layout)}{outputs[i]}" for i, layout in enumerate(layouts)]
+
+    return ";".join(splits + chains + [concat] + fan_out), outputs
@@ -1,33 +1,64 @@
-import requests
-import os
-from dotenv import load_dotenv
+import asyncio
+from typing import List
 
-load_dotenv()
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+from . import tavily
+from .content import trim_extract
 
+# Tavily's extract endpoint accepts at most 20 URLs per request
+MAX_URLS_PER_REQUEST = 20
 
-def extract_metadata(url: str) -> dict:
+EXTRACT_OPTIONS = {
+    "include_images": True,
+    "extract_depth": "basic",
+    "format": "markdown",
+}
+
+
+async def extract_metadata(url: str) -> dict:
     """
     Extracts metadata from a given URL using Tavily's extract API.
 
     Args:
         url (str): The URL from which to extract metadata.
     Returns:
-        dict: A dictionary containing the extracted metadata.
+        dict: A dictionary containing the extracted metadata, with page content cut to
+            the most relevant chunks and images deduplicated.
     """
 
-    endpoint = "https://api.tavily.com/extract"
-
-    payload = {
-        "urls": url,
-        "include_images": True,
-        "extract_depth": "basic",
-        "format": "markdown",
-    }
-    headers = {
-        "Authorization": f"Bearer {TAVILY_API_KEY}",
-        "Content-Type": "application/json",
+    response = await tavily.extract([url], EXTRACT_OPTIONS)
+    return {
+        "results": [trim_extract(result) for result in response.get("results", [])],
+        "failed_results": response.get("failed_results", []),
     }
 
-    response = requests.request("POST", endpoint, json=payload, headers=headers)
-    return response.json()
+
+async def extract_metadata_many(urls: List[str]) -> dict:
+    """
+    Extracts metadata from several URLs at once using Tavily's multi-URL extract API.
+
+    Args:
+        urls (List[str]): The URLs from which to extract metadata (e.g. competitor
+            product pages).
+    Returns:
+        dict: A dictionary with "results" (one entry per successfully extracted URL) and
+            "failed_results" (URLs that could not be extracted).
+    """
+
+    # Deduplicate while preserving order
+    urls = list(dict.fromkeys(urls))
+    batches = [
+        urls[i : i + MAX_URLS_PER_REQUEST]
+        for i in range(0, len(urls), MAX_URLS_PER_REQUEST)
+    ]
+
+    responses = await asyncio.gather(
+        *(tavily.extract(batch, EXTRACT_OPTIONS) for batch in batches)
+    )
+
+    results = []
+    failed_results = []
+    for response in responses:
+        results.extend(trim_extract(result) for result in response.get("results", []))
+        failed_results.extend(response.get("failed_results", []))
+
+    return {"results": results, "failed_results": failed_results}
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from . import tracing
+from .settings import get_settings
+
+# Named encoding profiles selectable through state["encode_profile"]
+ENCODING_PROFILES = {
+    "fast": {"preset": "ultrafast", "crf": 26},
+    "balanced": {"preset": "veryfast", "crf": 23},
+    "quality": {"preset": "medium", "crf": 20},
+}
+DEFAULT_PROFILE = "balanced"
+
+# Cut points within this many seconds of a keyframe count as aligned
+KEYFRAME_TOLERANCE = 0.05
+# ffprobe H.264 profiles that libx264 can encode matching segments for
+X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+# Stream parameters that must agree for segments to be joined without re-encoding
+STREAM_SIGNATURE = (
+    "codec_name",
+    "profile",
+    "level",
+    "pix_fmt",
+    "width",
+    "height",
+    "r_frame_rate",
+    "time_base",
+)
+
+_slots: dict[int, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+_queued = 0
+
+
+@dataclass
+class EncodingProfile:
+    preset: str
+    crf: int
+    threads: int
+    audio_bitrate: str = "128k"
+
+    def video_args(self) -> list[str]:
+        return [
+            "-c:v",
+            "libx264",
+            "-preset",
+            self.preset,
+            "-crf",
+            str(self.crf),
+            "-threads",
+            str(self.threads),
+            "-pix_fmt",
+            "yuv420p",
+        ]
+
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-b:a", self.audio_bitrate]
+
+    def matching_video_args(self, stream: dict) -> list[str]:
+        """
+        Encoder arguments for segments joined to a yuv420p H.264 `stream` without
+        re-encoding it: the same profile and level.
+        """
+
+        return [
+            *self.video_args(),
+            "-profile:v",
+            X264_PROFILES[stream["profile"]],
+            "-level:v",
+            f"{stream['level'] / 10:.1f}",
+        ]
+
+
+def profile_from_state(state) -> EncodingProfile:
+    """
+    Builds the encoding profile for a session.
+
+    Reads "encode_profile" (fast/balanced/quality) and optional "encode_preset",
+    "encode_crf" and "encode_threads" overrides from state. Threads default to the
+    available cores divided by the number of ffmpeg processes allowed to run at once.
+    """
+
+    base = ENCODING_PROFILES.get(
+        state.get("encode_profile", DEFAULT_PROFILE),
+        ENCODING_PROFILES[DEFAULT_PROFILE],
+    )
+    return EncodingProfile(
+        preset=state.get("encode_preset", base["preset"]),
+        crf=int(state.get("encode_crf", base["crf"])),
+        threads=int(
+            state.get(
+                "encode_threads",
+                max(1, available_cores() // max_concurrent_processes()),
+            )
+        ),
+    )
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def max_concurrent_processes() -> int:
+    """ffmpeg/ffprobe processes allowed to run at once; the rest wait in a queue."""
+
+    return get_settings().ffmpeg_max_concurrency or max(1, available_cores() // 2)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    entry = _slots.get(id(loop))
+    if entry and entry[0] is loop:
+        return entry[1]
+
+    semaphore = asyncio.Semaphore(max_concurrent_processes())
+    _slots[id(loop)] = (loop, semaphore)
+    return semaphore
+
+
+def queued() -> int:
+    """Number of ffmpeg/ffprobe processes waiting for a free slot."""
+
+    return _queued
+
+
+async def _read_progress(
+    stream: asyncio.StreamReader,
+    total_duration: float,
+    on_progress: Callable[[float], None],
+) -> None:
+    # `-progress pipe:1` emits key=value blocks, each terminated by a progress= line
+    out_time = 0.0
+    async for raw_line in stream:
+        key, _, value = raw_line.decode("utf-8", "replace").strip().partition("=")
+        if key == "out_time_us" and value.isdigit():
+            out_time = int(value) / 1_000_000
+        elif key == "progress":
+            fraction = 1.0 if value == "end" else out_time / total_duration
+            on_progress(min(max(fraction, 0.0), 1.0))
+
+
+async def run(
+    cmd: list[str],
+    total_duration: float | None = None,
+    on_progress: Callable[[float], None] | None = None,
+) -> str:
+    """
+    Runs ffmpeg/ffprobe as an asyncio subprocess within the shared concurrency limit.
+
+    Cancelling the awaiting task kills the process.
+
+    Args:
+        cmd (list[str]): Full command line.
+        total_duration (float): Expected output duration, used to compute progress.
+        on_progress (Callable): Called with the completed fraction (0.0-1.0) as ffmpeg
+            reports progress. Only used for ffmpeg commands.
+    Returns:
+        str: The process's stdout (empty when progress is being parsed).
+    Raises:
+        subprocess.CalledProcessError: If the process exits with a non-zero status.
+    """
+
+    global _queued
+    track_progress = bool(on_progress and total_duration and cmd[0] == "ffmpeg")
+    if track_progress:
+        cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+
+    _queued += 1
+    try:
+        await _semaphore().acquire()
+    finally:
+        _queued -= 1
+
+    try:
+        with tracing.span(cmd[0], "ffmpeg", output=cmd[-1]) as span:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                if track_progress:
+                    _, stderr = await asyncio.gather(
+                        _read_progress(process.stdout, total_duration, on_progress),
+                        process.stderr.read(),
+                    )
+                    stdout = b""
+                    await process.wait()
+                else:
+                    stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            span.set(returncode=process.returncode)
+    finally:
+        _semaphore().release()
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            process.returncode,
+            cmd,
+            output=stdout.decode("utf-8", "replace"),
+            stderr=stderr.decode("utf-8", "replace"),
+        )
+    return stdout.decode("utf-8", "replace")
+
+
+async def probe(path: Path) -> dict:
+    """
+    Probes a media file: format, first video stream and keyframe timestamps in a
+    single ffprobe run.
+
+    Returns:
+        dict: ffprobe JSON with "format", the first video stream in "streams" and its
+            keyframes in "frames".
+    """
+
+    output = await run(
+        [
+            "ffprobe",
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            "-select_streams",
+            "v:0",
+            "-skip_frame",
+            "nokey",
+            "-show_entries",
+            "frame=pts_time",
+            str(path),
+        ]
+    )
+    return json.loads(output)
+
+
+async def probe_many(*paths: Path) -> list[dict]:
+    """Probes several inputs concurrently."""
+
+    return list(await asyncio.gather(*(probe(path) for path in paths)))
+
+
+def duration(info: dict) -> float:
+    return float(info["format"]["duration"])
+
+
+def video_stream(info: dict) -> dict:
+    return info["streams"][0] if info.get("streams") else {}
+
+
+def stream_signature(info: dict) -> tuple:
+    """The video stream parameters that must match across concatenated segments."""
+
+    stream = video_stream(info)
+    return tuple(stream.get(field) for field in STREAM_SIGNATURE)
+
+
+def keyframe_times(info: dict) -> list[float]:
+    return [
+        float(frame["pts_time"])
+        for frame in info.get("frames", [])
+        if frame.get("pts_time") not in (None, "N/A")
+    ]
+
+
+def is_keyframe_aligned(info: dict, time: float) -> bool:
+    return any(abs(k - time) <= KEYFRAME_TOLERANCE for k in keyframe_times(info))
@@ -0,0 +1,350 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from . import tracing
+from .credentials import get_provider
+from .settings import get_settings
+
+# google-cloud-storage is imported on first use; it is the slowest part of a cold start
+if TYPE_CHECKING:
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+# Objects at least this large are transferred in parallel slices
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+PARALLEL_CHUNK_SIZE = 32 * 1024 * 1024
+PARALLEL_WORKERS = 8
+# Objects at least this large are uploaded resumably with an on-disk checkpoint
+RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+RESUMABLE_ATTEMPTS = 3
+# Resumable sessions expire after a week, so older checkpoints can never resume
+CHECKPOINT_MAX_AGE = 7 * 24 * 3600
+# Relative to settings.storage_host (STORAGE_EMULATOR_HOST)
+UPLOAD_PATH = "/upload/storage/v1/b/{bucket}/o?uploadType=resumable"
+
+_client: "storage.Client | None" = None
+_session: "AuthorizedSession | None" = None
+_lock = threading.Lock()
+
+# Running totals per direction, exposed through metrics()
+_metrics = {
+    "upload": {"transfers": 0, "bytes": 0, "seconds": 0.0},
+    "download": {"transfers": 0, "bytes": 0, "seconds": 0.0},
+}
+
+
+def get_client() -> "storage.Client":
+    """Returns the process-wide GCS client, creating it on first use."""
+
+    global _client
+    with _lock:
+        if _client is None:
+            from google.cloud import storage
+
+            # Shares the provider's credentials, which are refreshed ahead of expiry
+            provider = get_provider()
+            credentials = provider.credentials  # also resolves provider.project
+            _client = storage.Client(project=provider.project, credentials=credentials)
+        return _client
+
+
+def _get_session() -> "AuthorizedSession":
+    global _session
+    with _lock:
+        if _session is None:
+            from google.auth.transport.requests import AuthorizedSession
+
+            _session = AuthorizedSession(get_provider().credentials)
+        return _session
+
+
+def split_gcs_uri(uri: str) -> tuple[str, str]:
+    """Splits "gs://bucket/object" into (bucket, object)."""
+
+    bucket_name, object_name = uri[5:].split("/", 1)
+    return bucket_name, object_name
+
+
+def metrics() -> dict:
+    """Returns transfer counts, bytes, seconds and average bytes/sec per direction."""
+
+    return {
+        direction: {
+            **totals,
+            "bytes_per_second": (
+                totals["bytes"] / totals["seconds"] if totals["seconds"] else 0.0
+            ),
+        }
+        for direction, totals in _metrics.items()
+    }
+
+
+def _record(direction: str, size: int, seconds: float, uri: str) -> None:
+    with _lock:
+        totals = _metrics[direction]
+        totals["transfers"] += 1
+        totals["bytes"] += size
+        totals["seconds"] += seconds
+    span = tracing.current_span()
+    if span and span.kind == "gcs":
+        span.set(bytes=size, uri=uri)
+    logger.info(
+        "GCS %s %s: %d bytes in %.2fs (%.0f bytes/sec)",
+        direction,
+        uri,
+        size,
+        seconds,
+        size / seconds if seconds else 0.0,
+    )
+
+
+def content_hash(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file, read in 1 MiB blocks."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _prune_checkpoints(directory: Path) -> None:
+    # Checkpoints are rewritten after every chunk, so the mtime is the last activity
+    cutoff = time.time() - CHECKPOINT_MAX_AGE
+    for checkpoint in directory.glob("*.json"):
+        try:
+            if checkpoint.stat().st_mtime < cutoff:
+                checkpoint.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _checkpoint_path(path: Path, bucket_name: str, object_name: str) -> Path:
+    key = f"{bucket_name}/{object_name}\n{content_hash(path)}"
+    directory = Path(get_settings().upload_checkpoint_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    _prune_checkpoints(directory)
+    return directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+def _resumable_upload(
+    path: Path,
+    bucket_name: str,
+    object_name: str,
+    content_type: str,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> None:
+    """
+    Uploads through the JSON API resumable protocol, checkpointing the session URL and
+    offset so an interrupted upload continues where it stopped.
+
+    Checkpoints live in UPLOAD_CHECKPOINT_DIR, keyed by the file's content hash and
+    destination, so they only ever resume the same bytes. Callers that derive the
+    object name from the content can resume after a process restart; checkpoints older
+    than CHECKPOINT_MAX_AGE are deleted.
+    """
+
+    session = _get_session()
+    total = path.stat().st_size
+    checkpoint_path = _checkpoint_path(path, bucket_name, object_name)
+
+    checkpoint = {}
+    if checkpoint_path.exists():
+        checkpoint = json.loads(checkpoint_path.read_text())
+        if checkpoint.get("object") != f"{bucket_name}/{object_name}":
+            checkpoint = {}
+
+    offset = 0
+    session_url = checkpoint.get("session_url")
+    if session_url:
+        # Ask the server how much of the previous attempt it already has
+        status = session.put(session_url, headers={"Content-Range": f"bytes */{total}"})
+        if status.status_code in (200, 201):
+            checkpoint_path.unlink(missing_ok=True)
+            return
+        if status.status_code == 308:
+            uploaded = status.headers.get("Range")
+            offset = int(uploaded.split("-")[1]) + 1 if uploaded else 0
+        else:
+            session_url = None
+
+    if not session_url:
+        response = session.post(
+            get_settings().storage_host + UPLOAD_PATH.format(bucket=bucket_name),
+            json={"name": object_name, "contentType": content_type},
+            headers={"X-Upload-Content-Type": content_type},
+        )
+        response.raise_for_status()
+        session_url = response.headers["Location"]
+
+    with path.open("rb") as f:
+        while True:
+            checkpoint_path.write_text(
+                json.dumps(
+                    {
+                        "object": f"{bucket_name}/{object_name}",
+                        "session_url": session_url,
+                        "offset": offset,
+                    }
+                )
+            )
+            f.seek(offset)
+            chunk = f.read(RESUMABLE_CHUNK_SIZE)
+            end = offset + len(chunk) - 1
+            response = session.put(
+                session_url,
+                data=chunk,
+                headers={"Content-Range": f"bytes {offset}-{end}/{total}"},
+            )
+            if response.status_code in (200, 201):
+                break
+            if response.status_code != 308:
+                response.raise_for_status()
+            uploaded = response.headers.get("Range")
+            if not uploaded:
+                # The server kept none of the chunk; the caller's retry resumes
+                raise IOError(f"Resumable upload of {path.name} made no progress")
+            offset = int(uploaded.split("-")[1]) + 1
+            if on_progress:
+                on_progress(offset, total)
+
+    checkpoint_path.unlink(missing_ok=True)
+
+
+@tracing.traced("upload", "gcs")
+def upload_file(
+    path: Path,
+    uri: str,
+    content_type: str = "video/mp4",
+    on_progress: Callable[[int, int], None] | None = None,
+) -> str:
+    """
+    Uploads a local file to GCS, picking the transfer strategy by size.
+
+    Small files use a single request, medium files a checkpointed resumable upload,
+    and large files a parallel multipart (sliced) upload.
+
+    Args:
+        path (Path): Local file to upload.
+        uri (str): Destination "gs://bucket/object" URI.
+        content_type (str): MIME type stored on the object.
+        on_progress (Callable | None): Called from the uploading thread with bytes
+            sent and total bytes, after each resumable chunk and on completion.
+    Returns:
+        str: The destination URI.
+    """
+
+    bucket_name, object_name = split_gcs_uri(uri)
+    size = path.stat().st_size
+    started = time.monotonic()
+
+    if size >= PARALLEL_THRESHOLD:
+        from google.cloud.storage import transfer_manager
+
+        blob = get_client().bucket(bucket_name).blob(object_name)
+        transfer_manager.upload_chunks_concurrently(
+            str(path),
+            blob,
+            content_type=content_type,
+            chunk_size=PARALLEL_CHUNK_SIZE,
+            worker_type=transfer_manager.THREAD,
+            max_workers=PARALLEL_WORKERS,
+        )
+    elif size >= RESUMABLE_THRESHOLD:
+        # Retries resume from the checkpoint instead of starting over; a chunk
+        # that makes no progress counts as a failed attempt
+        for attempt in range(RESUMABLE_ATTEMPTS):
+            try:
+                _resumable_upload(
+                    path, bucket_name, object_name, content_type, on_progress
+                )
+                break
+            except Exception:
+                if attempt == RESUMABLE_ATTEMPTS - 1:
+                    raise
+                time.sleep(2**attempt)
+    else:
+        blob = get_client().bucket(bucket_name).blob(object_name)
+        blob.upload_from_filename(str(path), content_type=content_type)
+
+    _record("upload", size, time.monotonic() - started, uri)
+    if on_progress:
+        on_progress(size, size)
+    return uri
+
+
+@tracing.traced("upload", "gcs")
+def upload_bytes(data: bytes, uri: str, content_type: str) -> str:
+    """Uploads a small in-memory object in a single request."""
+
+    bucket_name, object_name = split_gcs_uri(uri)
+    started = time.monotonic()
+    blob = get_client().bucket(bucket_name).blob(object_name)
+    blob.upload_from_string(data, content_type=content_type)
+    _record("upload", len(data), time.monotonic() - started, uri)
+    return uri
+
+
+@tracing.traced("download", "gcs")
+def download_file(uri: str, path: Path) -> int:
+    """
+    Downloads a GCS object to a local file, in parallel slices when it is large.
+
+    Returns:
+        int: Number of bytes written.
+    """
+
+    bucket_name, object_name = split_gcs_uri(uri)
+    blob = get_client().bucket(bucket_name).get_blob(object_name)
+    if blob is None:
+        raise FileNotFoundError(uri)
+
+    started = time.monotonic()
+    if blob.size and blob.size >= PARALLEL_THRESHOLD:
+        from google.cloud.storage import transfer_manager
+
+        transfer_manager.download_chunks_concurrently(
+            blob,
+            str(path),
+            chunk_size=PARALLEL_CHUNK_SIZE,
+            worker_type=transfer_manager.THREAD,
+            max_workers=PARALLEL_WORKERS,
+        )
+    else:
+        blob.download_to_filename(str(path))
+
+    size = path.stat().st_size
+    _record("download", size, time.monotonic() - started, uri)
+    return size
+
+
+async def upload_file_async(
+    path: Path,
+    uri: str,
+    content_type: str = "video/mp4",
+    on_progress: Callable[[int, int], None] | None = None,
+) -> str:
+    """Runs upload_file in a worker thread so the event loop stays free."""
+
+    return await asyncio.to_thread(upload_file, path, uri, content_type, on_progress)
+
+
+async def upload_bytes_async(data: bytes, uri: str, content_type: str) -> str:
+    """Runs upload_bytes in a worker thread so the event loop stays free."""
+
+    return await asyncio.to_thread(upload_bytes, data, uri, content_type)
+
+
+async def download_file_async(uri: str, path: Path) -> int:
+    """Runs download_file in a worker thread so the event loop stays free."""
+
+    return await asyncio.to_thread(download_file, uri, path)
@@ -1,36 +1,99 @@
-import asyncio
-import os
+import hashlib
+import hmac
 
-import requests
-from dotenv import load_dotenv
 from google.adk.tools import ToolContext
 from google.genai import types
 
-load_dotenv()
-HEYGEN_API_KEY = os.getenv("HEYGEN_API_KEY")
+from . import http_client, progress
+from .job_poller import JobFailed, JobStatus, JobTimeout, get_poller
+from .media_io import save_reference
+from .media_store import get_store
+from .settings import get_settings
 
+A_ROLL_TIMEOUT = 600
+# With a webhook registered, polling is only a safety net
+WEBHOOK_POLL_INTERVAL = 60
 
-async def generate_a_roll(prompt: str, tool_context: ToolContext) -> str:
+
+def verify_heygen_signature(body: bytes, signature: str | None) -> bool:
     """
-    Generates A-roll footage using HeyGen's avatar API.
+    Checks a webhook's "Signature" header: the hex HMAC-SHA256 of the raw body, keyed
+    with the endpoint secret HeyGen issued (HEYGEN_WEBHOOK_SECRET).
+
+    Returns:
+        bool: False when the signature is missing or wrong, or no secret is configured.
+    """
+
+    secret = get_settings().heygen_webhook_secret
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def handle_heygen_webhook(event: dict) -> bool:
+    """
+    Completes a pending A-roll job from a HeyGen webhook event.
 
     Args:
-        prompt (str): A-roll footage portion of the AV script generated by 'script_agent'
-        tool_context: Tool context to access avatar ID, voice ID, video width, and video height stored in state
+        event (dict): HeyGen webhook body ({"event_type": ..., "event_data": {...}}).
     Returns:
-        str: Status message (success/failure of API call) with video URL
+        bool: Whether the event matched a pending job.
+    Raises:
+        ValueError: If the body is not a JSON object with an object as "event_data".
     """
 
-    # Step 1: Get IDs and dimensions from state (assumed to be saved by root after pass from frontend)
-    avatar_id = tool_context.state.get("avatar_id", "Annie_expressive12_public")
-    voice_id = tool_context.state.get("voice_id", "330290724a1b470fb63153f34d4c0183")
-    width = tool_context.state.get("width", 1280)
-    height = tool_context.state.get("height", 720)
+    if not isinstance(event, dict) or not isinstance(event.get("event_data", {}), dict):
+        raise ValueError("Malformed HeyGen webhook event")
+
+    event_type = event.get("event_type")
+    event_data = event.get("event_data", {})
+    job_id = f"heygen:{event_data.get('video_id')}"
+
+    if event_type == "avatar_video.success":
+        status = JobStatus(
+            done=True,
+            result={
+                "video_url": event_data.get("url"),
+                "caption_url": event_data.get("caption_url"),
+            },
+        )
+    elif event_type == "avatar_video.fail":
+        status = JobStatus(
+            done=True,
+            error=f"Video generation failed: Error {event_data.get('msg')}",
+        )
+    else:
+        return False
+
+    return get_poller().resolve(job_id, status)
+
+
+async def render_a_roll(
+    prompt: str,
+    avatar_id: str,
+    voice_id: str,
+    width: int,
+    height: int,
+    session: progress.SessionKey | None = None,
+) -> dict:
+    """
+    Submits an avatar video to HeyGen and waits for it to finish.
+
+    Submission and every change in HeyGen's status are published as progress events
+    for `session`.
+
+    Returns:
+        dict: HeyGen's completed status data ("video_url", "caption_url", ...).
+    Raises:
+        JobFailed: If submission or rendering fails.
+        JobTimeout: If the video is not ready within A_ROLL_TIMEOUT.
+    """
 
-    # Step 2: Generate video
-    url = "https://api.heygen.com/v2/video/generate"
+    settings = get_settings()
+    url = f"{settings.heygen_base_url}/v2/video/generate"
 
-    headers = {"X-Api-Key": HEYGEN_API_KEY, "Content-Type": "application/json"}
+    headers = {"X-Api-Key": settings.heygen_api_key, "Content-Type": "application/json"}
 
     payload = {
         "caption": True,
@@ -52,60 +115,132 @@ async def generate_a_roll(prompt: str, tool_context: ToolContext) -> str:
         "dimension": {"width": width, "height": height},
     }
 
-    response = requests.post(url, headers=headers, json=payload)
-    response_data = (
-        response.json()
-    )  # Convert to JSON (requests doesn't give back JSON data directly)
+    response = await http_client.request(
+        "POST", url, headers=headers, json=payload, limit="heygen:generate"
+    )
+    try:
+        response_data = response.json()
+    except ValueError:
+        response_data = {"error": response.text[:500]}
+
+    video_id = (response_data.get("data") or {}).get("video_id")
+    if not video_id:
+        raise JobFailed(
+            f"Video generation failed: HTTP {response.status_code} "
+            f"Error {response_data.get('error')}"
+        )
+
+    progress.publish(session, "generate_a_roll", "queued", job_id=video_id)
+    status_url = f"{settings.heygen_base_url}/v1/video_status.get?video_id={video_id}"
+    last_status = None
+
+    async def check_status() -> JobStatus:
+        nonlocal last_status
+        status_response = await http_client.request(
+            "GET", status_url, headers=headers, limit="heygen:status"
+        )
+        status_data = status_response.json().get("data", {})
+        status = status_data.get("status")
+        if status != last_status:
+            last_status = status
+            progress.publish(session, "generate_a_roll", "status", status=status)
 
-    video_id = response_data.get("data", {}).get("video_id")
+        if status == "completed":
+            return JobStatus(done=True, result=status_data)
+        if status == "failed":
+            # Handle the failure case with error info
+            error = status_data.get("error", {})
+            return JobStatus(done=True, error=f"Video generation failed: Error {error}")
+        return JobStatus(done=False)
+
+    # Wait for the shared poller (or a webhook) to report completion
+    poll_interval = {}
+    if settings.heygen_webhook_enabled:
+        poll_interval = {
+            "initial_interval": WEBHOOK_POLL_INTERVAL,
+            "max_interval": WEBHOOK_POLL_INTERVAL,
+        }
+
+    status_data = await get_poller().track(
+        f"heygen:{video_id}", check_status, timeout=A_ROLL_TIMEOUT, **poll_interval
+    )
+    if not status_data.get("video_url"):
+        raise JobFailed("Error: No video URL in completed response")
+    return status_data
 
-    status_url = f"https://api.heygen.com/v1/video_status.get?video_id={video_id}"
 
-    # Step 3: Save video
-    max_attempts = 60
+async def generate_a_roll(prompt: str, tool_context: ToolContext) -> str:
+    """
+    Generates A-roll footage using HeyGen's avatar API.
 
-    for _ in range(max_attempts):
-        status_response = requests.get(status_url, headers=headers)
-        status_data = status_response.json()
-        print(f"STATUS DATA {status_data}")
-        status = status_data.get("data", {}).get("status")
+    Args:
+        prompt (str): A-roll footage portion of the AV script generated by
+            'script_agent'
+        tool_context: Tool context to access avatar ID, voice ID, video width, and
+            video height stored in state
+    Returns:
+        str: Status message (success/failure of API call) with video URL
+    """
 
-        if status == "completed":
-            video_url = status_data.get("data", {}).get("video_url")
-            caption_url = status_data.get("data", {}).get("caption_url")
-            if video_url:
-                video = requests.get(video_url)
-                if video.status_code == 200:
-                    video_artifact = types.Part(
-                        inline_data=types.Blob(
-                            mime_type="video/mp4", data=video.content
-                        )
-                    )
-                await tool_context.save_artifact("a_roll.mp4", video_artifact)
-                # Save captions if available
-                if caption_url:
-                    caption = requests.get(caption_url)
-                    if caption.status_code == 200:
-                        caption_artifact = types.Part(
-                            inline_data=types.Blob(
-                                mime_type="text/x-ass", data=caption.content
-                            )
-                        )
-                        await tool_context.save_artifact(
-                            "a_roll_captions.ass", caption_artifact
-                        )
-                        return f"Video and captions generated successfully. A-roll Video URL: {video_url}"
-                    return f"Video generated successfully. A-roll Video URL: {video_url}"
-                else:
-                    return f"Error downloading video {video.status_code}"
-            else:
-                return "Error: No video URL in completed response"
-        elif status == "failed":
-            # Handle the failure case with error info
-            error = status_data.get("data", {}).get("error", {})
-            return f"Video generation failed: Error {error}"
+    # Step 1: Get IDs and dimensions from state (assumed to be saved by root after pass
+    # from frontend). The A-roll is generated once at this size; post_process crops it
+    # for each entry in "output_profiles"
+    avatar_id = tool_context.state.get("avatar_id", "Annie_expressive12_public")
+    voice_id = tool_context.state.get("voice_id", "330290724a1b470fb63153f34d4c0183")
+    width = tool_context.state.get("width", 1280)
+    height = tool_context.state.get("height", 720)
 
-        # Wait 10 seconds before next check
-        await asyncio.sleep(10)
+    # Step 2: Reuse an identical earlier render, or generate the video
+    report = progress.reporter(tool_context, "generate_a_roll")
+    report("started")
+    inputs = {
+        "prompt": prompt,
+        "avatar_id": avatar_id,
+        "voice_id": voice_id,
+        "width": width,
+        "height": height,
+    }
+    try:
+        status_data, reused = await get_store().get_or_create(
+            "heygen",
+            inputs,
+            lambda: render_a_roll(
+                prompt,
+                avatar_id,
+                voice_id,
+                width,
+                height,
+                progress.session_key(tool_context),
+            ),
+        )
+    except JobFailed as e:
+        report("failed", error=str(e))
+        return str(e)
+    except JobTimeout:
+        report("failed", error="timeout")
+        return "Video generation timed out after 10 minutes"
+    report("completed", reused=reused)
 
-    return "Video generation timed out after 5 minutes"
+    # Step 3: Save video
+    video_url = status_data["video_url"]
+    caption_url = status_data.get("caption_url")
+    reused_note = " (reused from an identical earlier request)" if reused else ""
+
+    # Keep a reference to HeyGen's hosted file; post_process streams it to disk when
+    # needed
+    await save_reference(tool_context, "a_roll.mp4", video_url, "video/mp4")
+
+    # Save captions if available
+    if caption_url:
+        caption = await http_client.request("GET", caption_url, limit="download")
+        if caption.status_code == 200:
+            caption_artifact = types.Part(
+                inline_data=types.Blob(mime_type="text/x-ass", data=caption.content)
+            )
+            await tool_context.save_artifact("a_roll_captions.ass", caption_artifact)
+            return (
+                f"Video and captions generated successfully{reused_note}. "
+                f"A-roll Video URL: {video_url}"
+            )
+
+    return f"Video generated successfully{reused_note}. A-roll Video URL: {video_url}"
@@ -1,118 +1,206 @@
-import asyncio
-import os
+import base64
 
-import requests
-from dotenv import load_dotenv
 from google.adk.tools import ToolContext
-from google.auth import default
-from google.auth.transport.requests import Request
-from google.cloud import storage
-from google.genai import types
-
-load_dotenv()
-PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
+
+from . import http_client, progress
+from .credentials import get_provider
+from .job_poller import JobFailed, JobStatus, JobTimeout, get_poller
+from .media_io import save_reference
+from .media_store import get_store
+from .settings import get_settings
+
 MODEL_ID = "veo-2.0-generate-001"
-OUTPUT_STORAGE_URI = os.getenv("OUTPUT_STORAGE_URI")
+DURATION_SECONDS = 8
+
+B_ROLL_TIMEOUT = 300
 
 
 async def save_video(uri_link: str, tool_context: ToolContext) -> str:
-    try:
-        if not uri_link.startswith("gs://"):
-            return "Invalid GCS URI format"
-
-        # Remove gs:// prefix and split bucket/object
-        path = uri_link[5:]  # Remove 'gs://'
-        bucket_name, object_name = path.split("/", 1)
-
-        # Initialize GCS client
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(object_name)
-
-        # Download video data
-        video_data = blob.download_as_bytes()
-
-        # Create artifact part with video data
-        artifact_part = types.Part(
-            inline_data=types.Blob(
-                mime_type="video/mp4",  # Adjust based on actual video format
-                data=video_data,
-            )
-        )
+    if not uri_link.startswith("gs://"):
+        return "Invalid GCS URI format"
 
-        # Save as artifact
-        await tool_context.save_artifact("b_roll.mp4", artifact_part)
+    # Save a reference to the GCS object instead of downloading it into memory
+    await save_reference(tool_context, "b_roll.mp4", uri_link, "video/mp4")
 
-        return f"Video successfully downloaded and saved as artifact from {uri_link}"
+    return f"Video successfully saved as artifact from {uri_link}"
 
-    except Exception as e:
-        return f"Failed to download and save video: {str(e)}"
 
+async def load_image(tool_context: ToolContext) -> dict | None:
+    """
+    Builds Veo's image input from the reference saved by `save_image`.
 
-async def generate_b_roll(prompt: str, tool_context: ToolContext) -> str:
+    Images stored in GCS are passed by URI; otherwise the (already downscaled)
+    artifact bytes are sent inline.
     """
-    Generates B-roll footage using Google's Veo 2 API.
+
+    reference = tool_context.state.get("product_image")
+    if not reference:
+        return None
+    if reference.get("gcsUri"):
+        return {"gcsUri": reference["gcsUri"], "mimeType": reference["mimeType"]}
+
+    part = await tool_context.load_artifact(reference["artifact"])
+    if not part or not part.inline_data:
+        return None
+    return {
+        "bytesBase64Encoded": base64.b64encode(part.inline_data.data).decode("utf-8"),
+        "mimeType": reference["mimeType"],
+    }
+
+
+async def render_b_roll(
+    prompt: str, image: dict, session: progress.SessionKey | None = None
+) -> str:
+    """
+    Submits a Veo image-to-video job and waits for it to finish.
 
     Args:
-        prompt (str): B-roll footage portion of the AV script generated by 'script_agent'
-        tool_context: Tool context to access product image (base64 format) stored in state
+        prompt (str): B-roll prompt.
+        image (dict): Veo image input built by `load_image`.
+        session (SessionKey | None): Session to publish submission and status events to.
     Returns:
-        str: Status message (success/failure of API call) with video URL
+        str: GCS URI of the generated video.
+    Raises:
+        JobFailed: If submission or generation fails.
+        JobTimeout: If the video is not ready within B_ROLL_TIMEOUT.
     """
 
-    image = tool_context.state.get("base64_image")
-    if not image:
-        return "No base64 image found in state."
-
-    creds, _ = default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
-    creds.refresh(Request())
-    access_token = creds.token
+    settings = get_settings()
+    credentials = get_provider()
 
-    endpoint = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/publishers/google/models/{MODEL_ID}:predictLongRunning"
+    model = (
+        f"projects/{settings.google_cloud_project}"
+        f"/locations/{settings.google_cloud_location}"
+        f"/publishers/google/models/{MODEL_ID}"
+    )
+    endpoint = f"{settings.veo_base_url}/v1/{model}:predictLongRunning"
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+    async def headers() -> dict:
+        # Cached token, refreshed ahead of expiry, so long jobs never poll with a
+        # stale one
+        return {
+            "Authorization": f"Bearer {await credentials.token()}",
+            "Content-Type": "application/json",
+        }
 
     payload = {
         "instances": [{"prompt": prompt, "image": image}],
-        "parameters": {"durationSeconds": 8, "storageUri": OUTPUT_STORAGE_URI},
+        "parameters": {
+            "durationSeconds": DURATION_SECONDS,
+            "storageUri": settings.output_storage_uri,
+        },
     }
 
     # Call Veo
-    response = requests.post(endpoint, headers=headers, json=payload)
+    response = await http_client.request(
+        "POST", endpoint, headers=await headers(), json=payload, limit="veo:predict"
+    )
     if response.status_code != 200:
-        return f"Veo API call failed: {response.status_code}"
+        raise JobFailed(
+            f"Veo API call failed: {response.status_code} - {response.text[:500]}"
+        )
 
     response_data = response.json()
     operation = response_data["name"]
     OPERATION_ID = operation.split("/")[-1]
 
-    poll_url = f"https://{LOCATION}-aiplatform.googleapis.com/v1/projects/{PROJECT_ID}/locations/{LOCATION}/publishers/google/models/{MODEL_ID}:fetchPredictOperation"
+    poll_url = f"{settings.veo_base_url}/v1/{model}:fetchPredictOperation"
 
-    payload2 = {
-        "operationName": f"projects/{PROJECT_ID}/locations/{LOCATION}/publishers/google/models/{MODEL_ID}/operations/{OPERATION_ID}"
-    }
+    payload2 = {"operationName": f"{model}/operations/{OPERATION_ID}"}
+    progress.publish(session, "generate_b_roll", "queued", job_id=OPERATION_ID)
+    polls = 0
 
-    # Poll for 5 minutes
-    for _ in range(30):
-        poll = requests.post(poll_url, headers=headers, json=payload2)
+    async def check_operation() -> JobStatus:
+        nonlocal polls
+        poll = await http_client.request(
+            "POST", poll_url, headers=await headers(), json=payload2, limit="veo:poll"
+        )
         if poll.status_code != 200:
-            return f"Polling failed: {poll.status_code} - {poll.text}"
+            return JobStatus(
+                done=True, error=f"Polling failed: {poll.status_code} - {poll.text}"
+            )
 
         poll_data = poll.json()
-        print(f"POLL DATA {poll_data}")
-        if poll_data.get("done"):
-            uri_link = poll_data["response"]["videos"][0]["gcsUri"]
-            if uri_link:
-                # Save to artifacts
-                save_result = await save_video(uri_link, tool_context)
+        if not poll_data.get("done"):
+            # Veo reports no percentage, only whether the operation is done
+            polls += 1
+            progress.publish(
+                session, "generate_b_roll", "status", status="running", polls=polls
+            )
+            return JobStatus(done=False)
+        if "error" in poll_data:
+            return JobStatus(
+                done=True, error=f"Video generation failed: {poll_data['error']}"
+            )
+
+        videos = poll_data.get("response", {}).get("videos", [])
+        if not videos or not videos[0].get("gcsUri"):
+            return JobStatus(
+                done=True, error="Error: No video URI in completed response"
+            )
+        return JobStatus(done=True, result=videos[0]["gcsUri"])
+
+    # Wait for the shared poller to report completion
+    return await get_poller().track(
+        f"veo:{OPERATION_ID}", check_operation, timeout=B_ROLL_TIMEOUT
+    )
+
+
+def b_roll_inputs(prompt: str, tool_context: ToolContext) -> dict:
+    """Everything that determines the Veo output, used as the media store key."""
+
+    reference = tool_context.state.get("product_image") or {}
+    return {
+        "model": MODEL_ID,
+        # The agent may re-emit the approved script with different whitespace
+        "prompt": " ".join(prompt.split()),
+        "image": reference.get("sha256"),
+        "duration_seconds": DURATION_SECONDS,
+        "storage_uri": get_settings().output_storage_uri,
+    }
+
+
+async def generate_b_roll(prompt: str, tool_context: ToolContext) -> str:
+    """
+    Generates B-roll footage using Google's Veo 2 API.
 
-                # Return GCS URI - frontend will convert to public HTTP URL
-                return f"Video generated successfully. B-roll Video URL: {uri_link}"
+    Args:
+        prompt (str): B-roll footage portion of the AV script generated by
+            'script_agent'
+        tool_context: Tool context to access the product image saved by 'save_image'
+    Returns:
+        str: Status message (success/failure of API call) with video URL
+    """
 
-        await asyncio.sleep(10)
+    image = await load_image(tool_context)
+    if not image:
+        return "No product image found in state."
+
+    # A matching speculative job started during script review is joined below
+    from .speculation import claim  # speculation imports this module
+
+    claim(prompt, tool_context)
 
-    return "Video generation timed out after 5 minutes."
+    # Reuse an identical earlier render, or generate the video
+    report = progress.reporter(tool_context, "generate_b_roll")
+    report("started")
+    try:
+        uri_link, reused = await get_store().get_or_create(
+            "veo",
+            b_roll_inputs(prompt, tool_context),
+            lambda: render_b_roll(prompt, image, progress.session_key(tool_context)),
+        )
+    except JobFailed as e:
+        report("failed", error=str(e))
+        return str(e)
+    except JobTimeout:
+        report("failed", error="timeout")
+        return "Video generation timed out after 5 minutes."
+    report("completed", reused=reused)
+
+    # Save to artifacts
+    await save_video(uri_link, tool_context)
+
+    # Return GCS URI - frontend will convert to public HTTP URL
+    reused_note = " (reused from an identical earlier request)" if reused else ""
+    return f"Video generated successfully{reused_note}. B-roll Video URL: {uri_link}"
@@ -0,0 +1,144 @@
+import asyncio
+import contextlib
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import tracing
+from .rate_limiter import get_limiters
+
+# Shared keep-alive pool for every outbound API call made by the tools
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Retry policy for transient failures (network errors, rate limits, 5xx)
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Longest Retry-After honored before retrying
+RETRY_AFTER_MAX = 60.0
+
+_clients: dict[int, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled async HTTP client bound to the running event loop.
+
+    httpx connections cannot be shared across event loops, so one client is kept per
+    loop and recreated if a previous one was closed.
+
+    Returns:
+        httpx.AsyncClient: Shared client with keep-alive and connection pool limits.
+    """
+
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(id(loop))
+    if entry and entry[0] is loop and not entry[1].is_closed:
+        return entry[1]
+
+    client = httpx.AsyncClient(
+        timeout=TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=1),
+    )
+    _clients[id(loop)] = (loop, client)
+    return client
+
+
+async def close_clients() -> None:
+    """Closes the client bound to the running event loop (e.g. on server shutdown)."""
+
+    entry = _clients.pop(id(asyncio.get_running_loop()), None)
+    if entry:
+        await entry[1].aclose()
+
+
+def _backoff(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Parses a Retry-After header (seconds or HTTP date) into seconds to wait."""
+
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+async def request(
+    method: str,
+    url: str,
+    max_retries: int = MAX_RETRIES,
+    limit: str | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Sends a request through the shared client, retrying transient failures with backoff.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Request URL.
+        max_retries (int): Number of retries after the first attempt.
+        limit (str): Rate limiter key ("provider:endpoint"); every attempt passes the
+            endpoint's and the provider's limiter.
+        **kwargs: Passed through to httpx (json, headers, params, ...).
+    Returns:
+        httpx.Response: The last response received (may still be an error status).
+    """
+
+    client = get_client()
+    limiters = get_limiters(limit) if limit else []
+    # Query strings can carry API keys, so spans only record host and path
+    parts = urlsplit(url)
+    attempt = 0
+
+    while True:
+        delay = None
+        try:
+            with tracing.span(
+                f"{method} {parts.netloc}{parts.path}",
+                "http",
+                limit=limit or "",
+                attempt=attempt,
+            ) as span:
+                async with contextlib.AsyncExitStack() as stack:
+                    for limiter in limiters:
+                        await stack.enter_async_context(limiter)
+                    response = await client.request(method, url, **kwargs)
+                span.set(status=response.status_code, bytes=len(response.content))
+        except httpx.TransportError:
+            if attempt >= max_retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                return response
+            await response.aclose()
+
+            # Honor the provider's Retry-After, and hold back other callers too
+            delay = retry_after(response)
+            if delay is not None:
+                delay = min(delay, RETRY_AFTER_MAX)
+                for limiter in limiters:
+                    limiter.pause(delay)
+
+        await asyncio.sleep(delay if delay is not None else _backoff(attempt))
+        attempt += 1
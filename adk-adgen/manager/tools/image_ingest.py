@@ -0,0 +1,97 @@
+import io
+
+from . import http_client
+from .rate_limiter import get_limiter
+
+# Larger downloads are rejected before they are fully read
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+# Veo renders at 720p, so a longer side beyond 1280px is never used
+MAX_DIMENSION = 1280
+JPEG_QUALITY = 85
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the formats we accept
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+def sniff_mime_type(data: bytes) -> str | None:
+    """Detects the image format from its magic bytes."""
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime_type in SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    return None
+
+
+async def fetch_image(url: str, max_bytes: int = MAX_DOWNLOAD_BYTES) -> bytes:
+    """
+    Streams an image download, stopping as soon as it exceeds `max_bytes`.
+
+    Raises:
+        httpx.HTTPStatusError: If the server returns an error status.
+        ImageTooLarge: If the image is larger than `max_bytes`.
+    """
+
+    async with (
+        get_limiter("download"),
+        http_client.get_client().stream("GET", url) as response,
+    ):
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ImageTooLarge(f"Image is {declared} bytes (limit {max_bytes})")
+
+        data = bytearray()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            data.extend(chunk)
+            if len(data) > max_bytes:
+                raise ImageTooLarge(f"Image exceeds {max_bytes} bytes")
+    return bytes(data)
+
+
+def process_image(data: bytes, max_dimension: int = MAX_DIMENSION) -> tuple[bytes, str]:
+    """
+    Downscales an image to fit `max_dimension` and re-encodes it compactly.
+
+    Opaque images become progressive JPEGs; images with transparency stay PNG so the
+    product cut-out is preserved.
+
+    Returns:
+        tuple[bytes, str]: The encoded image and its MIME type.
+    """
+
+    # Pillow is only needed by the ingest step, so it is imported on first use
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        output = io.BytesIO()
+        if has_alpha:
+            image.convert("RGBA").save(output, format="PNG", optimize=True)
+            return output.getvalue(), "image/png"
+
+        image.convert("RGB").save(
+            output,
+            format="JPEG",
+            quality=JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+        return output.getvalue(), "image/jpeg"
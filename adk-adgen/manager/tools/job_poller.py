@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+# Adaptive backoff: poll soon after submission, then slow down while the job runs
+INITIAL_INTERVAL = 2.0
+MAX_INTERVAL = 20.0
+BACKOFF_FACTOR = 1.5
+# Upper bound on status checks in flight at once across all tracked jobs
+MAX_CONCURRENT_CHECKS = 16
+# Consecutive failed status checks tolerated before a job is failed
+MAX_CHECK_ERRORS = 5
+
+
+class JobFailed(Exception):
+    """Raised when a provider reports that a tracked job failed."""
+
+
+class JobTimeout(Exception):
+    """Raised when a tracked job does not finish before its deadline."""
+
+
+@dataclass
+class JobStatus:
+    done: bool
+    result: Any = None
+    error: str | None = None
+
+
+@dataclass
+class _Job:
+    check: Callable[[], Awaitable[JobStatus]]
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    max_interval: float
+    next_check: float
+    errors: int = 0
+    in_flight: bool = False
+    # Span of the tool that tracked the job; checks run in the poller's own task
+    trace_parent: tracing.Span | None = None
+
+
+class JobPoller:
+    """
+    Multiplexes status polling for every outstanding provider job (HeyGen, Veo, ...).
+
+    Tools register a job with `track()` and await the returned future. A single
+    background task checks only the jobs that are due, backing each one off
+    independently. Webhook handlers can complete a job early with `resolve()`.
+    """
+
+    def __init__(self, max_concurrent_checks: int = MAX_CONCURRENT_CHECKS):
+        self._jobs: dict[str, _Job] = {}
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrent_checks)
+        self._task: asyncio.Task | None = None
+        self._checks: set[asyncio.Task] = set()
+
+    def track(
+        self,
+        job_id: str,
+        check: Callable[[], Awaitable[JobStatus]],
+        timeout: float,
+        initial_interval: float = INITIAL_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+    ) -> asyncio.Future:
+        """
+        Registers a job and returns a future resolved with its result.
+
+        Args:
+            job_id (str): Provider-unique job identifier (e.g. "heygen:<video_id>").
+            check (Callable): Coroutine function returning the job's current JobStatus.
+            timeout (float): Seconds before the future fails with JobTimeout.
+            initial_interval (float): Delay before the first status check.
+            max_interval (float): Ceiling for the backoff between checks.
+        Returns:
+            asyncio.Future: Resolves to JobStatus.result, or raises JobFailed or
+                JobTimeout.
+        """
+
+        existing = self._jobs.get(job_id)
+        if existing:
+            return existing.future
+
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._jobs[job_id] = _Job(
+            check=check,
+            future=future,
+            deadline=now + timeout,
+            interval=initial_interval,
+            max_interval=max_interval,
+            next_check=now + initial_interval,
+            trace_parent=tracing.current_span(),
+        )
+        future.add_done_callback(lambda _: self._jobs.pop(job_id, None))
+
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    def resolve(self, job_id: str, status: JobStatus) -> bool:
+        """
+        Completes a job from outside the poll loop (e.g. a provider webhook).
+
+        Returns:
+            bool: Whether a pending job with that ID was found.
+        """
+
+        job = self._jobs.get(job_id)
+        if not job or job.future.done():
+            return False
+        self._finish(job, status)
+        return True
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def _finish(self, job: _Job, status: JobStatus) -> None:
+        if job.future.done():
+            return
+        if status.error:
+            job.future.set_exception(JobFailed(status.error))
+        else:
+            job.future.set_result(status.result)
+
+    async def _check(self, job_id: str, job: _Job) -> None:
+        try:
+            async with self._semaphore:
+                with tracing.span(
+                    job_id, "poll", parent=job.trace_parent, interval=job.interval
+                ) as span:
+                    status = await job.check()
+                    span.set(done=status.done)
+        except Exception as e:
+            job.errors += 1
+            logger.warning("Status check for %s failed: %s", job_id, e)
+            status = JobStatus(done=False)
+            if job.errors >= MAX_CHECK_ERRORS:
+                status = JobStatus(done=True, error=f"Polling failed: {e}")
+        else:
+            job.errors = 0
+
+        if status.done:
+            self._finish(job, status)
+        else:
+            job.interval = min(job.interval * BACKOFF_FACTOR, job.max_interval)
+            job.next_check = time.monotonic() + job.interval
+
+        job.in_flight = False
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self._jobs:
+            self._wakeup.clear()
+            now = time.monotonic()
+
+            for job_id, job in list(self._jobs.items()):
+                if job.future.done() or job.in_flight:
+                    continue
+                if now >= job.deadline:
+                    job.future.set_exception(JobTimeout(job_id))
+                elif now >= job.next_check:
+                    job.in_flight = True
+                    task = asyncio.create_task(self._check(job_id, job))
+                    self._checks.add(task)
+                    task.add_done_callback(self._checks.discard)
+
+            waiting = [j for j in self._jobs.values() if not j.in_flight]
+            delay = min(
+                (min(j.next_check, j.deadline) - now for j in waiting),
+                default=MAX_INTERVAL,
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+
+_pollers: dict[int, tuple[asyncio.AbstractEventLoop, JobPoller]] = {}
+
+
+def get_poller() -> JobPoller:
+    """Returns the process-wide poller for the running event loop."""
+
+    loop = asyncio.get_running_loop()
+    entry = _pollers.get(id(loop))
+    if entry and entry[0] is loop:
+        return entry[1]
+
+    poller = JobPoller()
+    _pollers[id(loop)] = (loop, poller)
+    return poller
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from pathlib import Path
+
+from google.genai import types
+
+from . import gcs, http_client
+from .rate_limiter import get_limiter
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def reference_part(uri: str, mime_type: str) -> types.Part:
+    """
+    Builds an artifact that points at remote media (gs:// or https://) instead of
+    carrying the bytes inline.
+    """
+
+    return types.Part(file_data=types.FileData(file_uri=uri, mime_type=mime_type))
+
+
+async def save_reference(tool_context, filename: str, uri: str, mime_type: str) -> int:
+    """
+    Saves a reference artifact, in whatever form the artifact service can store.
+
+    The in-memory service keeps `file_data` parts as they are; the file and GCS
+    services only persist bytes or text, so the reference is stored as JSON text there.
+
+    Returns:
+        int: The artifact version.
+    """
+
+    try:
+        return await tool_context.save_artifact(
+            filename, reference_part(uri, mime_type)
+        )
+    except ValueError:
+        text = json.dumps({"file_uri": uri, "mime_type": mime_type})
+        return await tool_context.save_artifact(filename, types.Part(text=text))
+
+
+def reference_uri(part: types.Part) -> str | None:
+    """Returns the remote URI an artifact points at, in either reference form."""
+
+    if part.file_data and part.file_data.file_uri:
+        return part.file_data.file_uri
+    if part.text and part.text.startswith("{"):
+        try:
+            return json.loads(part.text).get("file_uri")
+        except ValueError:
+            return None
+    return None
+
+
+async def download_to_file(url: str, path: Path) -> int:
+    """
+    Streams an HTTP(S) download to disk in fixed-size chunks.
+
+    Returns:
+        int: Number of bytes written.
+    """
+
+    written = 0
+    async with (
+        get_limiter("download"),
+        http_client.get_client().stream("GET", url) as response,
+    ):
+        response.raise_for_status()
+        with path.open("wb") as f:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+    return written
+
+
+async def materialize(part: types.Part, path: Path) -> bool:
+    """
+    Writes an artifact to a local file, whether it is inline or a remote reference.
+
+    Args:
+        part (types.Part): Artifact loaded from the artifact service.
+        path (Path): Destination file.
+    Returns:
+        bool: Whether any media data was written.
+    """
+
+    uri = reference_uri(part)
+    if uri:
+        if uri.startswith("gs://"):
+            return await gcs.download_file_async(uri, path) > 0
+        return await download_to_file(uri, path) > 0
+
+    if part.inline_data and part.inline_data.data:
+        await asyncio.to_thread(path.write_bytes, part.inline_data.data)
+        return True
+
+    return False
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from .cache import TTLCache, make_key
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Times a waiter restarts a generation that was cancelled under it before giving up
+TAKEOVER_ATTEMPTS = 3
+
+
+@dataclass
+class _Inflight:
+    task: asyncio.Task
+    # Callers awaiting the task; it is cancelled only when the last one leaves
+    waiters: int = 0
+
+
+class MediaStore:
+    """
+    Content-addressed store for generated media.
+
+    Results (video URLs, GCS URIs and related metadata) are keyed by a hash of the
+    generation inputs, so identical requests reuse earlier output instead of paying
+    the provider again. Concurrent requests for the same key share one generation,
+    which runs in a task owned by the store rather than by any one caller.
+    """
+
+    def __init__(self, cache: TTLCache, enabled: bool = True):
+        self.cache = cache
+        self.enabled = enabled
+        self.coalesced = 0
+        self._inflight: dict[str, _Inflight] = {}
+
+    async def get_or_create(
+        self,
+        namespace: str,
+        inputs: dict,
+        create: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, bool]:
+        """
+        Returns the stored result for `inputs`, generating it with `create` on a miss.
+
+        Failures raised by `create` propagate to every waiter and are not stored.
+        Cancelling a caller only cancels the generation when no other caller is
+        waiting for it; if the generation is cancelled from elsewhere, a waiter
+        restarts it instead of passing the cancellation on.
+
+        Args:
+            namespace (str): Provider/model the inputs belong to (e.g. "heygen").
+            inputs (dict): Every input that affects the generated media.
+            create (Callable): Coroutine function that generates the media.
+        Returns:
+            tuple[Any, bool]: The result and whether it was reused (stored or in
+                flight).
+        """
+
+        if not self.enabled:
+            return await create(), False
+
+        key = make_key(namespace, inputs)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            logger.info("Media store hit for %s %s", namespace, key[:12])
+            return cached, True
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(TAKEOVER_ATTEMPTS):
+            # Step 1: Join an identical generation that is already running
+            entry = self._inflight.get(key)
+            created = False
+            if entry and entry.task.get_loop() is not loop:
+                # Generations are not shared across event loops
+                return await self._create(key, create), False
+            if entry:
+                self.coalesced += 1
+            else:
+                # Step 2: Start the generation in a task owned by the store
+                entry = _Inflight(loop.create_task(self._create(key, create)))
+                entry.task.add_done_callback(lambda t, e=entry: self._settle(key, e))
+                self._inflight[key] = entry
+                created = True
+
+            entry.waiters += 1
+            try:
+                return await asyncio.shield(entry.task), not created
+            except asyncio.CancelledError:
+                # Cancelled by someone other than this caller: take over creation
+                if entry.task.cancelled() and attempt < TAKEOVER_ATTEMPTS - 1:
+                    logger.info("Restarting cancelled generation %s", key[:12])
+                    continue
+                raise
+            finally:
+                entry.waiters -= 1
+                if entry.waiters == 0 and not entry.task.done():
+                    # The last caller left, so nobody needs the result
+                    entry.task.cancel()
+                    self._settle(key, entry)
+
+    async def _create(self, key: str, create: Callable[[], Awaitable[Any]]) -> Any:
+        result = await create()
+        # The generation stays registered until stored, so late arrivals never
+        # miss both
+        await self.cache.aset(key, result)
+        return result
+
+    def _settle(self, key: str, entry: _Inflight) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+        task = entry.task
+        if task.done() and not task.cancelled():
+            # Waiters re-raise it; mark it retrieved when nobody is waiting
+            task.exception()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        # Coalesced requests missed the cache but still reused another's result
+        lookups = stats["hits"] + stats["misses"]
+        reused = stats["hits"] + self.coalesced
+        return {
+            **stats,
+            "coalesced": self.coalesced,
+            "hit_rate": reused / lookups if lookups else 0.0,
+        }
+
+
+_store: MediaStore | None = None
+
+
+def get_store() -> MediaStore:
+    """Returns the shared store used by the A-roll and B-roll tools."""
+
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = MediaStore(
+            TTLCache(
+                settings.media_cache_path,
+                ttl=settings.media_cache_ttl,
+                max_entries=settings.media_cache_max_entries,
+            ),
+            enabled=settings.media_cache_enabled,
+        )
+    return _store
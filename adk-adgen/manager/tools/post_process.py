@@ -1,82 +1,273 @@
-import json
-import os
+import asyncio
 import subprocess
 import tempfile
-import uuid
 from pathlib import Path
+from typing import Callable
 
-from dotenv import load_dotenv
 from google.adk.tools import ToolContext
-from google.cloud import storage
 from google.genai import types
 
-load_dotenv()
-OUTPUT_STORAGE_URI = os.getenv("OUTPUT_STORAGE_URI")
+from . import edl, ffmpeg, gcs, progress
+from .media_io import materialize, save_reference
+from .settings import get_settings
 
 
-async def upload_to_gcs(video_path: Path, tool_context: ToolContext) -> str | None:
+async def upload_to_gcs(
+    video_path: Path,
+    tool_context: ToolContext,
+    file_name: str = "processed_video.mp4",
+) -> str | None:
     try:
-        if not OUTPUT_STORAGE_URI:
+        output_storage_uri = get_settings().output_storage_uri
+        if not output_storage_uri:
             return None
 
         # Parse bucket name from OUTPUT_STORAGE_URI (e.g., "gs://bucket-name/")
-        bucket_name = OUTPUT_STORAGE_URI.replace("gs://", "").rstrip("/")
-
-        # Generate unique filename for processed video
-        unique_id = str(uuid.uuid4().int)[:15]  # Use first 15 digits of UUID
-        object_name = f"{unique_id}/processed_video.mp4"
+        bucket_name = output_storage_uri.replace("gs://", "").rstrip("/")
 
         # Check if file exists
         if not video_path.exists():
             return None
 
-        # Initialize GCS client and upload
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(object_name)
-
-        # Upload the video file
-        blob.upload_from_filename(str(video_path))
+        # Name the object after its content, so a retried or restarted upload of the
+        # same render resumes from its checkpoint
+        digest = await asyncio.to_thread(gcs.content_hash, video_path)
+        object_name = f"{digest[:16]}/{file_name}"
 
-        # Return GCS URI
-        gcs_uri = f"gs://{bucket_name}/{object_name}"
-        return gcs_uri
+        # Upload through the shared client, off the event loop, publishing bytes sent
+        report = progress.reporter(tool_context, "post_process")
+        return await gcs.upload_file_async(
+            video_path,
+            f"gs://{bucket_name}/{object_name}",
+            on_progress=lambda sent, total: report(
+                "uploading", file=file_name, bytes=sent, total_bytes=total
+            ),
+        )
 
     except Exception as e:
         return None
 
 
 # Dynamic A-roll and B-roll alternation based on A-roll duration
-def get_video_duration(video_path: Path) -> float:
-    cmd = [
-        "ffprobe",
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_format",
-        str(video_path),
-    ]
+async def get_video_duration(video_path: Path) -> float:
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        return float(data["format"]["duration"])
-    except (
-        subprocess.CalledProcessError,
-        KeyError,
-        ValueError,
-        json.JSONDecodeError,
-    ) as e:
+        return ffmpeg.duration(await ffmpeg.probe(video_path))
+    except (subprocess.CalledProcessError, KeyError, ValueError) as e:
         raise Exception(f"Failed to get video duration: {e}")
 
 
-# 50/50 split of A-roll and B-roll, with A-roll audio continuous
+async def render_reencode(
+    a_path: Path,
+    b_path: Path,
+    cuts: list[edl.Cut],
+    size: tuple[int, int],
+    layouts: list[edl.Layout],
+    profile: ffmpeg.EncodingProfile,
+    out_paths: list[Path],
+    on_progress: Callable[[float], None],
+) -> None:
+    """
+    Renders the EDL with one ffmpeg invocation: each input is decoded once and every
+    layout in `layouts` is written to the matching path in `out_paths`.
+    """
+
+    filter_str, labels = edl.compile_filter(cuts, size, layouts)
+
+    output_args = []
+    for label, out_path in zip(labels, out_paths):
+        output_args += [
+            "-map",
+            label,
+            "-map",
+            "0:a",  # A-roll audio
+            *profile.video_args(),
+            *profile.audio_args(),
+            "-movflags",
+            "+faststart",
+            str(out_path),
+        ]
+
+    await ffmpeg.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(a_path),  # input 0
+            "-i",
+            str(b_path),  # input 1
+            "-filter_complex",
+            filter_str,
+            *output_args,
+        ],
+        total_duration=sum(cut.duration for cut in cuts),
+        on_progress=on_progress,
+    )
+
+
+class StreamMismatch(Exception):
+    """Raised when copied and encoded segments differ in stream parameters."""
+
+
+def can_stream_copy(a_info: dict, cuts: list[edl.Cut]) -> bool:
+    # A-roll segments can be copied only if each one starts on a keyframe, needs no
+    # filtering, and libx264 can encode B-roll segments with the same parameters
+    stream = ffmpeg.video_stream(a_info)
+    if stream.get("codec_name") != "h264" or stream.get("pix_fmt") != "yuv420p":
+        return False
+    if stream.get("profile") not in ffmpeg.X264_PROFILES:
+        return False
+    # ffprobe reports H.264 levels times ten (31 is level 3.1)
+    if not isinstance(stream.get("level"), int) or stream["level"] < 10:
+        return False
+    if any(cut.transition != "cut" or cut.hold for cut in cuts):
+        return False
+    return all(
+        ffmpeg.is_keyframe_aligned(a_info, cut.start)
+        for cut in cuts
+        if cut.source == "a"
+    )
+
+
+async def render_stream_copy(
+    a_path: Path,
+    b_path: Path,
+    a_info: dict,
+    cuts: list[edl.Cut],
+    profile: ffmpeg.EncodingProfile,
+    out_path: Path,
+    on_progress: Callable[[float], None],
+) -> None:
+    """
+    Copies keyframe-aligned A-roll segments without re-encoding, encodes only the
+    B-roll segments to match the A-roll stream, then joins them with the concat demuxer.
+
+    Raises:
+        StreamMismatch: If the segments do not share codec, profile, level, pixel
+            format, frame size, frame rate and time base (the caller re-encodes).
+    """
+
+    stream = ffmpeg.video_stream(a_info)
+    width, height = stream["width"], stream["height"]
+    frame_rate = stream.get("r_frame_rate", "30/1")
+    work_dir = out_path.parent
+
+    commands = []
+    segment_paths = []
+    for i, cut in enumerate(cuts):
+        # MPEG-TS keeps parameter sets in-band, so copied and encoded
+        # segments concat cleanly
+        segment_path = work_dir / f"segment_{i}.ts"
+        segment_paths.append(segment_path)
+        if cut.source == "a":
+            codec_args = ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        else:
+            codec_args = [
+                "-vf",
+                f"{edl.cover_filter(width, height)},fps={frame_rate}",
+                *profile.matching_video_args(stream),
+            ]
+        commands.append(
+            [
+                "ffmpeg",
+                "-y",
+                "-ss",
+                str(cut.start),
+                "-i",
+                str(a_path if cut.source == "a" else b_path),
+                "-t",
+                str(cut.end - cut.start),
+                "-map",
+                "0:v:0",
+                *codec_args,
+                str(segment_path),
+            ]
+        )
+
+    # Segments run in parallel within the shared ffmpeg concurrency limit
+    completed = 0
+
+    async def run_segment(cmd: list[str]) -> None:
+        nonlocal completed
+        await ffmpeg.run(cmd)
+        completed += 1
+        on_progress(completed / (len(commands) + 1))
+
+    await asyncio.gather(*(run_segment(cmd) for cmd in commands))
+
+    # A mismatch still concatenates with exit status 0 but plays badly, so check
+    signatures = {
+        ffmpeg.stream_signature(info)
+        for info in await ffmpeg.probe_many(*segment_paths)
+    }
+    if len(signatures) > 1:
+        raise StreamMismatch(f"Segment streams differ: {sorted(signatures, key=str)}")
+
+    concat_list = work_dir / "segments.txt"
+    concat_list.write_text("".join(f"file '{p}'\n" for p in segment_paths))
+
+    await ffmpeg.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(concat_list),
+            "-i",
+            str(a_path),
+            "-map",
+            "0:v",
+            "-map",
+            "1:a",  # A-roll audio
+            "-c:v",
+            "copy",
+            *profile.audio_args(),
+            "-shortest",
+            "-movflags",
+            "+faststart",
+            str(out_path),
+        ]
+    )
+    on_progress(1.0)
+
+
+def progress_reporter(tool_context: ToolContext, stage: str) -> Callable[[float], None]:
+    """
+    Returns a callback that records whole-percent progress in state and publishes it
+    to the session's progress stream.
+    """
+
+    publish = progress.reporter(tool_context, "post_process")
+    last_percent = -1
+
+    def report(fraction: float) -> None:
+        nonlocal last_percent
+        percent = int(fraction * 100)
+        if percent != last_percent:
+            last_percent = percent
+            tool_context.state["post_process_progress"] = {
+                "stage": stage,
+                "percent": percent,
+            }
+            publish(stage, percent=percent)
+
+    return report
+
+
+# A-roll and B-roll alternation driven by an edit decision list, with A-roll audio
+# continuous
 async def post_process(tool_context: ToolContext) -> str:
     """
-    Combines A-roll and B-roll videos with dynamic alternation while maintaining continuous A-roll audio.
+    Combines A-roll and B-roll videos with dynamic alternation while maintaining
+    continuous A-roll audio.
 
     Args:
-        tool_context (ToolContext): Tool context to access A-roll and B-roll video artifacts.
+        tool_context (ToolContext): Tool context to access A-roll and B-roll video
+            artifacts, the edit decision list ("edl" or "edl_template") and optional
+            encoding settings ("encode_profile", "encode_preset", "encode_crf",
+            "encode_threads", "stream_copy") stored in state.
 
     Returns:
         str: Status message with processing details and final video URL if successful.
@@ -89,83 +280,106 @@ async def post_process(tool_context: ToolContext) -> str:
     if not b_roll:
         return "Missing B-roll"
 
+    profile = ffmpeg.profile_from_state(tool_context.state)
+
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
         a_path = temp_path / "a_roll.mp4"
         b_path = temp_path / "b_roll.mp4"
         out_path = temp_path / "processed_video.mp4"
 
-        if a_roll.inline_data and a_roll.inline_data.data:
-            a_path.write_bytes(a_roll.inline_data.data)
-        else:
-            return "A-roll data is missing"
+        try:
+            # Stream inputs to disk so ffmpeg reads files instead of in-memory copies
+            if not await materialize(a_roll, a_path):
+                return "A-roll data is missing"
 
-        if b_roll.inline_data and b_roll.inline_data.data:
-            b_path.write_bytes(b_roll.inline_data.data)
-        else:
-            return "B-roll data is missing"
+            if not await materialize(b_roll, b_path):
+                return "B-roll data is missing"
 
-        try:
-            # Get video durations
-            a_duration = get_video_duration(a_path)
-            b_duration = get_video_duration(b_path)
-
-            # Calculate alternating segments
-            speech_segment_1_end = a_duration / 4
-            gap_1_end = a_duration / 2
-            speech_segment_2_start = a_duration / 2
-            speech_segment_2_end = 3 * a_duration / 4
-
-            # Use B-roll duration for gap segments
-            b_segment_duration = min(b_duration, gap_1_end - speech_segment_1_end)
-
-            # Build filter string with proper audio sync
-            filter_str = (
-                f"[0:v]trim=0:{speech_segment_1_end},setpts=PTS-STARTPTS[a1];"
-                f"[1:v]trim=0:{gap_1_end - speech_segment_1_end},setpts=PTS-STARTPTS[b1];"
-                f"[0:v]trim={speech_segment_2_start}:{speech_segment_2_end},setpts=PTS-STARTPTS[a2];"
-                f"[1:v]trim=0:{a_duration - speech_segment_2_end},setpts=PTS-STARTPTS[b2];"
-                "[a1][b1][a2][b2]concat=n=4:v=1:a=0[outv]"
-            )
+            # Probe both inputs in one concurrent pass
+            a_info, b_info = await ffmpeg.probe_many(a_path, b_path)
+            a_duration = ffmpeg.duration(a_info)
+            b_duration = ffmpeg.duration(b_info)
+            a_stream = ffmpeg.video_stream(a_info)
+            size = (a_stream.get("width", 1280), a_stream.get("height", 720))
 
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(a_path),  # input 0
-                "-i",
-                str(b_path),  # input 1
-                "-filter_complex",
-                filter_str,
-                "-map",
-                "[outv]",
-                "-map",
-                "0:a",  # A-roll audio
-                "-c:v",
-                "libx264",
-                "-c:a",
-                "aac",
-                str(out_path),
+            # Resolve the edit decision list against the real durations
+            decisions = edl.from_state(tool_context.state)
+            cuts = edl.resolve(decisions, a_duration, b_duration)
+            layouts = decisions.layouts
+
+            # One output file per layout (the native A-roll frame when none are set)
+            names = [layout.name for layout in layouts] or [None]
+            out_paths = [
+                out_path if i == 0 else temp_path / f"processed_video_{name}.mp4"
+                for i, name in enumerate(names)
             ]
 
-            subprocess.run(ffmpeg_cmd, capture_output=True, text=True, check=True)
+            rendered = False
+            if (
+                tool_context.state.get("stream_copy", True)
+                and not layouts
+                and can_stream_copy(a_info, cuts)
+            ):
+                try:
+                    await render_stream_copy(
+                        a_path,
+                        b_path,
+                        a_info,
+                        cuts,
+                        profile,
+                        out_path,
+                        progress_reporter(tool_context, "encoding"),
+                    )
+                    rendered = True
+                except (subprocess.CalledProcessError, StreamMismatch):
+                    # Fall back to a full re-encode
+                    pass
+
+            if not rendered:
+                await render_reencode(
+                    a_path,
+                    b_path,
+                    cuts,
+                    size,
+                    layouts,
+                    profile,
+                    out_paths,
+                    progress_reporter(tool_context, "encoding"),
+                )
 
-            # Save as artifact
-            await tool_context.save_artifact(
-                "processed_video.mp4",
-                types.Part(
-                    inline_data=types.Blob(
-                        mime_type="video/mp4", data=out_path.read_bytes()
+            # Upload all outputs to GCS concurrently for public access, then save each
+            # as an artifact (a GCS reference when uploaded, inline bytes otherwise)
+            progress_reporter(tool_context, "uploading")(0.0)
+            uploads = await asyncio.gather(
+                *(upload_to_gcs(path, tool_context, path.name) for path in out_paths)
+            )
+
+            gcs_uris = []
+            for name, path, gcs_uri in zip(names, out_paths, uploads):
+                if gcs_uri:
+                    await save_reference(tool_context, path.name, gcs_uri, "video/mp4")
+                else:
+                    processed_artifact = types.Part(
+                        inline_data=types.Blob(
+                            mime_type="video/mp4", data=path.read_bytes()
+                        )
                     )
-                ),
+                    await tool_context.save_artifact(path.name, processed_artifact)
+                gcs_uris.append((name, gcs_uri))
+
+            summary = (
+                f"Video processed: A-roll ({a_duration:.1f}s) and B-roll "
+                f"({b_duration:.1f}s) alternated dynamically."
             )
+            primary_uri = gcs_uris[0][1]
+            if not primary_uri:
+                return f"{summary} (GCS upload failed)"
 
-            # Upload to GCS for public access
-            gcs_uri = await upload_to_gcs(out_path, tool_context)
-            if gcs_uri:
-                return f"Video processed: A-roll ({a_duration:.1f}s) and B-roll ({b_duration:.1f}s) alternated dynamically. Final Video URL: {gcs_uri}"
-            else:
-                return f"Video processed: A-roll ({a_duration:.1f}s) and B-roll ({b_duration:.1f}s) alternated dynamically. (GCS upload failed)"
+            message = f"{summary} Final Video URL: {primary_uri}"
+            for name, gcs_uri in gcs_uris[1:]:
+                message += f"\n{name} Video URL: {gcs_uri or '(GCS upload failed)'}"
+            return message
 
         except subprocess.CalledProcessError as e:
             return f"FFmpeg failed:\n{e.stderr}"
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable
+
+# Recent events per session, replayed to subscribers that connect late
+HISTORY_SIZE = 50
+# Sessions whose history is kept in memory
+MAX_SESSIONS = 1000
+
+# A session is identified by (app_name, user_id, session_id), as in ADK's routes
+SessionKey = tuple[str, str, str]
+
+_history: OrderedDict[SessionKey, deque] = OrderedDict()
+# Per-session subscriber queues, each with the event loop that reads it
+_subscribers: dict[
+    SessionKey, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]
+] = {}
+_lock = threading.Lock()
+
+
+def publish(session: SessionKey | None, source: str, stage: str, **details) -> dict:
+    """
+    Publishes a progress event to the session's subscribers.
+
+    Safe to call from worker threads (GCS transfers run in one).
+
+    Args:
+        session (SessionKey | None): Session of the event; nothing is sent without one.
+        source (str): Tool or component reporting, e.g. "generate_a_roll".
+        stage (str): What happened, e.g. "queued", "status", "encoding", "uploading".
+        **details: Event fields such as "status", "percent", "bytes" or "total_bytes".
+    Returns:
+        dict: The event.
+    """
+
+    event = {"source": source, "stage": stage, **details, "time": round(time.time(), 3)}
+    if not session:
+        return event
+
+    with _lock:
+        history = _history.get(session)
+        if history is None:
+            history = _history[session] = deque(maxlen=HISTORY_SIZE)
+            while len(_history) > MAX_SESSIONS:
+                _history.popitem(last=False)
+        _history.move_to_end(session)
+        history.append(event)
+        subscribers = list(_subscribers.get(session, ()))
+
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            # The subscriber's loop has closed
+            pass
+    return event
+
+
+def session_key(context) -> SessionKey | None:
+    """Session key of a tool or callback context (None for stand-in contexts)."""
+
+    session = getattr(context, "session", None)
+    if getattr(session, "id", None) is None:
+        return None
+    return (session.app_name, session.user_id, session.id)
+
+
+def reporter(context, source: str) -> Callable[..., None]:
+    """
+    Returns `publish` bound to the session of a tool or callback context.
+
+    Contexts without a session (benchmarks, batch stubs) get a reporter that only
+    builds events.
+    """
+
+    session = session_key(context)
+
+    def report(stage: str, **details) -> None:
+        publish(session, source, stage, **details)
+
+    return report
+
+
+async def subscribe(
+    session: SessionKey, idle_timeout: float | None = None
+) -> AsyncIterator[dict | None]:
+    """
+    Yields a session's recent progress events, then new ones as they are published.
+
+    Args:
+        session (SessionKey): Session to follow.
+        idle_timeout (float | None): Yield None after this many seconds without an
+            event, so callers can send keepalives.
+    """
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    with _lock:
+        backlog = list(_history.get(session, ()))
+        _subscribers.setdefault(session, []).append((loop, queue))
+
+    try:
+        for event in backlog:
+            yield event
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), idle_timeout)
+            except asyncio.TimeoutError:
+                yield None
+    finally:
+        with _lock:
+            subscribers = _subscribers.get(session, [])
+            if (loop, queue) in subscribers:
+                subscribers.remove((loop, queue))
+            if not subscribers:
+                _subscribers.pop(session, None)
@@ -0,0 +1,230 @@
+import asyncio
+import time
+import weakref
+
+from .settings import get_settings
+from .tracing import add_callback
+
+# Defaults per provider or "provider:endpoint": (requests per second, burst, in flight)
+DEFAULT_LIMITS = {
+    "tavily": (5.0, 10, 8),
+    "tavily:extract": (2.0, 5, 4),
+    "heygen": (2.0, 5, 4),
+    "heygen:generate": (0.5, 2, 3),
+    "veo": (1.0, 5, 4),
+    "veo:predict": (0.1, 2, 2),
+    "gemini": (5.0, 10, 16),
+}
+FALLBACK_LIMIT = (10.0, 20, 32)
+
+
+class RateLimiter:
+    """
+    Token bucket plus concurrency cap for one provider or endpoint.
+
+    `rate` tokens per second refill a bucket of `burst` tokens; each acquisition takes
+    one token and one of `concurrency` slots, which is returned on release; `throttle`
+    only takes a token. A provider's Retry-After can pause the bucket for everyone
+    through `pause`.
+    """
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+
+        # Metrics exposed through stats()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.pauses = 0
+
+    async def acquire(self) -> None:
+        started = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self._record_wait(time.monotonic() - started)
+
+    async def throttle(self) -> None:
+        """Waits for a token without taking a concurrency slot."""
+
+        started = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._take_token()
+        finally:
+            self.waiting -= 1
+
+        self._record_wait(time.monotonic() - started)
+
+    def _record_wait(self, waited: float) -> None:
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    async def _take_token(self) -> None:
+        # One waiter at a time, so tokens are handed out in arrival order
+        async with self._lock:
+            await self._wait_for_token()
+
+    async def _wait_for_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every new request for `seconds` (e.g. from a Retry-After)."""
+
+        self.pauses += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        # Start refilling from empty once the pause is over
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+            "pauses": self.pauses,
+        }
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+def _env_suffix(name: str) -> str:
+    return name.upper().replace("-", "_").replace(":", "_")
+
+
+def limits_for(name: str) -> tuple[float, int, int]:
+    """
+    Reads the limits for a provider ("heygen") or endpoint ("heygen:generate").
+
+    RATE_LIMIT_<NAME> is requests per second, RATE_BURST_<NAME> the bucket size and
+    CONCURRENCY_<NAME> the number of requests in flight (e.g. RATE_LIMIT_VEO_PREDICT).
+    Endpoints without their own settings use their provider's, then DEFAULT_LIMITS.
+    """
+
+    provider = name.split(":")[0]
+    rate, burst, concurrency = DEFAULT_LIMITS.get(
+        name, DEFAULT_LIMITS.get(provider, FALLBACK_LIMIT)
+    )
+
+    overrides = get_settings().rate_limits
+
+    def setting(prefix: str, default):
+        for key in (name, provider):
+            value = overrides.get(f"{prefix}_{_env_suffix(key)}")
+            if value:
+                return value
+        return default
+
+    return (
+        float(setting("RATE_LIMIT", rate)),
+        int(setting("RATE_BURST", burst)),
+        int(setting("CONCURRENCY", concurrency)),
+    )
+
+
+# Dropped together with their event loop, so closed loops do not accumulate
+_limiters: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, RateLimiter]
+] = weakref.WeakKeyDictionary()
+
+
+def _loop_limiters() -> dict[str, RateLimiter]:
+    # A semaphore that ever had a waiter references its loop, which keeps the weak
+    # key alive, so closed loops are dropped here as well
+    for loop in [loop for loop in _limiters if loop.is_closed()]:
+        del _limiters[loop]
+    return _limiters.setdefault(asyncio.get_running_loop(), {})
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """Returns the shared limiter for a provider or endpoint on the running loop."""
+
+    limiters = _loop_limiters()
+    if name not in limiters:
+        limiters[name] = RateLimiter(*limits_for(name))
+    return limiters[name]
+
+
+def get_limiters(name: str) -> list[RateLimiter]:
+    """
+    Returns the limiters a request to an endpoint must pass, narrowest first.
+
+    An endpoint ("heygen:generate") has its own limiter and also shares its provider's
+    ("heygen"), so the provider's quota holds across all of its endpoints.
+    """
+
+    provider = name.split(":")[0]
+    names = [name] if name == provider else [name, provider]
+    return [get_limiter(key) for key in names]
+
+
+async def _throttle_model(callback_context, llm_request) -> None:
+    await get_limiter("gemini").throttle()
+
+
+def limit_model_calls(agent) -> None:
+    """
+    Makes every LLM request in an agent tree take a "gemini" token first.
+
+    Model quotas are per request, so only the rate is limited: ADK has no callback
+    when a model call is cancelled, so a held slot could never be returned.
+    """
+
+    from google.adk.agents import LlmAgent
+
+    if isinstance(agent, LlmAgent):
+        add_callback(agent, "before_model_callback", _throttle_model)
+    for sub_agent in agent.sub_agents:
+        limit_model_calls(sub_agent)
+
+
+def stats() -> dict:
+    """Queue depth, wait times and Retry-After pauses per limiter on this loop."""
+
+    return {name: limiter.stats() for name, limiter in _loop_limiters().items()}
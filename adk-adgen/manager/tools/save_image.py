@@ -1,37 +1,72 @@
-import base64
+import asyncio
+import hashlib
 
-import requests
+import httpx
 from google.adk.tools import ToolContext
+from google.genai import types
 
+from . import gcs
+from .image_ingest import ImageTooLarge, fetch_image, process_image, sniff_mime_type
+from .media_io import save_reference
+from .settings import get_settings
 
-def save_image(url: str, tool_context: ToolContext) -> str:
+IMAGE_ARTIFACT = "product_image"
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png"}
+
+
+async def save_image(url: str, tool_context: ToolContext) -> str:
     """
-    Saves an image from a given URL and converts it to base64 format, saving the base64 result to state.
+    Downloads a product image, downscales and re-encodes it, and saves it as an
+    artifact. Only a small reference to the image is kept in state.
 
     Args:
         url (str): The image URL.
-        tool_context: Tool context to save the base64 image to state.
+        tool_context: Tool context to save the image artifact and its reference to
+            state.
     Returns:
        str: Status message
     """
 
-    response = requests.get(url)
-    if response.status_code != 200:
-        return f"Failed to fetch image. Status code: {response.status_code}"
+    # Step 1: Stream the download with a size cap
+    try:
+        data = await fetch_image(url)
+    except httpx.HTTPStatusError as e:
+        return f"Failed to fetch image. Status code: {e.response.status_code}"
+    except (httpx.HTTPError, ImageTooLarge) as e:
+        return f"Failed to fetch image: {e}"
+
+    # Step 2: Detect the real format rather than trusting the URL
+    if not sniff_mime_type(data):
+        return "Failed to fetch image: unsupported or unrecognized image format."
 
-    # Convert to base64
-    base64_bytes = base64.b64encode(response.content).decode("utf-8")
+    # Step 3: Downscale to Veo's resolution and re-encode (CPU-bound, off the loop)
+    try:
+        image_bytes, mime_type = await asyncio.to_thread(process_image, data)
+    except Exception as e:
+        return f"Failed to process image: {e}"
 
-    # Infer MIME type from URL (default to JPEG)
-    if ".png" in url.lower():
-        mime_type = "image/png"
+    # Step 4: Store the bytes once, in GCS when configured so Veo can read them directly
+    extension = EXTENSIONS[mime_type]
+    file_name = f"{IMAGE_ARTIFACT}.{extension}"
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    reference = {"artifact": file_name, "mimeType": mime_type, "sha256": digest}
+    output_storage_uri = get_settings().output_storage_uri
+    if output_storage_uri:
+        uri = f"{output_storage_uri.rstrip('/')}/images/{digest[:16]}.{extension}"
+        try:
+            await gcs.upload_bytes_async(image_bytes, uri, mime_type)
+        except Exception as e:
+            return f"Failed to upload image: {e}"
+        await save_reference(tool_context, file_name, uri, mime_type)
+        reference["gcsUri"] = uri
     else:
-        mime_type = "image/jpeg"
+        part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+        await tool_context.save_artifact(file_name, part)
 
-    # Store result in tool state
-    tool_context.state["base64_image"] = {
-        "bytesBase64Encoded": base64_bytes,
-        "mimeType": mime_type,
-    }
+    # Step 5: Keep only the reference in state
+    tool_context.state["product_image"] = reference
 
-    return "Image successfully downloaded, encoded, and saved as base64."
+    return (
+        f"Image successfully downloaded and saved as artifact '{file_name}' "
+        f"({len(data)} -> {len(image_bytes)} bytes)."
+    )
@@ -1,13 +1,8 @@
-import os
+from . import tavily
+from .content import trim_search
 
-import requests
-from dotenv import load_dotenv
 
-load_dotenv()
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-
-
-def search_audience(query: str) -> dict:
+async def search_audience(query: str) -> dict:
     """
     Searches for target demographics using Tavily's search API.
 
@@ -15,11 +10,9 @@ def search_audience(query: str) -> dict:
         query: The search query to find target demographics.
 
     Returns:
-        dict: A dictionary containing the search results.
+        dict: The search answer and results, trimmed to their relevant content.
     """
 
-    url = "https://api.tavily.com/search"
-
     payload = {
         "query": query,
         "topic": "general",
@@ -36,11 +29,6 @@ def search_audience(query: str) -> dict:
         "exclude_domains": [],
         "country": None,
     }
-    headers = {
-        "Authorization": f"Bearer {TAVILY_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    response = requests.request("POST", url, json=payload, headers=headers)
 
-    return response.json()
+    # Cache the full response, but hand the model only the relevant parts
+    return trim_search(await tavily.post(tavily.SEARCH_URL, payload), query)
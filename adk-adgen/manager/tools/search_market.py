@@ -1,13 +1,14 @@
+import asyncio
 from typing import Dict, List
-import requests
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+from . import tavily
+from .content import trim_search
 
+# Upper bound on simultaneous Tavily searches from a single tool call
+MAX_CONCURRENT_QUERIES = 4
 
-def search_market(queries: List[str]) -> Dict[str, dict]:
+
+async def search_market(queries: List[str]) -> Dict[str, dict]:
     """
     Searches for market size and trends using Tavily's search API.
 
@@ -15,19 +16,12 @@ def search_market(queries: List[str]) -> Dict[str, dict]:
         queries (List[str]): A list of 2 queries (market size and trends).
 
     Returns:
-        Dict[str, dict]: A mapping from each query to its search result.
+        Dict[str, dict]: A mapping from each query to its trimmed search result.
     """
 
-    url = "https://api.tavily.com/search"
-
-    headers = {
-        "Authorization": f"Bearer {TAVILY_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
 
-    results = {}
-
-    for query in queries:
+    async def search(query: str) -> dict:
         payload = {
             "query": query,
             "topic": "general",
@@ -45,7 +39,12 @@ def search_market(queries: List[str]) -> Dict[str, dict]:
             "country": None,
         }
 
-        response = requests.request("POST", url, json=payload, headers=headers)
-        results[query] = response.json()
+        async with semaphore:
+            response = await tavily.post(tavily.SEARCH_URL, payload)
+        # Cache the full response, but hand the model only the relevant parts
+        return trim_search(response, query)
+
+    # Run all queries concurrently, preserving query order in the result
+    responses = await asyncio.gather(*(search(query) for query in queries))
 
-    return results
+    return dict(zip(queries, responses))
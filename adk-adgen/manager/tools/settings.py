@@ -0,0 +1,134 @@
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# Prefixes of the per-provider limits read by rate_limiter.limits_for
+RATE_LIMIT_PREFIXES = ("RATE_LIMIT_", "RATE_BURST_", "CONCURRENCY_")
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Every environment setting the manager reads, loaded once per process."""
+
+    # Providers
+    tavily_api_key: str | None
+    tavily_base_url: str
+    heygen_api_key: str | None
+    heygen_base_url: str
+    # Set when a HeyGen webhook endpoint is registered to POST to /webhooks/heygen
+    heygen_webhook_enabled: bool
+    # Endpoint secret used to verify webhook signatures; unsigned webhooks are rejected
+    heygen_webhook_secret: str | None
+    google_cloud_project: str | None
+    google_cloud_location: str | None
+    veo_base_url: str
+    output_storage_uri: str | None
+    storage_host: str
+
+    # Caches
+    tavily_cache_path: str
+    tavily_cache_ttl: float
+    tavily_cache_max_entries: int
+    tavily_cache_enabled: bool
+    media_cache_path: str
+    media_cache_ttl: float
+    media_cache_max_entries: int
+    media_cache_enabled: bool
+    # Resumable GCS upload checkpoints
+    upload_checkpoint_dir: str
+    # State values at least this large (JSON bytes) are moved into artifacts
+    state_offload_threshold: int
+
+    # Scheduling
+    speculative_b_roll: bool
+    ffmpeg_max_concurrency: int | None
+    rate_limits: dict[str, str] = field(default_factory=dict)
+
+    # Tracing
+    trace_exporters: str = ""
+    trace_json_path: str = ".cache/traces.jsonl"
+
+    # Batch runner
+    batch_db_path: str = ".cache/batch.sqlite3"
+    batch_workers: int = 4
+    batch_stage_attempts: int = 3
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Reads the settings from the environment, after loading .env."""
+
+        load_dotenv()
+        location = os.getenv("GOOGLE_CLOUD_LOCATION")
+        ffmpeg_max_concurrency = os.getenv("FFMPEG_MAX_CONCURRENCY")
+        return cls(
+            tavily_api_key=os.getenv("TAVILY_API_KEY"),
+            # Base URLs are overridable to point at local stand-ins
+            # (see benchmarks/load_test.py)
+            tavily_base_url=os.getenv(
+                "TAVILY_BASE_URL", "https://api.tavily.com"
+            ).rstrip("/"),
+            heygen_api_key=os.getenv("HEYGEN_API_KEY"),
+            heygen_base_url=os.getenv(
+                "HEYGEN_BASE_URL", "https://api.heygen.com"
+            ).rstrip("/"),
+            heygen_webhook_enabled=_flag("HEYGEN_WEBHOOK_ENABLED", "false"),
+            heygen_webhook_secret=os.getenv("HEYGEN_WEBHOOK_SECRET"),
+            google_cloud_project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+            google_cloud_location=location,
+            veo_base_url=os.getenv(
+                "VEO_BASE_URL", f"https://{location}-aiplatform.googleapis.com"
+            ).rstrip("/"),
+            output_storage_uri=os.getenv("OUTPUT_STORAGE_URI"),
+            # The storage client honors STORAGE_EMULATOR_HOST itself; resumable
+            # uploads follow it
+            storage_host=os.getenv(
+                "STORAGE_EMULATOR_HOST", "https://storage.googleapis.com"
+            ).rstrip("/"),
+            tavily_cache_path=os.getenv("TAVILY_CACHE_PATH", ".cache/tavily.sqlite3"),
+            tavily_cache_ttl=float(os.getenv("TAVILY_CACHE_TTL", 24 * 60 * 60)),
+            tavily_cache_max_entries=int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", 5000)),
+            tavily_cache_enabled=_flag("TAVILY_CACHE_ENABLED", "true"),
+            media_cache_path=os.getenv("MEDIA_CACHE_PATH", ".cache/media.sqlite3"),
+            # HeyGen's signed video URLs expire after 7 days, so entries must expire
+            # before them
+            media_cache_ttl=float(os.getenv("MEDIA_CACHE_TTL", 6 * 24 * 60 * 60)),
+            media_cache_max_entries=int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", 1000)),
+            media_cache_enabled=_flag("MEDIA_CACHE_ENABLED", "true"),
+            upload_checkpoint_dir=os.getenv("UPLOAD_CHECKPOINT_DIR", ".cache/uploads"),
+            state_offload_threshold=int(os.getenv("STATE_OFFLOAD_THRESHOLD", 1024)),
+            # Start B-roll while the script is still under review (Veo time may be
+            # wasted on drafts)
+            speculative_b_roll=_flag("SPECULATIVE_B_ROLL", "false"),
+            ffmpeg_max_concurrency=(
+                int(ffmpeg_max_concurrency) if ffmpeg_max_concurrency else None
+            ),
+            rate_limits={
+                key: value
+                for key, value in os.environ.items()
+                if key.startswith(RATE_LIMIT_PREFIXES) and value
+            },
+            # Comma-separated: "console", "json" and/or "otel"
+            trace_exporters=os.getenv("TRACE_EXPORTERS", ""),
+            trace_json_path=os.getenv("TRACE_JSON_PATH", ".cache/traces.jsonl"),
+            batch_db_path=os.getenv("BATCH_DB_PATH", ".cache/batch.sqlite3"),
+            batch_workers=int(os.getenv("BATCH_WORKERS", 4)),
+            batch_stage_attempts=int(os.getenv("BATCH_STAGE_ATTEMPTS", 3)),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Returns the process-wide settings, reading .env and the environment on first use.
+
+    Nothing is read at import time, so scripts can adjust os.environ before the first
+    call (see benchmarks/load_test.py).
+    """
+
+    return Settings.from_env()
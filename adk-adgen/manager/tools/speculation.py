@@ -0,0 +1,126 @@
+import asyncio
+import logging
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from . import progress
+from .cache import make_key
+from .generate_b_roll import b_roll_inputs, load_image, render_b_roll
+from .media_store import get_store
+from .settings import get_settings
+from .state_offload import hydrate
+
+logger = logging.getLogger(__name__)
+
+# Running speculative jobs by session and media store key. Each one is a waiter on the
+# media store, so discarding it only cancels Veo when no other session needs the video
+_tasks: dict[tuple[progress.SessionKey | None, str], asyncio.Task] = {}
+_stats = {"started": 0, "hits": 0, "misses": 0}
+
+
+async def _video_script(callback_context: CallbackContext) -> str | None:
+    av_script = await hydrate(callback_context, "av_script")
+    if not isinstance(av_script, dict):
+        return None
+    return av_script.get("video_script") or None
+
+
+def _discard(session: progress.SessionKey | None, key: str) -> None:
+    task = _tasks.pop((session, key), None)
+    if task and not task.done():
+        task.cancel()
+
+
+def _finished(
+    task_key: tuple[progress.SessionKey | None, str], task: asyncio.Task
+) -> None:
+    if _tasks.get(task_key) is task:
+        del _tasks[task_key]
+    if not task.cancelled() and task.exception():
+        logger.warning("Speculative B-roll failed: %s", task.exception())
+
+
+async def start_speculative_b_roll(
+    callback_context: CallbackContext,
+) -> types.Content | None:
+    """
+    after_agent_callback for script_agent: starts Veo on each new `video_script`.
+
+    The job runs through the media store, so `generate_b_roll` picks up its result (or
+    joins it while it is still running) when the same script is approved. A previous
+    speculative job for a different script is cancelled.
+    """
+
+    if not get_settings().speculative_b_roll:
+        return None
+
+    state = callback_context.state
+    prompt = await _video_script(callback_context)
+    if not prompt:
+        return None
+
+    session = progress.session_key(callback_context)
+    inputs = b_roll_inputs(prompt, callback_context)
+    key = make_key("veo", inputs)
+    previous = state.get("speculative_b_roll")
+    if previous and previous.get("key") == key:
+        return None
+    if previous:
+        # The script changed under review, so the earlier job is wasted
+        _discard(session, previous["key"])
+        _stats["misses"] += 1
+        state["speculative_b_roll"] = None
+
+    image = await load_image(callback_context)
+    if not image:
+        return None
+
+    # Veo status for the draft is published to the session while it is reviewed
+    task = asyncio.create_task(
+        get_store().get_or_create(
+            "veo", inputs, lambda: render_b_roll(prompt, image, session)
+        )
+    )
+    _tasks[(session, key)] = task
+    task.add_done_callback(lambda t: _finished((session, key), t))
+    _stats["started"] += 1
+    state["speculative_b_roll"] = {"key": key}
+    logger.info("Started speculative B-roll %s", key[:12])
+    return None
+
+
+def claim(prompt: str, tool_context) -> bool:
+    """
+    Settles this session's speculative B-roll against the approved `prompt`.
+
+    A matching job is left running for `generate_b_roll` to join; a stale one is
+    discarded (and Veo cancelled unless another session is waiting for the same video).
+
+    Returns:
+        bool: Whether the speculative job matched.
+    """
+
+    speculation = tool_context.state.get("speculative_b_roll")
+    if not speculation:
+        return False
+    tool_context.state["speculative_b_roll"] = None
+
+    hit = speculation["key"] == make_key("veo", b_roll_inputs(prompt, tool_context))
+    if hit:
+        _stats["hits"] += 1
+    else:
+        _discard(progress.session_key(tool_context), speculation["key"])
+        _stats["misses"] += 1
+
+    logger.info("Speculative B-roll %s: %s", "hit" if hit else "miss", stats())
+    return hit
+
+
+def stats() -> dict:
+    settled = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "running": len(_tasks),
+        "hit_rate": _stats["hits"] / settled if settled else 0.0,
+    }
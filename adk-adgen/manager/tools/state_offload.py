@@ -0,0 +1,241 @@
+"""
+Offloads large session state values into artifacts and hydrates them on demand.
+
+`offload_state` builds an after_agent_callback that swaps a large value for a compact
+handle ({"artifact", "mimeType", "sha256", "bytes"}). It runs after ADK has already
+persisted the agent's output_key value: the event with the agent's final response
+carries the full value in its state_delta. Offloading keeps the value out of the
+current state, and so out of later prompts, state reads and deltas, but that one
+event in the session's history still holds it.
+"""
+
+import copy
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from google.genai import types
+
+from .settings import get_settings
+from .tracing import add_callback
+
+# Offloaded values are saved as "state_<key>.json" artifacts
+ARTIFACT_PREFIX = "state_"
+MIME_TYPE = "application/json"
+# Hydrated values kept in memory, by content hash
+MAX_HYDRATED = 256
+# Agent runs whose instruction values are held for their providers
+MAX_PINNED = 256
+
+_hydrated: OrderedDict[str, Any] = OrderedDict()
+# Values hydrated for an agent run, by (invocation id, agent name) and content hash
+_pinned: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+
+
+def is_handle(value: Any) -> bool:
+    """Whether a state value is a handle to an offloaded artifact."""
+
+    return (
+        isinstance(value, dict)
+        and value.get("mimeType") == MIME_TYPE
+        and str(value.get("artifact", "")).startswith(ARTIFACT_PREFIX)
+    )
+
+
+def _parse(value: Any) -> Any:
+    # Agent output may be JSON text (optionally inside a ```json fence)
+    if not isinstance(value, str):
+        return value
+    match = re.search(r"\{.*\}", value, re.DOTALL)
+    try:
+        return json.loads(match.group(0) if match else value)
+    except ValueError:
+        return value
+
+
+def decode(part: types.Part | None) -> Any:
+    """Reads the value back from an offloaded artifact."""
+
+    if part is None:
+        return None
+    if part.inline_data and part.inline_data.data is not None:
+        return json.loads(part.inline_data.data)
+    return json.loads(part.text or "null")
+
+
+def _remember(digest: str, value: Any) -> None:
+    _hydrated[digest] = value
+    _hydrated.move_to_end(digest)
+    while len(_hydrated) > MAX_HYDRATED:
+        _hydrated.popitem(last=False)
+
+
+async def offload(callback_context, key: str) -> bool:
+    """
+    Moves a large state value into an artifact, leaving a compact handle in state.
+
+    Values under the STATE_OFFLOAD_THRESHOLD size, and values that already are
+    handles, are left as they are.
+
+    Args:
+        callback_context: Callback or tool context of the current agent.
+        key (str): State key to offload.
+    Returns:
+        bool: Whether the value was offloaded.
+    """
+
+    value = callback_context.state.get(key)
+    if value is None or is_handle(value):
+        return False
+
+    value = _parse(value)
+    text = json.dumps(value, ensure_ascii=False)
+    size = len(text.encode())
+    if size < get_settings().state_offload_threshold:
+        return False
+
+    filename = f"{ARTIFACT_PREFIX}{key}.json"
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    await callback_context.save_artifact(filename, types.Part(text=text))
+    _remember(digest, value)
+    callback_context.state[key] = {
+        "artifact": filename,
+        "mimeType": MIME_TYPE,
+        "sha256": digest,
+        "bytes": size,
+    }
+    return True
+
+
+def offload_state(*keys: str) -> Callable[..., Awaitable[None]]:
+    """Builds an after_agent_callback that offloads the given state keys."""
+
+    async def callback(callback_context) -> None:
+        for key in keys:
+            await offload(callback_context, key)
+
+    return callback
+
+
+async def hydrate(context, key: str) -> Any:
+    """
+    Returns the full value of a state key, loading it from its artifact if offloaded.
+
+    Args:
+        context: Callback or tool context (anything with `state` and
+            `load_artifact`).
+        key (str): State key.
+    Returns:
+        Any: The value (parsed from JSON text when possible), or None if unset.
+    """
+
+    value = context.state.get(key)
+    if not is_handle(value):
+        return _parse(value)
+
+    digest = value["sha256"]
+    if digest not in _hydrated:
+        _remember(digest, decode(await context.load_artifact(value["artifact"])))
+    _hydrated.move_to_end(digest)
+    return copy.deepcopy(_hydrated[digest])
+
+
+def _run_key(context) -> tuple[str, str]:
+    return (context.invocation_id, context.agent_name)
+
+
+def _pin_keys(*keys: str) -> Callable[..., Awaitable[None]]:
+    # Instruction providers only get a ReadonlyContext, which cannot load artifacts,
+    # so the agent's offloaded values are hydrated before it runs
+    async def callback(callback_context) -> None:
+        pinned = {}
+        for key in keys:
+            value = callback_context.state.get(key)
+            if is_handle(value):
+                pinned[value["sha256"]] = await hydrate(callback_context, key)
+        _pinned[_run_key(callback_context)] = pinned
+        while len(_pinned) > MAX_PINNED:
+            _pinned.popitem(last=False)
+
+    return callback
+
+
+async def _unpin(callback_context) -> None:
+    _pinned.pop(_run_key(callback_context), None)
+
+
+def _view_value(readonly_context, key: str) -> Any:
+    value = readonly_context.state.get(key)
+    if not is_handle(value):
+        return _parse(value)
+
+    digest = value["sha256"]
+    pinned = _pinned.get(_run_key(readonly_context), {})
+    if digest in pinned:
+        return copy.deepcopy(pinned[digest])
+    if digest in _hydrated:
+        return copy.deepcopy(_hydrated[digest])
+    raise LookupError(
+        f"State '{key}' is offloaded but was not hydrated for this agent; "
+        "call state_offload.hydrate_views on the agent tree"
+    )
+
+
+async def hydrate_state(
+    state: dict, load_artifact: Callable[[str], Awaitable[types.Part | None]]
+) -> dict:
+    """
+    Returns a copy of a state snapshot with every handle replaced by its value.
+
+    For callers outside an agent (the batch runner, load test) that hold a state dict
+    and a way to load the session's artifacts by filename.
+    """
+
+    hydrated = dict(state)
+    for key, value in state.items():
+        if is_handle(value):
+            hydrated[key] = decode(await load_artifact(value["artifact"]))
+    return hydrated
+
+
+def view_instruction(template: str, **views: Callable[[Any], Any]) -> Callable:
+    """
+    Builds an instruction provider that fills `{key}` in `template` with a view of
+    each state value.
+
+    Offloaded values are hydrated first, and each view picks the fields the agent
+    needs, so agents never see artifact handles or data they do not use.
+
+    Args:
+        template (str): Instruction text with `{key}` placeholders.
+        **views: Function per state key, from the full value to what the agent sees.
+    """
+
+    def provider(readonly_context) -> str:
+        instruction = template
+        for key, view in views.items():
+            value = _view_value(readonly_context, key)
+            rendered = "" if value is None else view(value)
+            if not isinstance(rendered, str):
+                rendered = json.dumps(rendered, ensure_ascii=False)
+            instruction = instruction.replace("{" + key + "}", rendered)
+        return instruction
+
+    provider.state_keys = tuple(views)
+    return provider
+
+
+def hydrate_views(agent) -> None:
+    """
+    Hydrates the offloaded state read by `view_instruction` providers in an agent
+    tree before each of those agents runs, through its agent callbacks.
+    """
+
+    keys = getattr(getattr(agent, "instruction", None), "state_keys", None)
+    if keys:
+        add_callback(agent, "before_agent_callback", _pin_keys(*keys))
+        add_callback(agent, "after_agent_callback", _unpin)
+    for sub_agent in agent.sub_agents:
+        hydrate_views(sub_agent)
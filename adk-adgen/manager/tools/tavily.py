@@ -0,0 +1,134 @@
+from typing import List
+
+from . import http_client
+from .cache import TTLCache, make_key, normalize_url
+from .settings import get_settings
+
+# Endpoints, relative to the configured base URL so cache keys survive a base change
+SEARCH_URL = "/search"
+EXTRACT_URL = "/extract"
+
+_cache: TTLCache | None = None
+
+
+def get_cache() -> TTLCache:
+    """
+    Returns the cache shared by every Tavily tool, opening it on first use.
+
+    Hit/miss counters are available via get_cache().stats().
+    """
+
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = TTLCache(
+            settings.tavily_cache_path,
+            ttl=settings.tavily_cache_ttl,
+            max_entries=settings.tavily_cache_max_entries,
+        )
+    return _cache
+
+
+async def _request(url: str, payload: dict) -> tuple[int, dict]:
+    settings = get_settings()
+    headers = {
+        "Authorization": f"Bearer {settings.tavily_api_key}",
+        "Content-Type": "application/json",
+    }
+
+    endpoint = "tavily:search" if url == SEARCH_URL else "tavily:extract"
+    response = await http_client.request(
+        "POST",
+        settings.tavily_base_url + url,
+        json=payload,
+        headers=headers,
+        limit=endpoint,
+    )
+    try:
+        data = response.json()
+    except ValueError:
+        # Rate limit and gateway errors are not always JSON
+        data = {"detail": response.text[:500]}
+    return response.status_code, data
+
+
+async def post(url: str, payload: dict) -> dict:
+    """
+    Sends a request to a Tavily endpoint through the shared pooled client.
+
+    Successful responses are cached on the normalized payload.
+
+    Args:
+        url (str): Tavily endpoint (SEARCH_URL or EXTRACT_URL).
+        payload (dict): JSON request body.
+    Returns:
+        dict: The decoded JSON response.
+    """
+
+    key = make_key(url, payload)
+    enabled = get_settings().tavily_cache_enabled
+    if enabled:
+        cached = await get_cache().aget(key)
+        if cached is not None:
+            return cached
+
+    status_code, data = await _request(url, payload)
+    if status_code != 200:
+        # Surface failures (e.g. 429 after retries) instead of passing the body through
+        return {"error": f"Tavily request failed with status {status_code}", **data}
+    if enabled:
+        await get_cache().aset(key, data)
+
+    return data
+
+
+async def extract(urls: List[str], options: dict) -> dict:
+    """
+    Extracts several URLs, caching each URL's result individually.
+
+    Only URLs missing from the cache are sent to Tavily, in a single multi-URL request.
+
+    Args:
+        urls (List[str]): URLs to extract (at most 20 uncached URLs per call).
+        options (dict): Remaining extract payload fields (depth, format, images, ...).
+    Returns:
+        dict: A response shaped like Tavily's, with "results" and "failed_results".
+    """
+
+    enabled = get_settings().tavily_cache_enabled
+    results = {}
+    missing = []
+    for url in urls:
+        cached = (
+            await get_cache().aget(make_key(EXTRACT_URL, {**options, "urls": url}))
+            if enabled
+            else None
+        )
+        if cached is not None:
+            results[url] = cached
+        else:
+            missing.append(url)
+
+    failed_results = []
+    if missing:
+        status_code, data = await _request(EXTRACT_URL, {**options, "urls": missing})
+        failed_results = data.get("failed_results", [])
+        if status_code != 200:
+            failed_results = [{"url": url, "error": data} for url in missing]
+
+        # Tavily may echo URLs back in a slightly different form
+        requested = {normalize_url(url): url for url in missing}
+        for result in data.get("results", []):
+            url = requested.get(normalize_url(result.get("url", "")))
+            if not url:
+                continue
+            results[url] = result
+            if enabled:
+                await get_cache().aset(
+                    make_key(EXTRACT_URL, {**options, "urls": url}), result
+                )
+
+    return {
+        "results": [results[url] for url in urls if url in results],
+        "failed_results": failed_results,
+    }
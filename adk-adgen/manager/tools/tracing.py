@@ -0,0 +1,419 @@
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .settings import get_settings
+
+# Sessions whose timing summaries are kept in memory
+MAX_SESSIONS = 1000
+# Spans left open by callbacks that never closed them (e.g. an agent that raised)
+# are ended once this many are open
+MAX_OPEN_SPANS = 10000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """One timed operation: an LLM call, tool call, HTTP request, poll, ffmpeg run..."""
+
+    name: str
+    kind: str
+    session_id: str | None
+    parent_id: str | None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.time)
+    end: float | None = None
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+    # Restores the previous current span when this one ends
+    token: Any = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class ConsoleExporter:
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        logger.info(
+            "%s %s %.3fs %s%s",
+            span.kind,
+            span.name,
+            span.duration,
+            span.attributes,
+            f" error={span.error}" if span.error else "",
+        )
+
+
+class JsonExporter:
+    """Appends one JSON object per finished span to a local file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        record = {
+            "name": span.name,
+            "kind": span.kind,
+            "session_id": span.session_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": span.start,
+            "end": span.end,
+            "duration": span.duration,
+            "attributes": span.attributes,
+            "error": span.error,
+        }
+        line = json.dumps(record, default=str)
+        with self._lock, self.path.open("a") as f:
+            f.write(line + "\n")
+
+
+class OpenTelemetryExporter:
+    """
+    Mirrors spans into the OpenTelemetry API, so they reach whatever tracer provider
+    and exporter (OTLP, Cloud Trace, ...) the process has configured.
+    """
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("adk-adgen")
+        self._spans = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._spans.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent else None
+        self._spans[span.span_id] = self._tracer.start_span(
+            span.name,
+            context=context,
+            start_time=int(span.start * 1e9),
+            attributes={"kind": span.kind, "session_id": span.session_id or ""},
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._spans.pop(span.span_id, None)
+        if not otel_span:
+            return
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if span.error:
+            from opentelemetry.trace import Status, StatusCode
+
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int(span.end * 1e9))
+
+
+def _build_exporters() -> list:
+    settings = get_settings()
+    exporters = []
+    for name in filter(None, (n.strip() for n in settings.trace_exporters.split(","))):
+        if name == "console":
+            exporters.append(ConsoleExporter())
+        elif name == "json":
+            exporters.append(JsonExporter(settings.trace_json_path))
+        elif name == "otel":
+            try:
+                exporters.append(OpenTelemetryExporter())
+            except ImportError:
+                logger.warning(
+                    "TRACE_EXPORTERS=otel but opentelemetry is not installed"
+                )
+        else:
+            logger.warning("Unknown trace exporter: %s", name)
+    return exporters
+
+
+_exporters: list | None = None
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_current_session: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_session", default=None
+)
+_summaries: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_exporters() -> list:
+    # Built on the first span rather than at import, once settings are final
+    global _exporters
+    if _exporters is None:
+        _exporters = _build_exporters()
+    return _exporters
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def start_span(
+    name: str, kind: str, parent: Span | None = None, **attributes: Any
+) -> Span:
+    """
+    Starts a span and makes it current.
+
+    Args:
+        name (str): Operation name (agent, tool, model, URL path, job ID, ...).
+        kind (str): Category used in summaries ("agent", "llm", "tool", "http", ...).
+        parent (Span): Explicit parent for work that runs outside the caller's context
+            (e.g. a shared poll loop); defaults to the current span.
+    """
+
+    parent = parent or _current_span.get()
+    span = Span(
+        name=name,
+        kind=kind,
+        session_id=(parent.session_id if parent else None) or _current_session.get(),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    span.token = _current_span.set(span)
+    for exporter in _get_exporters():
+        exporter.on_start(span)
+    return span
+
+
+def end_span(span: Span, error: str | None = None) -> None:
+    """Finishes a span, restores its parent as current and records it."""
+
+    span.end = time.time()
+    span.error = error or span.error
+    try:
+        _current_span.reset(span.token)
+    except (ValueError, RuntimeError):
+        # Ended from a different context than it started in
+        pass
+
+    _record(span)
+    for exporter in _get_exporters():
+        try:
+            exporter.on_end(span)
+        except Exception as e:
+            logger.warning("Trace exporter failed: %s", e)
+
+
+@contextmanager
+def span(
+    name: str, kind: str, parent: Span | None = None, **attributes: Any
+) -> Iterator[Span]:
+    """
+    Times a block as a span; exceptions are recorded on the span and re-raised.
+
+    Works in sync and async code alike (and across asyncio.to_thread, which copies
+    the current context).
+    """
+
+    current = start_span(name, kind, parent=parent, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, error=repr(e))
+        raise
+    else:
+        end_span(current)
+
+
+def traced(name: str, kind: str) -> Callable:
+    """Decorator form of `span` for synchronous functions."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_session(session_id: str) -> None:
+    _current_session.set(session_id)
+
+
+def _record(span: Span) -> None:
+    if not span.session_id:
+        return
+    with _lock:
+        summary = _summaries.get(span.session_id)
+        if summary is None:
+            summary = {"kinds": {}, "agents": {}, "tokens": {"prompt": 0, "output": 0}}
+            _summaries[span.session_id] = summary
+            while len(_summaries) > MAX_SESSIONS:
+                _summaries.popitem(last=False)
+        _summaries.move_to_end(span.session_id)
+
+        totals = summary["kinds"].setdefault(
+            span.kind, {"count": 0, "seconds": 0.0, "errors": 0}
+        )
+        totals["count"] += 1
+        totals["seconds"] = round(totals["seconds"] + span.duration, 3)
+        totals["errors"] += bool(span.error)
+        if span.attributes.get("bytes"):
+            totals["bytes"] = totals.get("bytes", 0) + span.attributes["bytes"]
+
+        if span.kind == "agent":
+            summary["agents"][span.name] = round(
+                summary["agents"].get(span.name, 0.0) + span.duration, 3
+            )
+        summary["tokens"]["prompt"] += span.attributes.get("prompt_tokens", 0) or 0
+        summary["tokens"]["output"] += span.attributes.get("output_tokens", 0) or 0
+
+
+def summary(session_id: str) -> dict:
+    """Time per span kind and per agent, bytes and token counts for a session."""
+
+    with _lock:
+        return json.loads(json.dumps(_summaries.get(session_id, {})))
+
+
+# Spans opened by before_* callbacks, closed by the matching after_* or error callback
+_open_spans: OrderedDict[tuple, Span] = OrderedDict()
+
+
+def _open(key: tuple, span: Span) -> None:
+    _open_spans[key] = span
+    while len(_open_spans) > MAX_OPEN_SPANS:
+        _, abandoned = _open_spans.popitem(last=False)
+        end_span(abandoned, error="never closed")
+
+
+def _session_id(context) -> str:
+    return context.session.id
+
+
+async def _before_agent(callback_context) -> None:
+    set_session(_session_id(callback_context))
+    key = ("agent", callback_context.invocation_id, callback_context.agent_name)
+    _open(key, start_span(callback_context.agent_name, "agent"))
+
+
+async def _after_agent(callback_context) -> None:
+    key = ("agent", callback_context.invocation_id, callback_context.agent_name)
+    opened = _open_spans.pop(key, None)
+    if opened:
+        end_span(opened)
+
+
+async def _after_root_agent(callback_context) -> None:
+    await _after_agent(callback_context)
+    # Once per turn, so sub-agents do not each add a state delta to their events
+    callback_context.state["timing_summary"] = summary(_session_id(callback_context))
+
+
+async def _before_model(callback_context, llm_request) -> None:
+    key = ("llm", callback_context.invocation_id, callback_context.agent_name)
+    _open(
+        key,
+        start_span(
+            llm_request.model or callback_context.agent_name,
+            "llm",
+            agent=callback_context.agent_name,
+        ),
+    )
+
+
+async def _after_model(callback_context, llm_response) -> None:
+    if getattr(llm_response, "partial", False):
+        return
+    key = ("llm", callback_context.invocation_id, callback_context.agent_name)
+    opened = _open_spans.pop(key, None)
+    if not opened:
+        return
+    usage = llm_response.usage_metadata
+    if usage:
+        opened.set(
+            prompt_tokens=usage.prompt_token_count or 0,
+            output_tokens=usage.candidates_token_count or 0,
+        )
+    end_span(opened, error=llm_response.error_message)
+
+
+async def _before_tool(tool, args, tool_context) -> None:
+    key = ("tool", tool_context.function_call_id)
+    _open(key, start_span(tool.name, "tool", agent=tool_context.agent_name))
+
+
+async def _after_tool(tool, args, tool_context, tool_response) -> None:
+    opened = _open_spans.pop(("tool", tool_context.function_call_id), None)
+    if opened:
+        end_span(opened)
+
+
+async def _on_tool_error(tool, args, tool_context, error) -> None:
+    # after_tool_callback does not run when a tool raises
+    opened = _open_spans.pop(("tool", tool_context.function_call_id), None)
+    if opened:
+        end_span(opened, error=repr(error))
+
+
+async def _on_model_error(callback_context, llm_request, error) -> None:
+    key = ("llm", callback_context.invocation_id, callback_context.agent_name)
+    opened = _open_spans.pop(key, None)
+    if opened:
+        end_span(opened, error=repr(error))
+
+
+def add_callback(agent, attribute: str, callback) -> None:
+    """Runs `callback` before an agent's existing callbacks for `attribute`."""
+
+    existing = getattr(agent, attribute)
+    if existing is None:
+        setattr(agent, attribute, callback)
+    elif isinstance(existing, list):
+        setattr(agent, attribute, [callback, *existing])
+    else:
+        setattr(agent, attribute, [callback, existing])
+
+
+def instrument(agent) -> None:
+    """
+    Adds agent, LLM and tool spans to an agent tree through ADK callbacks.
+
+    The tracing callbacks run first and return None, so existing callbacks keep their
+    behavior. Tool and model spans are also closed when the call raises. When the root
+    agent finishes, the session's timing summary is written to state["timing_summary"].
+    """
+
+    _instrument(agent, _after_root_agent)
+
+
+def _instrument(agent, after_agent) -> None:
+    from google.adk.agents import LlmAgent
+
+    add_callback(agent, "before_agent_callback", _before_agent)
+    add_callback(agent, "after_agent_callback", after_agent)
+    if isinstance(agent, LlmAgent):
+        add_callback(agent, "before_model_callback", _before_model)
+        add_callback(agent, "after_model_callback", _after_model)
+        add_callback(agent, "before_tool_callback", _before_tool)
+        add_callback(agent, "after_tool_callback", _after_tool)
+        # Error callbacks return None, so the error still reaches the agent
+        add_callback(agent, "on_tool_error_callback", _on_tool_error)
+        add_callback(agent, "on_model_error_callback", _on_model_error)
+    for sub_agent in agent.sub_agents:
+        _instrument(sub_agent, _after_agent)
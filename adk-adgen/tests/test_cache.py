@@ -0,0 +1,64 @@
+from manager.tools import cache
+from manager.tools.cache import TTLCache, make_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_entries_persist_across_instances(tmp_path):
+    TTLCache(tmp_path / "cache.db", ttl=60, max_entries=10).set("key", {"a": 1})
+
+    reopened = TTLCache(tmp_path / "cache.db", ttl=60, max_entries=10)
+    assert reopened.get("key") == {"a": 1}
+    assert reopened.stats()["hits"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock.time)
+    store = TTLCache(tmp_path / "cache.db", ttl=60, max_entries=10)
+    store.set("key", "value")
+
+    clock.now += 59
+    assert store.get("key") == "value"
+    clock.now += 2
+    assert store.get("key") is None
+    # Expired rows are gone from disk too, not just from memory
+    assert TTLCache(tmp_path / "cache.db", ttl=60, max_entries=10).get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock.time)
+    store = TTLCache(tmp_path / "cache.db", ttl=600, max_entries=2, memory_entries=1)
+    for key in ("a", "b"):
+        store.set(key, key)
+        clock.now += 1
+    # Reading "a" from disk makes "b" the least recently used
+    assert store.get("a") == "a"
+    clock.now += 1
+    store.set("c", "c")
+
+    disk = TTLCache(tmp_path / "cache.db", ttl=600, max_entries=2)
+    assert [disk.get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
+
+
+def test_memory_only_cache_without_path():
+    store = TTLCache(None, ttl=60, max_entries=10, memory_entries=1)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert (store.get("a"), store.get("b")) == (None, 2)
+
+
+def test_equivalent_requests_share_a_key():
+    assert make_key(
+        "tavily", {"query": "  Protein  Powder ", "url": "HTTPS://Example.com/a/#x"}
+    ) == make_key(
+        "tavily", {"query": "protein powder", "url": "https://example.com/a", "x": ""}
+    )
+    assert make_key("tavily", {"query": "a"}) != make_key("heygen", {"query": "a"})
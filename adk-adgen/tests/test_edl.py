@@ -0,0 +1,103 @@
+import pytest
+
+from manager.tools import edl
+
+
+def cuts_for(template: str, a_duration: float, b_duration: float) -> list[edl.Cut]:
+    decisions = edl.from_state({"edl_template": template})
+    return edl.resolve(decisions, a_duration, b_duration)
+
+
+def test_cuts_cover_the_a_roll_timeline():
+    cuts = cuts_for("alternating_quarters", 20.0, 8.0)
+    assert [cut.source for cut in cuts] == ["a", "b", "a", "b"]
+    assert sum(cut.duration for cut in cuts) == pytest.approx(20.0)
+    # A-roll shots stay in sync with the continuous A-roll audio
+    assert [(cut.start, cut.end) for cut in cuts if cut.source == "a"] == [
+        (0.0, 5.0),
+        (10.0, 15.0),
+    ]
+
+
+def test_b_roll_shots_do_not_replay_the_opening():
+    cuts = cuts_for("alternating_quarters", 20.0, 8.0)
+    b_cuts = [(cut.start, cut.end) for cut in cuts if cut.source == "b"]
+    # The second shot would run past the 8 s clip, so it ends on its last frame
+    assert b_cuts == [(0.0, 5.0), (3.0, 8.0)]
+
+
+def test_b_roll_continues_where_the_previous_shot_ended():
+    cuts = cuts_for("alternating_quarters", 12.0, 8.0)
+    assert [(cut.start, cut.end) for cut in cuts if cut.source == "b"] == [
+        (0.0, 3.0),
+        (3.0, 6.0),
+    ]
+
+
+def test_long_shots_loop_instead_of_freezing():
+    cuts = cuts_for("bookends", 60.0, 8.0)
+    b_cuts = [cut for cut in cuts if cut.source == "b"]
+    assert [(cut.start, cut.end) for cut in b_cuts] == [(0.0, 8.0)] * 3
+    assert all(cut.hold <= edl.MAX_HOLD for cut in cuts)
+    assert sum(cut.duration for cut in cuts) == pytest.approx(60.0)
+
+
+def test_short_remainder_is_held_briefly():
+    decisions = edl.EditDecisionList([edl.Segment("a", 1), edl.Segment("b", 1)])
+    cuts = edl.resolve(decisions, 16.6, 8.0)
+    assert cuts[1].end - cuts[1].start == 8.0
+    assert cuts[1].hold == pytest.approx(0.3)
+
+
+@pytest.mark.parametrize(
+    "a_duration, b_duration", [(20.0, 0.0), (0.0, 8.0), (20.0, -1.0)]
+)
+def test_non_positive_durations_are_rejected(a_duration, b_duration):
+    with pytest.raises(ValueError):
+        cuts_for("alternating_quarters", a_duration, b_duration)
+
+
+def test_pinned_start_is_kept_when_it_fits():
+    decisions = edl.EditDecisionList(
+        [edl.Segment("a", 1), edl.Segment("b", 1, start=2.0)]
+    )
+    assert edl.resolve(decisions, 8.0, 8.0)[1].start == 2.0
+
+
+def test_fade_applies_once_per_looped_shot():
+    decisions = edl.EditDecisionList(
+        [edl.Segment("a", 1), edl.Segment("b", 3, transition="fade")]
+    )
+    cuts = edl.resolve(decisions, 24.0, 8.0)
+    assert [cut.transition for cut in cuts] == ["cut", "fade", "cut", "cut"]
+
+
+def test_b_roll_is_cropped_to_the_a_roll_frame():
+    cuts = cuts_for("alternating_quarters", 20.0, 8.0)
+    graph, outputs = edl.compile_filter(cuts, (720, 1280), [])
+    assert "scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280" in graph
+    assert "scale=720:1280,setsar" not in graph
+    assert outputs == ["[outv]"]
+
+
+def test_one_output_per_layout():
+    cuts = cuts_for("bookends", 20.0, 8.0)
+    layouts = [edl.LAYOUT_PRESETS["16:9"], edl.LAYOUT_PRESETS["9:16"]]
+    graph, outputs = edl.compile_filter(cuts, (1280, 720), layouts)
+    assert outputs == ["[out0]", "[out1]"]
+    assert "[timeline]split=2[l0][l1]" in graph
+
+
+@pytest.mark.parametrize(
+    "state",
+    [
+        {"edl_template": "missing"},
+        {"edl": {"segments": []}},
+        {"edl": {"segments": [{"source": "c", "ratio": 1}]}},
+        {"edl": {"segments": [{"source": "a", "ratio": 0}]}},
+        {"output_profiles": ["4:3"]},
+    ],
+)
+def test_invalid_edls_are_rejected(state):
+    with pytest.raises(ValueError):
+        edl.from_state(state)
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from manager.tools import gcs, post_process
+
+
+class FakeSession:
+    """Resumable upload endpoint that acknowledges `accept` bytes per chunk."""
+
+    def __init__(self, accept: int | None):
+        self.accept = accept
+        self.received = 0
+        self.puts = 0
+
+    def post(self, url, json, headers):
+        return SimpleNamespace(
+            headers={"Location": "https://upload/session"},
+            raise_for_status=lambda: None,
+        )
+
+    def put(self, url, data=None, headers=None):
+        self.puts += 1
+        total = int(headers["Content-Range"].split("/")[1])
+        if self.accept is None:
+            return SimpleNamespace(status_code=308, headers={})
+        self.received = min(total, self.received + self.accept)
+        if self.received == total:
+            return SimpleNamespace(status_code=200, headers={})
+        return SimpleNamespace(
+            status_code=308, headers={"Range": f"bytes=0-{self.received - 1}"}
+        )
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(gcs, "RESUMABLE_CHUNK_SIZE", 4)
+    monkeypatch.setattr(
+        gcs,
+        "get_settings",
+        lambda: SimpleNamespace(
+            upload_checkpoint_dir=str(tmp_path / "checkpoints"),
+            storage_host="http://storage",
+        ),
+    )
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"0123456789")
+    return path
+
+
+def test_resumable_upload_reports_progress(upload, monkeypatch):
+    session = FakeSession(accept=4)
+    monkeypatch.setattr(gcs, "_get_session", lambda: session)
+    progress = []
+    gcs._resumable_upload(
+        upload, "bucket", "video.mp4", "video/mp4", lambda *p: progress.append(p)
+    )
+    assert progress == [(4, 10), (8, 10)]
+    assert not any((upload.parent / "checkpoints").iterdir())
+
+
+def test_chunk_without_progress_fails_instead_of_looping(upload, monkeypatch):
+    session = FakeSession(accept=None)
+    monkeypatch.setattr(gcs, "_get_session", lambda: session)
+    with pytest.raises(IOError):
+        gcs._resumable_upload(upload, "bucket", "video.mp4", "video/mp4")
+    assert session.puts == 1
+
+
+def test_checkpoint_is_outside_the_source_directory_and_keyed_by_content(upload):
+    first = gcs._checkpoint_path(upload, "bucket", "video.mp4")
+    assert first.parent == upload.parent / "checkpoints"
+    assert gcs._checkpoint_path(upload, "bucket", "other.mp4") != first
+    upload.write_bytes(b"changed")
+    assert gcs._checkpoint_path(upload, "bucket", "video.mp4") != first
+
+
+def test_stale_checkpoints_are_deleted(upload):
+    stale = gcs._checkpoint_path(upload, "bucket", "old.mp4")
+    stale.write_text("{}")
+    old = time.time() - gcs.CHECKPOINT_MAX_AGE - 60
+    os.utime(stale, (old, old))
+    fresh = gcs._checkpoint_path(upload, "bucket", "video.mp4")
+    fresh.write_text("{}")
+
+    gcs._checkpoint_path(upload, "bucket", "video.mp4")
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_processed_video_object_is_named_by_content(upload, monkeypatch):
+    uploads = []
+
+    async def upload_file_async(path, uri, on_progress=None):
+        uploads.append(uri)
+        return uri
+
+    monkeypatch.setattr(gcs, "upload_file_async", upload_file_async)
+    monkeypatch.setattr(
+        post_process,
+        "get_settings",
+        lambda: SimpleNamespace(output_storage_uri="gs://bucket/"),
+    )
+
+    async def scenario():
+        first = await post_process.upload_to_gcs(upload, None, "video.mp4")
+        again = await post_process.upload_to_gcs(upload, None, "video.mp4")
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert first == again == uploads[0]
+    assert first == f"gs://bucket/{gcs.content_hash(upload)[:16]}/video.mp4"
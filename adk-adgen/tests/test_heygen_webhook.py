@@ -0,0 +1,56 @@
+import hashlib
+import hmac
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from manager.tools import generate_a_roll
+
+SECRET = "endpoint-secret"
+BODY = json.dumps(
+    {"event_type": "avatar_video.success", "event_data": {"video_id": "v1"}}
+).encode()
+
+
+def sign(body: bytes) -> str:
+    return hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def use_secret(monkeypatch, secret):
+    monkeypatch.setattr(
+        generate_a_roll,
+        "get_settings",
+        lambda: SimpleNamespace(heygen_webhook_secret=secret),
+    )
+
+
+def test_valid_signature_is_accepted(monkeypatch):
+    use_secret(monkeypatch, SECRET)
+    assert generate_a_roll.verify_heygen_signature(BODY, sign(BODY))
+
+
+def test_forged_or_unsigned_webhooks_are_rejected(monkeypatch):
+    use_secret(monkeypatch, SECRET)
+    assert not generate_a_roll.verify_heygen_signature(BODY, None)
+    assert not generate_a_roll.verify_heygen_signature(BODY, sign(b"other"))
+    tampered = BODY.replace(b"v1", b"v2")
+    assert not generate_a_roll.verify_heygen_signature(tampered, sign(BODY))
+
+
+def test_webhooks_are_rejected_without_a_configured_secret(monkeypatch):
+    use_secret(monkeypatch, None)
+    assert not generate_a_roll.verify_heygen_signature(BODY, sign(BODY))
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[]", b'{"event_data": "v1"}'])
+def test_malformed_webhook_bodies_are_rejected(monkeypatch, body):
+    import main
+
+    use_secret(monkeypatch, SECRET)
+    with TestClient(main.app) as client:
+        response = client.post(
+            "/webhooks/heygen", content=body, headers={"signature": sign(body)}
+        )
+    assert response.status_code == 400
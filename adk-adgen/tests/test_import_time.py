@@ -0,0 +1,21 @@
+import statistics
+
+from benchmarks import import_time
+
+RUNS = 3
+
+
+def test_import_stays_within_budget_and_defers_heavy_sdks():
+    runs = [import_time.profile() for _ in range(RUNS)]
+    total = statistics.median(run["total_ms"] for run in runs)
+    eager = sorted({module for run in runs for module in run["eager"]})
+    assert import_time.check(total, eager, import_time.BUDGET_MS) == []
+
+
+def test_modules_google_adk_imports_itself_are_not_failures(monkeypatch):
+    monkeypatch.setattr(import_time, "adk_imports", lambda: ["google.cloud.storage"])
+    assert import_time.check(900, ["google.cloud.storage"], 2000) == []
+    assert import_time.check(900, ["requests"], 2000) == [
+        "requests is imported eagerly; it should load on first use"
+    ]
+    assert len(import_time.check(2500, [], 2000)) == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from manager.tools import job_poller
+from manager.tools.job_poller import JobFailed, JobPoller, JobStatus, JobTimeout
+
+
+def run(check, timeout=5.0):
+    async def scenario():
+        future = JobPoller().track("job", check, timeout, initial_interval=0.01)
+        return await asyncio.wait_for(future, 5)
+
+    return asyncio.run(scenario())
+
+
+def test_job_completes_with_the_checked_result():
+    checks = 0
+
+    async def check():
+        nonlocal checks
+        checks += 1
+        return JobStatus(done=checks == 3, result="video.mp4")
+
+    assert run(check) == "video.mp4"
+    assert checks == 3
+
+
+def test_failed_job_raises_job_failed():
+    async def check():
+        return JobStatus(done=True, error="render failed")
+
+    with pytest.raises(JobFailed, match="render failed"):
+        run(check)
+
+
+def test_job_times_out():
+    async def check():
+        return JobStatus(done=False)
+
+    with pytest.raises(JobTimeout):
+        run(check, timeout=0.1)
+
+
+def test_repeated_check_errors_fail_the_job(monkeypatch):
+    monkeypatch.setattr(job_poller, "MAX_CHECK_ERRORS", 2)
+    monkeypatch.setattr(job_poller, "BACKOFF_FACTOR", 1.0)
+
+    async def check():
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(JobFailed, match="unreachable"):
+        run(check)
+
+
+def test_resolve_completes_a_job_before_its_next_check():
+    async def scenario():
+        poller = JobPoller()
+
+        async def check():
+            return JobStatus(done=False)
+
+        future = poller.track("heygen:1", check, timeout=60, initial_interval=30)
+        # Tracking the same job again joins it
+        assert poller.track("heygen:1", check, timeout=60) is future
+        assert poller.resolve("heygen:1", JobStatus(done=True, result="url"))
+        assert not poller.resolve("heygen:2", JobStatus(done=True))
+        result = await asyncio.wait_for(future, 1)
+        await asyncio.sleep(0)
+        return result, poller.pending()
+
+    assert asyncio.run(scenario()) == ("url", 0)
@@ -0,0 +1,137 @@
+import asyncio
+
+from manager.tools.cache import TTLCache
+from manager.tools.media_store import MediaStore
+
+
+def make_store() -> MediaStore:
+    return MediaStore(TTLCache(None, ttl=60, max_entries=10))
+
+
+class Render:
+    """A create() stand-in that counts calls and finishes when released."""
+
+    def __init__(self, result="gs://bucket/video.mp4"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.result
+
+
+def test_concurrent_requests_share_one_generation():
+    async def scenario():
+        store, render = make_store(), Render()
+        first = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        second = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        await asyncio.sleep(0.05)
+        render.release.set()
+        return await first, await second, render.calls, store.coalesced
+
+    first, second, calls, coalesced = asyncio.run(scenario())
+    assert first == ("gs://bucket/video.mp4", False)
+    assert second == ("gs://bucket/video.mp4", True)
+    assert calls == 1
+    assert coalesced == 1
+
+
+def test_stored_result_is_reused():
+    async def scenario():
+        store, render = make_store(), Render()
+        render.release.set()
+        await store.get_or_create("veo", {"p": 1}, render)
+        return await store.get_or_create("veo", {"p": 1}, render), render.calls
+
+    assert asyncio.run(scenario()) == (("gs://bucket/video.mp4", True), 1)
+
+
+def test_cancelled_caller_does_not_abort_other_waiters():
+    async def scenario():
+        store, render = make_store(), Render()
+        speculative = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        await asyncio.sleep(0.05)
+        joined = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        await asyncio.sleep(0.05)
+
+        speculative.cancel()
+        await asyncio.sleep(0.05)
+        render.release.set()
+        return speculative, await joined, render
+
+    speculative, joined, render = asyncio.run(scenario())
+    assert speculative.cancelled()
+    assert joined == ("gs://bucket/video.mp4", True)
+    assert render.calls == 1
+    assert render.cancelled == 0
+
+
+def test_last_waiter_leaving_cancels_generation():
+    async def scenario():
+        store, render = make_store(), Render()
+        task = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        return task, render, store._inflight
+
+    task, render, inflight = asyncio.run(scenario())
+    assert task.cancelled()
+    assert render.cancelled == 1
+    assert inflight == {}
+
+
+def test_waiter_takes_over_generation_cancelled_elsewhere():
+    async def scenario():
+        store, render = make_store(), Render()
+        task = asyncio.create_task(store.get_or_create("veo", {"p": 1}, render))
+        await asyncio.sleep(0.05)
+        # E.g. the event loop shutting down the creator's work
+        next(iter(store._inflight.values())).task.cancel()
+        await asyncio.sleep(0.05)
+        render.release.set()
+        return await task, render.calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == ("gs://bucket/video.mp4", False)
+    assert calls == 2
+
+
+def test_failure_reaches_every_waiter_and_is_not_stored():
+    async def scenario():
+        store = make_store()
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("Veo failed")
+
+        results = await asyncio.gather(
+            store.get_or_create("veo", {"p": 1}, fail),
+            store.get_or_create("veo", {"p": 1}, fail),
+            return_exceptions=True,
+        )
+        render = Render()
+        render.release.set()
+        return results, await store.get_or_create("veo", {"p": 1}, render)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == ("gs://bucket/video.mp4", False)
+
+
+def test_disabled_store_always_creates():
+    async def scenario():
+        store, render = make_store(), Render()
+        store.enabled = False
+        render.release.set()
+        await store.get_or_create("veo", {"p": 1}, render)
+        return await store.get_or_create("veo", {"p": 1}, render), render.calls
+
+    assert asyncio.run(scenario()) == (("gs://bucket/video.mp4", False), 2)
@@ -0,0 +1,43 @@
+import asyncio
+
+from manager.tools import progress
+
+
+async def _first(session, timeout=0.05):
+    events = progress.subscribe(session, idle_timeout=timeout)
+    try:
+        return await anext(events)
+    finally:
+        await events.aclose()
+
+
+def test_events_are_scoped_by_app_user_and_session():
+    progress.publish(("manager", "alice", "s1"), "generate_a_roll", "queued")
+
+    assert asyncio.run(_first(("manager", "alice", "s1")))["stage"] == "queued"
+    # The same session id under another user or app sees nothing
+    assert asyncio.run(_first(("manager", "mallory", "s1"))) is None
+    assert asyncio.run(_first(("other", "alice", "s1"))) is None
+
+
+def test_published_events_reach_live_subscribers():
+    session = ("manager", "alice", "s2")
+
+    async def scenario():
+        events = progress.subscribe(session)
+        waiting = asyncio.create_task(anext(events))
+        await asyncio.sleep(0)
+        progress.publish(session, "post_process", "encoding", percent=40)
+        event = await asyncio.wait_for(waiting, 1)
+        await events.aclose()
+        return event
+
+    event = asyncio.run(scenario())
+    assert (event["source"], event["percent"]) == ("post_process", 40)
+    assert session not in progress._subscribers
+
+
+def test_contexts_without_a_session_publish_nothing():
+    report = progress.reporter(object(), "post_process")
+    report("uploading", bytes=1)
+    assert progress.session_key(object()) is None
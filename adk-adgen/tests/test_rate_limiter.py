@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from google.adk.agents import LlmAgent
+
+from manager.tools import http_client, rate_limiter
+
+
+def test_model_requests_take_a_token_without_holding_a_slot():
+    async def scenario():
+        limiter = rate_limiter.get_limiter("gemini")
+        await rate_limiter._throttle_model(None, None)
+        await rate_limiter._throttle_model(None, None)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["acquired"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_limit_model_calls_covers_the_agent_tree():
+    child = LlmAgent(name="child", model="gemini-2.0-flash")
+    root = LlmAgent(name="root", model="gemini-2.0-flash", sub_agents=[child])
+    rate_limiter.limit_model_calls(root)
+    for agent in (root, child):
+        assert agent.before_model_callback is rate_limiter._throttle_model
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate():
+    async def scenario():
+        limiter = rate_limiter.RateLimiter(rate=20.0, burst=2, concurrency=10)
+        started = asyncio.get_running_loop().time()
+        for _ in range(4):
+            await limiter.throttle()
+        return asyncio.get_running_loop().time() - started
+
+    # Two tokens are there at once, the other two take 1/20 s each
+    assert 0.08 <= asyncio.run(scenario()) < 0.5
+
+
+def test_concurrency_cap_holds_back_extra_requests():
+    async def scenario():
+        limiter = rate_limiter.RateLimiter(rate=1000.0, burst=10, concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        return peak, limiter.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert stats["acquired"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["max_queue_depth"] >= 4
+
+
+def test_throttle_does_not_wait_for_a_concurrency_slot():
+    async def scenario():
+        limiter = rate_limiter.RateLimiter(rate=1000.0, burst=10, concurrency=1)
+        async with limiter:
+            await asyncio.wait_for(limiter.throttle(), timeout=1.0)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["acquired"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_pause_holds_back_every_request():
+    async def scenario():
+        limiter = rate_limiter.RateLimiter(rate=1000.0, burst=10, concurrency=10)
+        limiter.pause(0.1)
+        started = asyncio.get_running_loop().time()
+        await limiter.throttle()
+        return asyncio.get_running_loop().time() - started, limiter.stats()
+
+    waited, stats = asyncio.run(scenario())
+    assert waited >= 0.1
+    assert stats["pauses"] == 1
+
+
+def test_cancelled_waiter_returns_its_slot():
+    async def scenario():
+        limiter = rate_limiter.RateLimiter(rate=1000.0, burst=10, concurrency=1)
+        limiter.pause(10)
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+    assert not limiter._semaphore.locked()
+
+
+def test_limiters_are_dropped_with_their_loop(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "limits_for", lambda name: (1000.0, 10, 1))
+
+    async def scenario():
+        limiter = rate_limiter.get_limiter("veo")
+
+        async def call():
+            async with limiter:
+                await asyncio.sleep(0.01)
+
+        # Contended, so the limiter's semaphore holds a reference to the loop
+        await asyncio.gather(*(call() for _ in range(4)))
+        return len(rate_limiter._limiters)
+
+    counts = [asyncio.run(scenario()) for _ in range(3)]
+    assert counts == [1, 1, 1]
+
+
+def test_endpoint_requests_pass_the_provider_limiter_too(monkeypatch):
+    in_flight = []
+
+    def handler(request):
+        in_flight.append(
+            {name: stats["in_flight"] for name, stats in rate_limiter.stats().items()}
+        )
+        return httpx.Response(200)
+
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_client, "get_client", lambda: client)
+        async with client:
+            await http_client.request("GET", "https://x.test/a", limit="heygen:status")
+            await http_client.request(
+                "GET", "https://x.test/b", limit="heygen:generate"
+            )
+        return rate_limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert in_flight[0] == {"heygen:status": 1, "heygen": 1}
+    assert in_flight[1]["heygen:generate"] == 1 and in_flight[1]["heygen"] == 1
+    assert stats["heygen"]["acquired"] == 2
+    assert stats["heygen"]["in_flight"] == 0
+
+
+def test_limits_fall_back_from_endpoint_to_provider_settings(monkeypatch):
+    settings = SimpleNamespace(
+        rate_limits={"RATE_LIMIT_HEYGEN": "7", "CONCURRENCY_HEYGEN_GENERATE": "1"}
+    )
+    monkeypatch.setattr(rate_limiter, "get_settings", lambda: settings)
+
+    # Own concurrency, provider's rate, default burst for the endpoint
+    assert rate_limiter.limits_for("heygen:generate") == (7.0, 2, 1)
+    assert rate_limiter.limits_for("unknown") == rate_limiter.FALLBACK_LIMIT
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from manager.tools import speculation
+from manager.tools.cache import TTLCache
+from manager.tools.generate_b_roll import b_roll_inputs
+from manager.tools.media_store import MediaStore
+
+
+class FakeContext:
+    def __init__(self, session_id: str, script: str):
+        self.session = SimpleNamespace(
+            app_name="manager", user_id="user", id=session_id
+        )
+        self.state = {
+            "av_script": {"video_script": script},
+            "product_image": {"sha256": "image"},
+        }
+
+
+async def load_image(context):
+    return {"gcsUri": "gs://bucket/image.png", "mimeType": "image/png"}
+
+
+def test_discarded_speculation_keeps_other_sessions_render(monkeypatch):
+    store = MediaStore(TTLCache(None, ttl=60, max_entries=10))
+    monkeypatch.setattr(speculation, "get_store", lambda: store)
+    monkeypatch.setattr(speculation, "load_image", load_image)
+    monkeypatch.setattr(
+        speculation, "get_settings", lambda: SimpleNamespace(speculative_b_roll=True)
+    )
+
+    async def scenario():
+        renders = []
+        finished = asyncio.Event()
+
+        async def render_b_roll(prompt, image, session=None):
+            renders.append(prompt)
+            await finished.wait()
+            return f"gs://bucket/{prompt}.mp4"
+
+        monkeypatch.setattr(speculation, "render_b_roll", render_b_roll)
+
+        # Two sessions speculate on the same draft, sharing one Veo job
+        session_a = FakeContext("a", "product spin")
+        session_b = FakeContext("b", "product spin")
+        await speculation.start_speculative_b_roll(session_a)
+        await speculation.start_speculative_b_roll(session_b)
+        assert len(speculation._tasks) == 2
+        await asyncio.sleep(0.05)
+
+        # Session A approves a different script, session B the draft
+        assert not speculation.claim("close-up", session_a)
+        assert speculation.claim("product spin", session_b)
+        inputs = b_roll_inputs("product spin", session_b)
+        generation = asyncio.create_task(
+            store.get_or_create("veo", inputs, lambda: render_b_roll("x", None))
+        )
+        await asyncio.sleep(0.05)
+        finished.set()
+        return await generation, renders
+
+    result, renders = asyncio.run(scenario())
+    assert result == ("gs://bucket/product spin.mp4", True)
+    assert renders == ["product spin"]
+    assert speculation._tasks == {}
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from manager.tools import state_offload
+from manager.tools.state_offload import hydrate_views, offload, view_instruction
+
+
+class FakeContext:
+    """Callback context with in-memory state and artifacts."""
+
+    def __init__(self, state: dict, artifacts: dict):
+        self.state = state
+        self.artifacts = artifacts
+        self.invocation_id = "invocation"
+        self.agent_name = "script_agent"
+
+    async def save_artifact(self, filename, part):
+        self.artifacts[filename] = part
+
+    async def load_artifact(self, filename):
+        return self.artifacts.get(filename)
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    monkeypatch.setattr(
+        state_offload,
+        "get_settings",
+        lambda: SimpleNamespace(state_offload_threshold=10),
+    )
+    monkeypatch.setattr(state_offload, "_hydrated", state_offload.OrderedDict())
+    monkeypatch.setattr(state_offload, "_pinned", state_offload.OrderedDict())
+    context = FakeContext({"metadata": {"brand": "Acme", "price": "$9"}}, {})
+    assert asyncio.run(offload(context, "metadata"))
+    # A fresh process: nothing hydrated yet
+    state_offload._hydrated.clear()
+    return context
+
+
+def test_provider_reads_values_hydrated_before_the_agent(offloaded):
+    provider = view_instruction("Brand: {metadata}", metadata=lambda v: v["brand"])
+    agent = SimpleNamespace(
+        instruction=provider,
+        before_agent_callback=None,
+        after_agent_callback=None,
+        sub_agents=[],
+    )
+    hydrate_views(agent)
+
+    asyncio.run(agent.before_agent_callback(offloaded))
+    # Instruction providers get a readonly context: state only, no artifacts
+    readonly = SimpleNamespace(
+        state=dict(offloaded.state),
+        invocation_id="invocation",
+        agent_name="script_agent",
+    )
+    assert provider(readonly) == "Brand: Acme"
+
+    asyncio.run(agent.after_agent_callback(offloaded))
+    assert not state_offload._pinned
+
+
+def test_provider_without_hydration_fails_clearly(offloaded):
+    provider = view_instruction("{metadata}", metadata=lambda v: v)
+    readonly = SimpleNamespace(
+        state=dict(offloaded.state), invocation_id="other", agent_name="script_agent"
+    )
+    with pytest.raises(LookupError):
+        provider(readonly)
+
+
+class StubLlm(BaseLlm):
+    """Model that answers every request with the same JSON text."""
+
+    reply: str
+
+    async def generate_content_async(self, llm_request, stream=False):
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=self.reply)])
+        )
+
+
+def test_offload_follows_the_persisted_output_key_delta(offloaded):
+    value = {"brand": "Acme", "price": "$9"}
+    agent = LlmAgent(
+        name="extraction_agent",
+        model=StubLlm(model="stub", reply=json.dumps(value)),
+        output_key="metadata",
+        after_agent_callback=state_offload.offload_state("metadata"),
+    )
+    runner = Runner(
+        app_name="app",
+        agent=agent,
+        session_service=InMemorySessionService(),
+        artifact_service=InMemoryArtifactService(),
+    )
+
+    async def scenario():
+        session = await runner.session_service.create_session(
+            app_name="app", user_id="user"
+        )
+        message = types.Content(role="user", parts=[types.Part(text="Extract")])
+        async for _ in runner.run_async(
+            user_id="user", session_id=session.id, new_message=message
+        ):
+            pass
+        return await runner.session_service.get_session(
+            app_name="app", user_id="user", session_id=session.id
+        )
+
+    session = asyncio.run(scenario())
+    deltas = [
+        event.actions.state_delta["metadata"]
+        for event in session.events
+        if "metadata" in event.actions.state_delta
+    ]
+    # The response event keeps the full value; the handle only replaces it afterwards
+    assert json.loads(deltas[0]) == value
+    assert state_offload.is_handle(deltas[-1])
+    assert session.state["metadata"] == deltas[-1]
@@ -0,0 +1,52 @@
+from manager.tools import edl, ffmpeg
+from manager.tools.post_process import can_stream_copy
+
+
+def a_roll_info(**stream) -> dict:
+    return {
+        "format": {"duration": "20.0"},
+        "streams": [
+            {
+                "codec_name": "h264",
+                "profile": "High",
+                "level": 31,
+                "pix_fmt": "yuv420p",
+                "width": 1280,
+                "height": 720,
+                "r_frame_rate": "25/1",
+                "time_base": "1/90000",
+                **stream,
+            }
+        ],
+        "frames": [{"pts_time": str(t)} for t in range(21)],
+    }
+
+
+CUTS = [edl.Cut("a", 0.0, 5.0), edl.Cut("b", 0.0, 5.0), edl.Cut("a", 10.0, 15.0)]
+
+
+def test_stream_copy_needs_an_encodable_profile_and_level():
+    assert can_stream_copy(a_roll_info(), CUTS)
+    assert not can_stream_copy(a_roll_info(profile="High 10"), CUTS)
+    assert not can_stream_copy(a_roll_info(profile="Baseline"), CUTS)
+    assert not can_stream_copy(a_roll_info(level=9), CUTS)
+    assert not can_stream_copy(a_roll_info(pix_fmt="yuv444p"), CUTS)
+
+
+def test_stream_copy_needs_keyframe_aligned_a_roll_cuts():
+    cuts = [edl.Cut("a", 0.0, 5.5), edl.Cut("b", 0.0, 5.0), edl.Cut("a", 10.5, 15.0)]
+    assert not can_stream_copy(a_roll_info(), cuts)
+
+
+def test_inserts_are_encoded_with_the_a_roll_profile_and_level():
+    profile = ffmpeg.EncodingProfile(preset="veryfast", crf=23, threads=2)
+    args = profile.matching_video_args(ffmpeg.video_stream(a_roll_info()))
+    assert args[args.index("-profile:v") + 1] == "high"
+    assert args[args.index("-level:v") + 1] == "3.1"
+
+
+def test_stream_signature_catches_parameter_differences():
+    copied = ffmpeg.stream_signature(a_roll_info())
+    assert ffmpeg.stream_signature(a_roll_info()) == copied
+    assert ffmpeg.stream_signature(a_roll_info(level=40)) != copied
+    assert ffmpeg.stream_signature(a_roll_info(time_base="1/15360")) != copied
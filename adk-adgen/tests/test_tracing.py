@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from google.adk.agents import LlmAgent
+
+from manager.tools import tracing
+
+
+def test_tool_span_is_closed_when_the_tool_raises():
+    tool = SimpleNamespace(name="post_process")
+    context = SimpleNamespace(function_call_id="call-1", agent_name="processing")
+
+    async def scenario():
+        tracing.set_session("session-1")
+        await tracing._before_tool(tool, {}, context)
+        assert ("tool", "call-1") in tracing._open_spans
+        await tracing._on_tool_error(tool, {}, context, RuntimeError("ffmpeg died"))
+
+    asyncio.run(scenario())
+    assert ("tool", "call-1") not in tracing._open_spans
+    assert tracing.summary("session-1")["kinds"]["tool"]["errors"] == 1
+
+
+def test_open_spans_are_bounded(monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_OPEN_SPANS", 2)
+    monkeypatch.setattr(tracing, "_open_spans", tracing.OrderedDict())
+    for i in range(3):
+        tracing._open(("agent", i), tracing.start_span(f"agent-{i}", "agent"))
+    assert list(tracing._open_spans) == [("agent", 1), ("agent", 2)]
+
+
+def test_instrument_adds_error_callbacks():
+    agent = LlmAgent(name="agent", model="gemini-2.0-flash")
+    tracing.instrument(agent)
+    assert agent.on_tool_error_callback is tracing._on_tool_error
+    assert agent.on_model_error_callback is tracing._on_model_error
+
+
+def test_timing_summary_is_written_when_the_root_agent_finishes():
+    child = LlmAgent(name="child", model="gemini-2.0-flash")
+    root = LlmAgent(name="root", model="gemini-2.0-flash", sub_agents=[child])
+    tracing.instrument(root)
+
+    def context(agent):
+        return SimpleNamespace(
+            invocation_id="invocation-1",
+            agent_name=agent.name,
+            session=SimpleNamespace(id="session-2"),
+            state={},
+        )
+
+    async def scenario():
+        contexts = [context(root), context(child)]
+        for agent, callback_context in zip((root, child), contexts):
+            await agent.before_agent_callback(callback_context)
+        for agent, callback_context in zip((child, root), contexts[::-1]):
+            await agent.after_agent_callback(callback_context)
+        return contexts
+
+    root_context, child_context = asyncio.run(scenario())
+    assert child_context.state == {}
+    assert root_context.state["timing_summary"]["agents"].keys() == {"root", "child"}
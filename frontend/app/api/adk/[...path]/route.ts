@@ -1,5 +1,16 @@
 import { NextRequest, NextResponse } from 'next/server'
 
+// Passes server-sent events (/run_sse, session progress) through as they arrive
+function streamResponse(response: Response) {
+  return new Response(response.body, {
+    status: response.status,
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+    },
+  })
+}
+
 export async function GET(
   request: NextRequest,
   { params }: { params: { path: string[] } }
@@ -19,6 +30,10 @@ export async function GET(
     })
     
     const contentType = response.headers.get('content-type')
+    if (contentType && contentType.includes('text/event-stream')) {
+      return streamResponse(response)
+    }
+
     let data
     
     if (contentType && contentType.includes('application/json')) {
@@ -58,6 +73,10 @@ export async function POST(
     })
     
     const contentType = response.headers.get('content-type')
+    if (contentType && contentType.includes('text/event-stream')) {
+      return streamResponse(response)
+    }
+
     let data
     
     if (contentType && contentType.includes('application/json')) {
@@ -25,6 +25,7 @@ import {
 import { FaReddit, FaTwitter, FaLinkedin, FaYoutube } from "react-icons/fa"
 
 import { fallbackMetadata, fallbackMarketAnalysis, fallbackScript } from "@/lib/fallback-data"
+import { describeProgress, runAgentStream, subscribeProgress, type ProgressEvent } from "@/lib/adk-stream"
 
 interface VideoSession {
   session_id: string
@@ -48,6 +49,8 @@ export function VideoGenerationWizard() {
   const [session, setSession] = useState<VideoSession | null>(null)
   const [isLoading, setIsLoading] = useState(false)
   const [feedback, setFeedback] = useState("")
+  // Latest progress event per tool (generate_a_roll, generate_b_roll, post_process)
+  const [progress, setProgress] = useState<Record<string, ProgressEvent>>({})
 
   const [displayedText, setDisplayedText] = useState("")
   const [showCursor, setShowCursor] = useState(true)
@@ -461,6 +464,17 @@ export function VideoGenerationWizard() {
     }
   }
 
+  // Follows the session's tool progress (HeyGen/Veo status, encoding, upload) until the returned function is called
+  const followProgress = (sessionId: string) => {
+    setProgress({})
+    return subscribeProgress(
+      `https://vibe-backend-75799208947.us-central1.run.app/apps/manager/users/${USER_ID}/sessions/${sessionId}/progress`,
+      // LOCAL: `/api/adk/apps/manager/users/${USER_ID}/sessions/${sessionId}/progress`,
+      // DOCKER: `http://localhost:8080/apps/manager/users/${USER_ID}/sessions/${sessionId}/progress`,
+      event => setProgress(prev => ({ ...prev, [event.source]: event }))
+    )
+  }
+
   // STEP 4: A-roll & B-roll Video Generation
   const approveScript = async () => {
     if (!session?.session_id || !session?.script) return
@@ -469,106 +483,58 @@ export function VideoGenerationWizard() {
     
     // Move to Step 5 (Raw Footage) immediately with loading state
     setCurrentStep(5)
+    setSession(prev => prev ? { ...prev, aroll_url: undefined, broll_url: undefined } : null)
+    const stopProgress = followProgress(session.session_id)
     
     try {
-      let arollUrl = null
+      let arollUrl: string | null = null
+      let brollUrl: string | null = null
       
-      // Step 4A: Generate A-roll (Avatar/Voiceover) video
-      const arollResponse = await fetch("https://vibe-backend-75799208947.us-central1.run.app/run", {
-      // LOCAL: const arollResponse = await fetch("/api/adk/run", {
-      // DOCKER: const arollResponse = await fetch("http://localhost:8080/run", {
-        method: "POST", 
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          appName: "manager",
-          userId: USER_ID, 
-          sessionId: session.session_id,
-          newMessage: {
-            role: "user",
-            parts: [{
-              text: `Run aroll to generate avatar video using this audio script: ${session.script.audio_script}`
-            }]
-          }
-        }),
-      })
-      
-      if (!arollResponse.ok) {
-        throw new Error(`Failed to call A-roll agent: ${arollResponse.status}`)
-      }
-      
-      const arollEvents = await arollResponse.json()
-      
-      // Extract A-roll URL from A-roll agent response
-      for (const event of arollEvents) {
-        if (event.content && event.content.parts) {
-          for (const part of event.content.parts) {
-            if (part.text) {
-              // Look for A-roll URL in standard format
-                              const urlMatch = part.text.match(/A-roll Video URL:\s*(https?:\/\/[^\s]+)/);
-              if (urlMatch) {
-                arollUrl = urlMatch[1];
-                break;
-              }
-            }
-          }
+      // Step 4: Generate A-roll (Avatar/Voiceover) and B-roll (Product Footage) videos in parallel
+      await runAgentStream("https://vibe-backend-75799208947.us-central1.run.app/run_sse", {
+      // LOCAL: await runAgentStream("/api/adk/run_sse", {
+      // DOCKER: await runAgentStream("http://localhost:8080/run_sse", {
+        appName: "manager",
+        userId: USER_ID, 
+        sessionId: session.session_id,
+        newMessage: {
+          role: "user",
+          parts: [{
+            text: `Run media agent to generate the avatar video and product video in parallel using this audio script: ${session.script.audio_script} and this video script: ${session.script.video_script}`
+          }]
         }
-        if (arollUrl) break;
-      }
-      
-      // Step 4B: Generate B-roll (Product Footage) video
-      const brollResponse = await fetch("https://vibe-backend-75799208947.us-central1.run.app/run", {
-      // LOCAL: const brollResponse = await fetch("/api/adk/run", {
-      // DOCKER: const brollResponse = await fetch("http://localhost:8080/run", {
-        method: "POST", 
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          appName: "manager",
-          userId: USER_ID, 
-          sessionId: session.session_id,
-          newMessage: {
-            role: "user",
-            parts: [{
-              text: `Run broll to generate product video using this video script: ${session.script.video_script}`
-            }]
-          }
-        }),
-      })
-      
-      if (!brollResponse.ok) {
-        throw new Error(`Failed to call B-roll agent: ${brollResponse.status}`)
-      }
-      
-      const brollEvents = await brollResponse.json()
-      
-      // Extract B-roll URL from B-roll agent response
-      let brollUrl = null
-      
-      for (const event of brollEvents) {
-        if (event.content && event.content.parts) {
-          for (const part of event.content.parts) {
-            if (part.text) {
-              // Look for B-roll URL in standard format (supports both https and gs:// URLs)
-                              const urlMatch = part.text.match(/B-roll Video URL:\s*((?:https?|gs):\/\/[^\s]+)/);
-              if (urlMatch) {
-                const rawUrl = urlMatch[1];
-                
-                // Convert GCS URI to public HTTP URL since bucket is now public
-                if (rawUrl.startsWith('gs://')) {
-                  brollUrl = rawUrl.replace('gs://', 'https://storage.googleapis.com/');
-                } else {
-                  brollUrl = rawUrl;
-                }
-                break;
+      }, event => {
+        // Extract A-roll and B-roll URLs from the interleaved A-roll and B-roll agent responses
+        for (const part of event.content?.parts ?? []) {
+          if (part.text) {
+            // Look for A-roll URL in standard format
+            const arollMatch = part.text.match(/A-roll Video URL:\s*(https?:\/\/[^\s]+)/);
+            if (arollMatch && !arollUrl) {
+              arollUrl = arollMatch[1];
+            }
+            
+            // Look for B-roll URL in standard format (supports both https and gs:// URLs)
+            const brollMatch = part.text.match(/B-roll Video URL:\s*((?:https?|gs):\/\/[^\s]+)/);
+            if (brollMatch && !brollUrl) {
+              const rawUrl = brollMatch[1];
+              
+              // Convert GCS URI to public HTTP URL since bucket is now public
+              if (rawUrl.startsWith('gs://')) {
+                brollUrl = rawUrl.replace('gs://', 'https://storage.googleapis.com/');
+              } else {
+                brollUrl = rawUrl;
               }
             }
           }
         }
-        if (brollUrl) break;
-      }
+        
+        // Show each video as soon as its agent reports it
+        setSession(prev => prev ? {
+          ...prev,
+          aroll_url: arollUrl ?? undefined,
+          broll_url: brollUrl ?? undefined
+        } : null)
+      })
       
       if (arollUrl && brollUrl) {
         setSession(prev => prev ? {
@@ -593,6 +559,8 @@ export function VideoGenerationWizard() {
       setIsLoading(false)
       
       alert(`Error: ${error instanceof Error ? error.message : 'Unknown error'}.`)
+    } finally {
+      stopProgress()
     }
   }
 
@@ -601,35 +569,24 @@ export function VideoGenerationWizard() {
     if (!session?.session_id || !session?.aroll_url || !session?.broll_url) return
     
     setIsLoading(true)
+    const stopProgress = followProgress(session.session_id)
     
     try {
-      // Call the manager agent to run processing agent
-      const runResponse = await fetch("https://vibe-backend-75799208947.us-central1.run.app/run", {
-      // LOCAL: const runResponse = await fetch("/api/adk/run", {
-      // DOCKER: const runResponse = await fetch("http://localhost:8080/run", {
-        method: "POST", 
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          appName: "manager",
-          userId: USER_ID, 
-          sessionId: session.session_id,
-          newMessage: {
-            role: "user",
-            parts: [{
-              text: `Run processing agent to combine A-roll and B-roll into final video`
-            }]
-          }
-        }),
+      // Call the manager agent to run processing agent, following encoding and upload progress
+      const events = await runAgentStream("https://vibe-backend-75799208947.us-central1.run.app/run_sse", {
+      // LOCAL: const events = await runAgentStream("/api/adk/run_sse", {
+      // DOCKER: const events = await runAgentStream("http://localhost:8080/run_sse", {
+        appName: "manager",
+        userId: USER_ID, 
+        sessionId: session.session_id,
+        newMessage: {
+          role: "user",
+          parts: [{
+            text: `Run processing agent to combine A-roll and B-roll into final video`
+          }]
+        }
       })
       
-      if (!runResponse.ok) {
-        throw new Error(`Failed to call manager agent: ${runResponse.status}`)
-      }
-      
-      const events = await runResponse.json()
-      
       // Extract final video URL from processing agent response
       let finalVideoUrl = null
       
@@ -674,6 +631,8 @@ export function VideoGenerationWizard() {
       setIsLoading(false)
       
       alert(`Error: ${error instanceof Error ? error.message : 'Unknown error'}.`)
+    } finally {
+      stopProgress()
     }
   }
 
@@ -683,6 +642,7 @@ export function VideoGenerationWizard() {
     setSession(null)
     setIsLoading(false)
     setFeedback("")
+    setProgress({})
     setDisplayedText("")
     setCurrentPhraseIndex(0)
   }
@@ -1193,6 +1153,9 @@ export function VideoGenerationWizard() {
                         <div className="text-center">
                           <Loader2 className="w-8 h-8 text-purple-400 mx-auto mb-2 animate-spin" />
                           <p className="text-gray-400 text-sm" style={{ fontFamily: 'IBM Plex Mono, monospace' }}>GENERATING A-ROLL...</p>
+                          {describeProgress(progress.generate_a_roll) && (
+                            <p className="text-gray-500 text-xs mt-1">{describeProgress(progress.generate_a_roll)}</p>
+                          )}
                         </div>
                       </div>
                     )}
@@ -1225,6 +1188,9 @@ export function VideoGenerationWizard() {
                         <div className="text-center">
                           <Loader2 className="w-8 h-8 text-purple-400 mx-auto mb-2 animate-spin" />
                           <p className="text-gray-400 text-sm" style={{ fontFamily: 'IBM Plex Mono, monospace' }}>GENERATING B-ROLL...</p>
+                          {describeProgress(progress.generate_b_roll) && (
+                            <p className="text-gray-500 text-xs mt-1">{describeProgress(progress.generate_b_roll)}</p>
+                          )}
                         </div>
                       </div>
                     )}
@@ -1238,16 +1204,19 @@ export function VideoGenerationWizard() {
                   disabled={isLoading || !session?.aroll_url || !session?.broll_url}
                   className="bg-purple-600/90 hover:bg-purple-500 text-white px-8 py-4 font-semibold transition-all duration-200 shadow-lg hover:shadow-xl disabled:opacity-50 disabled:cursor-not-allowed"
                 >
-                  {isLoading ? (
-                    <>
-                      <Loader2 className="w-5 h-5 mr-3 animate-spin" />
-                      Processing into Final Video...
-                    </>
-                  ) : !session?.aroll_url || !session?.broll_url ? (
+                  {!session?.aroll_url || !session?.broll_url ? (
                     <>
                       <Video className="w-5 h-5 mr-3" />
                       Waiting for Both Videos...
                     </>
+                  ) : isLoading ? (
+                    <>
+                      <Loader2 className="w-5 h-5 mr-3 animate-spin" />
+                      Processing into Final Video...
+                      {describeProgress(progress.post_process) && (
+                        <span className="ml-2 text-purple-200">({describeProgress(progress.post_process)})</span>
+                      )}
+                    </>
                   ) : (
                     <>
                       <Video className="w-5 h-5 mr-3" />
@@ -1263,8 +1232,8 @@ export function VideoGenerationWizard() {
               <h3 className="text-white font-semibold text-xl mb-3">Generating Raw Footage...</h3>
               <p className="text-gray-400 text-base">Creating your A-roll and B-roll videos</p>
               <div className="mt-4 space-y-2 text-sm">
-                <p className="text-gray-500">A-roll: Generating avatar video using HeyGen</p>
-                <p className="text-gray-500">B-roll: Generating product video using Veo 2</p>
+                <p className="text-gray-500">A-roll: {describeProgress(progress.generate_a_roll) ?? "Generating avatar video using HeyGen"}</p>
+                <p className="text-gray-500">B-roll: {describeProgress(progress.generate_b_roll) ?? "Generating product video using Veo 2"}</p>
                 <p className="text-gray-500 mt-3">Total time: ~3-6 minutes</p>
               </div>
             </div>
@@ -0,0 +1,113 @@
+// Progress event published by the backend's tools (see manager/tools/progress.py)
+export interface ProgressEvent {
+  source: string
+  stage: string
+  time: number
+  status?: string
+  polls?: number
+  percent?: number
+  bytes?: number
+  total_bytes?: number
+  error?: string
+  [field: string]: any
+}
+
+// POSTs a run request to ADK's /run_sse and returns its events, calling onEvent as each arrives
+export async function runAgentStream(
+  url: string,
+  body: object,
+  onEvent?: (event: any) => void
+): Promise<any[]> {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ ...body, streaming: false }),
+  })
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to call agent: ${response.status}`)
+  }
+
+  const events: any[] = []
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  const handle = (block: string) => {
+    const data = block
+      .split("\n")
+      .filter(line => line.startsWith("data:"))
+      .map(line => line.slice(5).trim())
+      .join("\n")
+    if (!data) return
+
+    const event = JSON.parse(data)
+    if (event.error) {
+      throw new Error(event.error)
+    }
+    events.push(event)
+    onEvent?.(event)
+  }
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer = (buffer + decoder.decode(value, { stream: true })).replace(/\r\n/g, "\n")
+
+    let boundary: number
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      handle(buffer.slice(0, boundary))
+      buffer = buffer.slice(boundary + 2)
+    }
+  }
+  handle(buffer)
+
+  return events
+}
+
+// Follows a session's progress stream; returns a function that closes it
+export function subscribeProgress(
+  url: string,
+  onProgress: (event: ProgressEvent) => void
+): () => void {
+  const source = new EventSource(url)
+  source.addEventListener("progress", message => {
+    onProgress(JSON.parse((message as MessageEvent).data))
+  })
+  return () => source.close()
+}
+
+const megabytes = (bytes: number) => (bytes / 1024 / 1024).toFixed(1)
+
+// One-line description of a tool's latest progress event, for loading states
+export function describeProgress(event?: ProgressEvent): string | null {
+  if (!event) return null
+
+  switch (event.stage) {
+    case "started":
+      return "Starting..."
+    case "queued":
+      return event.source === "generate_a_roll" ? "Queued with HeyGen..." : "Queued with Veo..."
+    case "status":
+      if (event.source === "generate_b_roll") {
+        return `Veo is rendering (check ${event.polls})...`
+      }
+      return `HeyGen status: ${event.status}...`
+    case "encoding":
+      return `Encoding ${event.percent}%`
+    case "uploading":
+      if (event.total_bytes) {
+        return `Uploading ${megabytes(event.bytes ?? 0)} / ${megabytes(event.total_bytes)} MB`
+      }
+      return "Uploading..."
+    case "completed":
+      return event.reused ? "Reused an earlier render" : "Done"
+    case "failed":
+      return `Failed: ${event.error}`
+    default:
+      return null
+  }
+}